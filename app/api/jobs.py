@@ -0,0 +1,124 @@
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Callable, List, Optional
+from app.api.models import QueryRequest
+from app.api.pipeline import InvestigationPipeline
+from app.core.config import settings
+from app.db.job_queue import JobQueue
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LeaseHeartbeat:
+    """Renews a running job's lease every third of ``JOB_LEASE_SECONDS``, so an investigation
+    slower than the lease is not claimed and run again by another worker."""
+
+    def __init__(self, queue: JobQueue, job_id: str, worker_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+
+    def start(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.JOB_LEASE_SECONDS / 3):
+            try:
+                if not self.queue.renew(self.job_id, self.worker_id):
+                    logger.warning(f"Worker {self.worker_id} lost the lease on job {self.job_id} while running it")
+                    return
+            except Exception as e:
+                logger.error(f"Failed to renew the lease on job {self.job_id}: {str(e)}")
+
+
+class JobWorkerPool:
+    """Threads that pull investigation jobs from a ``JobQueue`` and run them through the pipeline."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        pipeline_factory: Callable[[], InvestigationPipeline],
+        workers: Optional[int] = None
+    ):
+        self.queue = queue
+        self.pipeline_factory = pipeline_factory
+        self.workers = settings.JOB_WORKERS if workers is None else workers
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_purge = 0.0
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+            thread = threading.Thread(target=self._run, args=(worker_id,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Started {self.workers} investigation job workers")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self, worker_id: str) -> None:
+        pipeline = None
+
+        while not self._stop.is_set():
+            if pipeline is None:
+                try:
+                    pipeline = self.pipeline_factory()
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} failed to build the pipeline, retrying: {str(e)}")
+                    self._stop.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                    continue
+
+            try:
+                job = self.queue.claim(worker_id)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to claim a job: {str(e)}")
+                self._stop.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            if job is None:
+                self._purge_if_due()
+                self._stop.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            self.run_job(pipeline, job, worker_id)
+
+    def run_job(self, pipeline: InvestigationPipeline, job: dict, worker_id: str) -> None:
+        logger.info(f"Running investigation job {job['job_id']} (attempt {job['attempts']})")
+        heartbeat = LeaseHeartbeat(self.queue, job["job_id"], worker_id).start()
+        try:
+            try:
+                response = pipeline.investigate(QueryRequest(**job["request"]))
+            finally:
+                heartbeat.stop()
+            recorded = self.queue.complete(job["job_id"], worker_id, response.model_dump(mode="json"))
+        except Exception as e:
+            logger.error(f"Investigation job {job['job_id']} failed: {str(e)}")
+            recorded = self.queue.fail(job["job_id"], worker_id, f"Investigation failed: {str(e)}")
+
+        if not recorded:
+            logger.warning(f"Worker {worker_id} lost the lease on job {job['job_id']}; outcome discarded")
+
+    def _purge_if_due(self) -> None:
+        if time.time() - self._last_purge < 3600:
+            return
+        self._last_purge = time.time()
+        purged = self.queue.purge_finished()
+        if purged:
+            logger.info(f"Purged {purged} finished investigation jobs")
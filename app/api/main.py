@@ -1,21 +1,72 @@
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Response, Query, Header, Path
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.models import QueryRequest, InvestigationResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, PlainTextResponse
+from typing import List, Optional
+from app.api.models import QueryRequest, BatchQueryRequest, InvestigationResponse, EvidenceResponse, JobResponse, ProfileListResponse, ReportListResponse
+from app.api.pipeline import InvestigationPipeline, response_payload
+from app.api.jobs import JobWorkerPool
+from app.api.warmup import Readiness
+from app.api.watcher import CorpusWatcher
+from app.db.job_queue import JobQueue, TERMINAL_STATUSES
+from app.db.pinecone_db import case_namespace
 from app.rag.retriever import DocumentRetriever
 from app.rag.reranker import DocumentReranker
 from app.rag.llm import ReportGenerator
 from app.rag.guard_agent import GuardAgent
 from app.db.s3_storage import S3Storage
+from app.core.metrics import render_metrics
+from app.core import profiling
 from app.core.config import settings
+import asyncio
+import functools
 import logging
-import datetime
+import json
+import time
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:  # optional: without orjson responses are encoded with the json module
+    DefaultResponse = JSONResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+readiness = Readiness()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ON_STARTUP:
+        readiness.start(build_pipeline)
+    else:
+        readiness.mark_ready()
+    
+    worker_pool = None
+    if settings.JOB_WORKERS > 0:
+        worker_pool = JobWorkerPool(get_job_queue(), build_pipeline)
+        worker_pool.start()
+    
+    watcher = None
+    if settings.WATCH_CASE_FILES:
+        watcher = CorpusWatcher()
+        watcher.start()
+    
+    yield
+    
+    if worker_pool is not None:
+        worker_pool.stop(timeout=5)
+    if watcher is not None:
+        watcher.stop(timeout=5)
+    readiness.stop(timeout=5)
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=DefaultResponse,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -25,6 +76,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL)
 
 def get_retriever():
     return DocumentRetriever()
@@ -41,6 +93,32 @@ def get_s3_storage():
 def get_guard_agent():
     return GuardAgent()
 
+def get_pipeline(
+    retriever: DocumentRetriever = Depends(get_retriever),
+    reranker: DocumentReranker = Depends(get_reranker),
+    report_generator: ReportGenerator = Depends(get_report_generator),
+    s3_storage: S3Storage = Depends(get_s3_storage),
+    guard_agent: GuardAgent = Depends(get_guard_agent)
+):
+    return InvestigationPipeline(retriever, reranker, report_generator, s3_storage, guard_agent)
+
+def build_pipeline():
+    """Pipeline for use outside a request (job workers), honouring dependency overrides."""
+    def resolve(dependency):
+        return app.dependency_overrides.get(dependency, dependency)()
+    
+    return InvestigationPipeline(
+        resolve(get_retriever),
+        resolve(get_reranker),
+        resolve(get_report_generator),
+        resolve(get_s3_storage),
+        resolve(get_guard_agent)
+    )
+
+@functools.lru_cache()
+def get_job_queue():
+    return JobQueue()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Crypto Detective RAG API"}
@@ -48,74 +126,150 @@ def read_root():
 @app.post(f"{settings.API_V1_STR}/investigate", response_model=InvestigationResponse)
 async def investigate(
     request: QueryRequest,
-    retriever: DocumentRetriever = Depends(get_retriever),
-    reranker: DocumentReranker = Depends(get_reranker),
-    report_generator: ReportGenerator = Depends(get_report_generator),
-    s3_storage: S3Storage = Depends(get_s3_storage),
-    guard_agent: GuardAgent = Depends(get_guard_agent)
+    pipeline: InvestigationPipeline = Depends(get_pipeline),
+    x_profile: Optional[str] = Header(None, description="Set to 1 to profile this request; see /profiles")
 ):
-
     try:
-        logger.info(f"Processing investigation query: {request.query}")
-        
-        is_relevant, reason = guard_agent.is_query_relevant(request.query)
-        
-        if not is_relevant:
-            logger.warning(f"Rejected irrelevant query: '{request.query}'. Reason: {reason}")
-            
-            rejection = guard_agent.generate_rejection_response(request.query, reason)
-            
-            return InvestigationResponse(
-                query=request.query,
-                retrieval={
-                    "documents": [],
-                    "strategy": "none",
-                    "expanded_queries": None
-                },
-                report={
-                    "report": rejection["message"],
-                    "query": request.query,
-                    "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "error": True,
-                    "is_relevant": False,
-                    "rejection_reason": reason
-                },
-                storage={
-                    "success": False,
-                    "error": "Query rejected as irrelevant to investigation"
-                }
-            )
-        
-        logger.info(f"Query validated as relevant: {reason}")
-        
-        retrieval_result = retriever.retrieve(request.query)
-        
-        reranked_documents = reranker.rerank_documents(
-            query=request.query,
-            documents=retrieval_result["documents"]
-        )
-        
-        retrieval_result["documents"] = reranked_documents
-        
-        report_data = report_generator.generate_report(
-            query=request.query,
-            documents=reranked_documents,
-            retrieval_info=retrieval_result
-        )
-        
-        storage_result = s3_storage.save_report(report_data)
-        
-        return InvestigationResponse(
-            query=request.query,
-            retrieval=retrieval_result,
-            report=report_data,
-            storage=storage_result
-        )
+        headers = None
+        if profiling.requested(x_profile):
+            profile = profiling.RequestProfile(profiling.query_label(request.query))
+            # Not coalesced: a request joining another's investigation would only profile the wait.
+            response = await run_in_threadpool(profile.run, pipeline.investigate, request, coalesce=False)
+            headers = {"X-Profile-Id": profile.profile_id}
+        else:
+            response = await run_in_threadpool(pipeline.investigate, request)
+        # Returning a response directly skips FastAPI re-validating the model it was built from.
+        return DefaultResponse(response_payload(response, request), headers=headers)
         
     except Exception as e:
         logger.error(f"Error processing investigation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Investigation failed: {str(e)}")
 
+@app.post(f"{settings.API_V1_STR}/investigate/batch")
+def investigate_batch(
+    request: BatchQueryRequest,
+    pipeline: InvestigationPipeline = Depends(get_pipeline)
+):
+    if len(request.queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.queries)} queries (max {settings.BATCH_MAX_QUERIES})"
+        )
+    
+    logger.info(f"Processing batch of {len(request.queries)} investigation queries")
+    
+    lines = (
+        json.dumps(item) + "\n"
+        for item in pipeline.investigate_batch(request.queries, request.max_concurrency)
+    )
+    # An explicit identity encoding keeps the gzip middleware from buffering the stream.
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers={"Content-Encoding": "identity"})
+
+@app.get(f"{settings.API_V1_STR}/evidence", response_model=EvidenceResponse)
+def get_evidence(
+    ids: List[str] = Query(..., description="Evidence chunk ids, as returned in an investigation's documents"),
+    case_id: Optional[str] = Query(None, pattern=r"^[A-Za-z0-9_-]{1,64}$"),
+    retriever: DocumentRetriever = Depends(get_retriever)
+):
+    if len(ids) > settings.EVIDENCE_MAX_IDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many ids: {len(ids)} (max {settings.EVIDENCE_MAX_IDS})"
+        )
+    
+    chunks = retriever.pinecone_db.get_chunks(ids, case_namespace(case_id))
+    return {
+        "evidence": [{"id": chunk_id, **chunks[chunk_id]} for chunk_id in ids if chunk_id in chunks],
+        "missing": [chunk_id for chunk_id in ids if chunk_id not in chunks]
+    }
+
+@app.get(f"{settings.API_V1_STR}/reports", response_model=ReportListResponse)
+def list_reports(
+    limit: int = Query(10, ge=1, le=settings.REPORTS_MAX_PAGE_SIZE),
+    token: Optional[str] = Query(None, description="next_token from the previous page"),
+    s3_storage: S3Storage = Depends(get_s3_storage)
+):
+    result = s3_storage.list_reports(limit, token)
+    if not result["success"]:
+        raise HTTPException(status_code=502, detail=f"Failed to list reports: {result['error']}")
+    return result
+
+@app.get(f"{settings.API_V1_STR}/reports/{{filename}}")
+def get_report(
+    filename: str = Path(..., pattern=r"^report_[A-Za-z0-9_]+\.json$"),
+    s3_storage: S3Storage = Depends(get_s3_storage)
+):
+    result = s3_storage.get_report(filename)
+    if not result["success"]:
+        if result["not_found"]:
+            raise HTTPException(status_code=404, detail=f"Report not found: {filename}")
+        raise HTTPException(status_code=502, detail=f"Failed to read report: {result['error']}")
+    # The stored JSON as is: no LLM calls and no decoding and re-encoding.
+    return Response(content=result["body"], media_type="application/json")
+
+@app.post(f"{settings.API_V1_STR}/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: QueryRequest, queue: JobQueue = Depends(get_job_queue)):
+    job = await run_in_threadpool(queue.enqueue, request.model_dump())
+    logger.info(f"Queued investigation job {job['job_id']}: {request.query}")
+    return job
+
+@app.get(f"{settings.API_V1_STR}/jobs/{{job_id}}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to long-poll for the job to finish"),
+    queue: JobQueue = Depends(get_job_queue)
+):
+    deadline = time.monotonic() + min(wait, settings.JOB_MAX_WAIT_SECONDS)
+    
+    while True:
+        job = await run_in_threadpool(queue.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+        if job["status"] in TERMINAL_STATUSES or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+def require_profile_access(
+    x_profile_token: Optional[str] = Header(None, description="Must match PROFILE_TOKEN when it is set")
+):
+    if not profiling.enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.token_accepted(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+@app.get(
+    f"{settings.API_V1_STR}/profiles",
+    response_model=ProfileListResponse,
+    dependencies=[Depends(require_profile_access)]
+)
+def list_profiles(limit: int = Query(20, ge=1, le=1000)):
+    return {"profiles": profiling.list_profiles(limit)}
+
+@app.get(f"{settings.API_V1_STR}/profiles/{{profile_id}}", dependencies=[Depends(require_profile_access)])
+def download_profile(
+    profile_id: str = Path(..., pattern=profiling.PROFILE_ID_PATTERN),
+    summary: bool = Query(False, description="Return the text summary instead of the profile artifact")
+):
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    if summary:
+        return PlainTextResponse(profile["summary"])
+    return FileResponse(
+        profile["path"],
+        media_type=profile["media_type"],
+        filename=f"{profile_id}.{profile['format']}"
+    )
+
+@app.get("/metrics")
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.get(f"{settings.API_V1_STR}/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get(f"{settings.API_V1_STR}/ready")
+async def ready_check():
+    return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
@@ -1,12 +1,54 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Any, Literal, Optional
+from app.core.config import settings
+
+# "evidence_attributes" is not a top-level field: it keeps the indexing attributes in evidence metadata.
+ResponseField = Literal["query", "retrieval", "report", "storage", "degradations", "timings", "evidence_attributes"]
 
 class QueryRequest(BaseModel):
     query: str = Field(..., description="Detective's question or investigation query")
+    latency_budget_ms: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Per-request latency budget; overrides LATENCY_BUDGET_MS, 0 disables degradation"
+    )
+    include_timings: bool = Field(False, description="Include a per-stage timing breakdown in the response")
+    case_id: Optional[str] = Field(
+        None,
+        pattern=r"^[A-Za-z0-9_-]{1,64}$",
+        description="Search only this case's partition; omit to search the shared namespace"
+    )
+    file_names: Optional[List[str]] = Field(None, description="Restrict evidence to these case files")
+    strategy: Optional[Literal["single-step", "multi-step", "hierarchical"]] = Field(
+        None,
+        description="Retrieval strategy; omit for RETRIEVAL_STRATEGY"
+    )
+    top_k: Optional[int] = Field(
+        None,
+        ge=1,
+        le=settings.TOP_K_RETRIEVAL_MAX,
+        description="Evidence documents to retrieve; omit for TOP_K_RETRIEVAL"
+    )
+    include_evidence_text: bool = Field(
+        True,
+        description="Include each evidence chunk's text; when false, fetch it by id from /evidence as needed"
+    )
+    fields: Optional[List[ResponseField]] = Field(None, description="Return only these top-level response fields")
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1, description="Investigation queries to process together")
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Upper bound on concurrent investigations; capped at BATCH_MAX_CONCURRENCY"
+    )
 
 class DocumentResponse(BaseModel):
+    # Validated straight from the pipeline's EvidenceCandidate objects
+    model_config = ConfigDict(from_attributes=True)
+    
     id: str
-    text: str
+    text: Optional[str] = None
     score: float
     confidence: str
     metadata: Dict[str, Any]
@@ -25,6 +67,7 @@ class ReportResponse(BaseModel):
     evidence_count: Optional[int] = None
     retrieval_strategy: Optional[str] = None
     error: Optional[bool] = None
+    skipped: Optional[bool] = None
     is_relevant: Optional[bool] = None
     rejection_reason: Optional[str] = None
 
@@ -40,4 +83,41 @@ class InvestigationResponse(BaseModel):
     query: str
     retrieval: RetrievalResponse
     report: ReportResponse
-    storage: S3Response
\ No newline at end of file
+    storage: S3Response
+    degradations: List[str] = Field(default_factory=list)
+    timings: Optional[Dict[str, float]] = None
+
+class EvidenceResponse(BaseModel):
+    evidence: List[Dict[str, Any]]
+    missing: List[str]
+
+class ReportSummary(BaseModel):
+    filename: str
+    last_modified: str
+    size: int
+    url: str
+
+class ReportListResponse(BaseModel):
+    reports: List[ReportSummary]
+    next_token: Optional[str] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    attempts: int
+    created_at: float
+    updated_at: float
+    result: Optional[InvestigationResponse] = None
+    error: Optional[str] = None
+
+class ProfileInfo(BaseModel):
+    profile_id: str
+    label: str
+    profiler: str
+    format: str
+    created_at: float
+    duration_ms: float
+    error: Optional[str] = None
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileInfo]
@@ -0,0 +1,473 @@
+import contextvars
+import datetime
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from app.api.models import QueryRequest, InvestigationResponse
+from app.core.budget import LatencyBudget
+from app.core.config import settings
+from app.core.metrics import stage, observe_stage, start_request_timings
+from app.core.singleflight import SingleFlight
+from app.db.candidates import EvidenceCandidate
+from app.db.s3_storage import S3Storage
+from app.rag.enrichment import ATTRIBUTE_KEYS
+from app.rag.guard_agent import GuardAgent
+from app.rag.llm import ReportGenerator
+from app.rag.reranker import DocumentReranker
+from app.rag.retriever import DocumentRetriever
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_investigations = SingleFlight("investigate")
+
+# Request fields that only shape the response, so requests differing in them share one investigation.
+PRESENTATION_FIELDS = ("include_evidence_text", "include_timings", "fields")
+
+
+# Evidence metadata written at indexing time, left out of responses unless "evidence_attributes" is requested.
+EVIDENCE_ATTRIBUTES = (*ATTRIBUTE_KEYS, "content_hash", "file_hash", "etag")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+def request_key(request: QueryRequest) -> Tuple[str, str]:
+    """Identity of an investigation: the normalized query plus every parameter that affects the result."""
+    params = json.dumps(request.model_dump(exclude={"query", *PRESENTATION_FIELDS}), sort_keys=True, default=str)
+    return normalize_query(request.query), params
+
+
+def response_payload(response: InvestigationResponse, request: QueryRequest) -> Dict[str, Any]:
+    """The JSON-ready response, trimmed to the fields and evidence text the request asked for."""
+    fields = set(request.fields or ())
+    include = (fields - {"evidence_attributes"}) or None
+    document: Dict[str, Any] = {}
+    if not request.include_evidence_text:
+        document["text"] = True
+    if "evidence_attributes" not in fields:
+        document["metadata"] = {key: True for key in EVIDENCE_ATTRIBUTES}
+    exclude: Dict[str, Any] = {}
+    if document:
+        exclude["retrieval"] = {"documents": {"__all__": document}}
+    if not request.include_timings:
+        exclude["timings"] = True
+    return response.model_dump(mode="json", include=include, exclude=exclude or None)
+
+
+def shared_response(
+    response: InvestigationResponse,
+    request: QueryRequest,
+    timings: Optional[Dict[str, float]] = None
+) -> InvestigationResponse:
+    """Another request's response as the answer to ``request``: its query text, its own lists and timings."""
+    return response.model_copy(update={
+        "query": request.query,
+        "report": response.report.model_copy(update={"query": request.query}),
+        "degradations": list(response.degradations),
+        "timings": _timing_breakdown(timings) if request.include_timings and timings is not None else None
+    })
+
+
+class InvestigationPipeline:
+    """Guard -> retrieval -> rerank -> report generation -> S3 persistence for investigation queries."""
+
+    def __init__(
+        self,
+        retriever: DocumentRetriever,
+        reranker: DocumentReranker,
+        report_generator: ReportGenerator,
+        s3_storage: S3Storage,
+        guard_agent: GuardAgent
+    ):
+        self.retriever = retriever
+        self.reranker = reranker
+        self.report_generator = report_generator
+        self.s3_storage = s3_storage
+        self.guard_agent = guard_agent
+
+    def investigate(self, request: QueryRequest, coalesce: bool = True) -> InvestigationResponse:
+        """Investigate a query; identical concurrent requests share one computation unless ``coalesce`` is off.
+
+        A request that joined another's computation gets the shared result under its own
+        query text, with its own timings (the time it waited). The shared run started first,
+        so its stage deadlines were never later than the joining request's own would be.
+        """
+        if not coalesce:
+            return self._investigate(request)
+        started_at = time.perf_counter()
+        key = (request_key(request), self.retriever.strategy, self.retriever.top_k)
+        response, shared = _investigations.do_shared(key, self._investigate, request)
+        if not shared:
+            return response
+        wait_ms = (time.perf_counter() - started_at) * 1000
+        return shared_response(response, request, {"coalesced_wait": wait_ms, "total": wait_ms})
+
+    def _investigate(self, request: QueryRequest) -> InvestigationResponse:
+        logger.info(f"Processing investigation query: {request.query}")
+
+        budget = LatencyBudget(request.latency_budget_ms)
+        timings = start_request_timings()
+
+        is_relevant, reason = self._guard(request, budget)
+
+        if not is_relevant:
+            return self._rejection(request, reason, budget, timings)
+
+        logger.info(f"Query validated as relevant: {reason}")
+
+        with stage("retrieval"):
+            retriever = self.retriever.with_options(request.strategy, request.top_k)
+            retrieval_result = retriever.retrieve(request.query, budget, request.case_id, request.file_names)
+
+        return self._complete(request, retrieval_result, budget, timings)
+
+    def investigate_batch(
+        self,
+        requests: List[QueryRequest],
+        max_concurrency: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Investigate many queries, sharing guard, expansion, embedding and search work between them.
+
+        Identical requests are computed once. All search texts are embedded in a single
+        call and each distinct text is searched once. Reranking, generation and storage
+        then run with bounded concurrency, and one ``result`` item per input request is
+        yielded as soon as its investigation completes, followed by a ``summary`` item.
+        A query that fails at any step gets an ``error`` item instead; the others go on.
+        """
+        started_at = time.perf_counter()
+
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, request in enumerate(requests):
+            groups.setdefault(request_key(request), []).append(index)
+
+        keys = list(groups)
+        unique = [requests[groups[key][0]] for key in keys]
+        budgets = [LatencyBudget(request.latency_budget_ms) for request in unique]
+        timings: List[Dict[str, float]] = [{} for _ in unique]
+        failures: Dict[int, str] = {}
+        workers = max(1, min(max_concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY))
+
+        def errors(i: int) -> Iterator[Dict[str, Any]]:
+            for index in groups[keys[i]]:
+                yield {"type": "error", "index": index, "query": requests[index].query, "error": failures[i]}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            guard_futures = [
+                _submit(pool, self._guard, request, budget, timings=timings[i])
+                for i, (request, budget) in enumerate(zip(unique, budgets))
+            ]
+            verdicts: Dict[int, Tuple[bool, str]] = {}
+            for i, future in enumerate(guard_futures):
+                try:
+                    verdicts[i] = future.result()
+                except Exception as e:
+                    logger.error(f"Guard check failed for batch investigation '{unique[i].query}': {str(e)}")
+                    failures[i] = f"Investigation failed: {str(e)}"
+
+            plans = self._plan_searches(pool, unique, budgets, verdicts, timings, failures)
+            search_results, search_errors = self._shared_search(pool, plans, timings)
+
+            for i, plan in list(plans.items()):
+                failed = [search_errors[search] for search, _ in plan["searches"] if search in search_errors]
+                if failed:
+                    failures[i] = f"Investigation failed: {failed[0]}"
+                    del plans[i]
+
+            for i in sorted(failures):
+                yield from errors(i)
+
+            futures = {}
+            for i, request in enumerate(unique):
+                if i in failures:
+                    continue
+                if i in plans:
+                    future = _submit(
+                        pool, self._complete_plan, request, plans[i], search_results, budgets[i], timings[i],
+                        timings=timings[i]
+                    )
+                else:
+                    future = _submit(
+                        pool, self._rejection, request, verdicts[i][1], budgets[i], timings[i], timings=timings[i]
+                    )
+                futures[future] = i
+
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing batch investigation '{unique[i].query}': {str(e)}")
+                    failures[i] = f"Investigation failed: {str(e)}"
+                    yield from errors(i)
+                    continue
+
+                for index in groups[keys[i]]:
+                    # Grouped requests may differ in query text and want differently trimmed responses.
+                    grouped = (
+                        response if index == groups[keys[i]][0]
+                        else shared_response(response, requests[index], timings[i])
+                    )
+                    result = response_payload(grouped, requests[index])
+                    yield {"type": "result", "index": index, "query": requests[index].query, "result": result}
+
+        yield {
+            "type": "summary",
+            "queries": len(requests),
+            "unique_queries": len(unique),
+            "failed_queries": sum(len(groups[keys[i]]) for i in failures),
+            "search_texts": len(search_results) + len(search_errors),
+            "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 2)
+        }
+
+    def _guard(self, request: QueryRequest, budget: LatencyBudget) -> Tuple[bool, str]:
+        with stage("guard"):
+            return self.guard_agent.is_query_relevant(request.query, budget)
+
+    def _plan_searches(
+        self,
+        pool: ThreadPoolExecutor,
+        requests: List[QueryRequest],
+        budgets: List[LatencyBudget],
+        verdicts: Dict[int, Tuple[bool, str]],
+        timings: List[Dict[str, float]],
+        failures: Dict[int, str]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Searches for each relevant request; a failed expansion is recorded in ``failures``."""
+        plans = {}
+        expansions = {}
+
+        for i, request in enumerate(requests):
+            if i not in verdicts or not verdicts[i][0]:
+                continue
+
+            retriever = self.retriever.with_options(request.strategy, request.top_k)
+            scope = (
+                request.case_id,
+                tuple(request.file_names) if request.file_names else None,
+                retriever.strategy == "hierarchical"
+            )
+
+            skip_expansion = budgets[i].expired("expansion")
+            if skip_expansion and retriever.expands_queries:
+                budgets[i].degrade("query_expansion_skipped")
+
+            if not retriever.expands_queries or skip_expansion:
+                plans[i] = {
+                    "retriever": retriever,
+                    "strategy": "single-step" if retriever.expands_queries else retriever.strategy,
+                    "expanded_queries": None,
+                    "searches": [((request.query, scope), retriever.candidate_k(retriever.top_k))]
+                }
+            else:
+                expansions[i] = (
+                    retriever,
+                    scope,
+                    _submit(pool, retriever.generate_search_queries, request.query, budgets[i], timings=timings[i])
+                )
+
+        for i, (retriever, scope, future) in expansions.items():
+            try:
+                expanded_queries = future.result()
+            except Exception as e:
+                logger.error(f"Query expansion failed for batch investigation '{requests[i].query}': {str(e)}")
+                failures[i] = f"Investigation failed: {str(e)}"
+                continue
+
+            top_k = retriever.candidate_k(retriever.expansion_top_k(len(expanded_queries)), len(expanded_queries))
+            plans[i] = {
+                "retriever": retriever,
+                "strategy": "multi-step",
+                "expanded_queries": expanded_queries,
+                "searches": [((text, scope), top_k) for text in expanded_queries]
+            }
+
+        return plans
+
+    def _shared_search(
+        self,
+        pool: ThreadPoolExecutor,
+        plans: Dict[int, Dict[str, Any]],
+        timings: List[Dict[str, float]]
+    ) -> Tuple[Dict[Tuple, List[EvidenceCandidate]], Dict[Tuple, str]]:
+        """Results of every planned search, and the error of each search that failed."""
+        # Searches are keyed by (text, (case_id, file_names, hierarchical)) so differently scoped
+        # requests never share results.
+        depth: Dict[Tuple, int] = {}
+        for plan in plans.values():
+            for search, top_k in plan["searches"]:
+                depth[search] = max(depth.get(search, 0), top_k)
+
+        if not depth:
+            return {}, {}
+
+        started_at = time.perf_counter()
+        results: Dict[Tuple, List[EvidenceCandidate]] = {}
+        search_errors: Dict[Tuple, str] = {}
+        with stage("retrieval"):
+            texts = list(dict.fromkeys(text for text, _ in depth))
+            embeddings, embedding_errors = self._embed_all(texts)
+
+            futures = {}
+            for (text, scope), top_k in depth.items():
+                if text in embedding_errors:
+                    search_errors[(text, scope)] = embedding_errors[text]
+                else:
+                    retriever = self.retriever.with_options("hierarchical" if scope[2] else "single-step")
+                    futures[(text, scope)] = _submit(
+                        pool, retriever.search, embeddings[text], top_k, scope[0], list(scope[1] or [])
+                    )
+
+            for search, future in futures.items():
+                try:
+                    results[search] = future.result()
+                except Exception as e:
+                    logger.error(f"Batch search for '{search[0]}' failed: {str(e)}")
+                    search_errors[search] = str(e)
+
+        # Every request waited for the whole shared phase.
+        retrieval_ms = (time.perf_counter() - started_at) * 1000
+        for i in plans:
+            timings[i]["retrieval"] = timings[i].get("retrieval", 0.0) + retrieval_ms
+
+        return results, search_errors
+
+    def _embed_all(self, texts: List[str]) -> Tuple[Dict[str, List[float]], Dict[str, str]]:
+        """Embed in one call; if that fails, text by text so one bad text fails only its own searches."""
+        try:
+            return dict(zip(texts, self.retriever.get_embeddings(texts))), {}
+        except Exception as e:
+            logger.warning(f"Batch embedding of {len(texts)} texts failed, embedding them one by one: {str(e)}")
+
+        embeddings, errors = {}, {}
+        for text in texts:
+            try:
+                embeddings[text] = self.retriever.get_embeddings([text])[0]
+            except Exception as e:
+                errors[text] = str(e)
+        return embeddings, errors
+
+    def _complete_plan(
+        self,
+        request: QueryRequest,
+        plan: Dict[str, Any],
+        search_results: Dict[Tuple, List[EvidenceCandidate]],
+        budget: LatencyBudget,
+        timings: Dict[str, float]
+    ) -> InvestigationResponse:
+        return self._complete(request, self._assemble_retrieval(plan, search_results), budget, timings)
+
+    def _assemble_retrieval(
+        self,
+        plan: Dict[str, Any],
+        search_results: Dict[Tuple, List[EvidenceCandidate]]
+    ) -> Dict[str, Any]:
+        all_results = []
+        for search, top_k in plan["searches"]:
+            all_results.extend(search_results[search][:top_k])
+
+        return {
+            "documents": plan["retriever"].merge_results(all_results),
+            "strategy": plan["strategy"],
+            "expanded_queries": plan["expanded_queries"]
+        }
+
+    def _rejection(
+        self,
+        request: QueryRequest,
+        reason: str,
+        budget: LatencyBudget,
+        timings: Optional[Dict[str, float]]
+    ) -> InvestigationResponse:
+        logger.warning(f"Rejected irrelevant query: '{request.query}'. Reason: {reason}")
+
+        rejection = self.guard_agent.generate_rejection_response(request.query, reason)
+        observe_stage("total", budget.elapsed_ms() / 1000)
+
+        return InvestigationResponse(
+            query=request.query,
+            retrieval={
+                "documents": [],
+                "strategy": "none",
+                "expanded_queries": None
+            },
+            report={
+                "report": rejection["message"],
+                "query": request.query,
+                "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "error": True,
+                "is_relevant": False,
+                "rejection_reason": reason
+            },
+            storage={
+                "success": False,
+                "error": "Query rejected as irrelevant to investigation"
+            },
+            degradations=budget.degradations,
+            timings=_timing_breakdown(timings) if request.include_timings and timings is not None else None
+        )
+
+    def _complete(
+        self,
+        request: QueryRequest,
+        retrieval_result: Dict[str, Any],
+        budget: LatencyBudget,
+        timings: Optional[Dict[str, float]]
+    ) -> InvestigationResponse:
+        if timings is None:
+            timings = start_request_timings()
+
+        with stage("rerank"):
+            reranked_documents = self.reranker.rerank_documents(
+                query=request.query,
+                documents=retrieval_result["documents"],
+                budget=budget
+            )
+
+        retrieval_result["documents"] = reranked_documents
+
+        with stage("generation"):
+            report_data = self.report_generator.generate_report(
+                query=request.query,
+                documents=reranked_documents,
+                retrieval_info=retrieval_result,
+                budget=budget
+            )
+
+        if report_data.get("skipped"):
+            storage_result = {"success": False, "error": "Report skipped under the latency budget; nothing saved"}
+        else:
+            with stage("storage"):
+                storage_result = self.s3_storage.save_report(report_data)
+
+        observe_stage("total", budget.elapsed_ms() / 1000)
+
+        if budget.degradations:
+            logger.warning(
+                f"Degraded investigation after {budget.elapsed_ms():.0f}ms: {', '.join(budget.degradations)}"
+            )
+
+        return InvestigationResponse(
+            query=request.query,
+            retrieval=retrieval_result,
+            report=report_data,
+            storage=storage_result,
+            degradations=budget.degradations,
+            timings=_timing_breakdown(timings) if request.include_timings else None
+        )
+
+
+def _submit(pool: ThreadPoolExecutor, fn, *args, timings: Optional[Dict[str, float]] = None):
+    # Run every task in a fresh context so per-request timings never leak between pooled threads;
+    # ``timings`` collects the stages the task times for its request.
+    context = contextvars.Context()
+    if timings is not None:
+        context.run(start_request_timings, timings)
+    return pool.submit(context.run, fn, *args)
+
+
+def _timing_breakdown(timings: Dict[str, float]) -> Dict[str, float]:
+    return {name: round(ms, 2) for name, ms in timings.items()}
@@ -1,97 +1,362 @@
-from app.rag.embeddings import EmbeddingProcessor
-from pinecone import Pinecone, ServerlessSpec
+from app.rag.embeddings import CaseSource, EmbeddingProcessor
+from app.rag.enrichment import ChunkEnricher
 from app.core.config import settings
-from typing import List, Dict, Any
+from app.core.clients import get_pinecone_client, get_pinecone_index
+from app.core.metrics import record_corpus_sync
+from app.db.case_sources import LocalCaseSource
+from app.db.chunk_store import ChunkStore, content_hash, get_chunk_store
+from app.db.generations import GenerationPointer, get_generation_pointer, physical_namespace
+from app.db.local_index import LocalVectorIndex, get_local_index
+from app.db.pinecone_db import case_namespace, file_namespace
+import numpy as np
+from typing import List, Dict, Any, Optional
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class InitPineCone:
-    def __init__(self):
-        pc = Pinecone(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENVIRONMENT
-        )
+    def __init__(self, index=None, chunk_store: Optional[ChunkStore] = None):
+        if index is None and settings.VECTOR_BACKEND == "local":
+            index = get_local_index()
         
-        if settings.PINECONE_INDEX not in pc.list_indexes():
-            pc.create_index(
-                name=settings.PINECONE_INDEX,
-                dimension=1536,  
-                metric="cosine",
-                spec=ServerlessSpec(
-                    cloud='aws',
-                    region='us-east-1'
+        if index is None:
+            from pinecone import ServerlessSpec
+            pc = get_pinecone_client()
+            
+            if settings.PINECONE_INDEX not in pc.list_indexes():
+                pc.create_index(
+                    name=settings.PINECONE_INDEX,
+                    dimension=settings.embedding_dimension,
+                    metric="cosine",
+                    spec=ServerlessSpec(
+                        cloud='aws',
+                        region='us-east-1'
+                    )
                 )
-            )
+            
+            index = get_pinecone_index()
         
-        self.index = pc.Index(settings.PINECONE_INDEX)
+        self.index = index
         self.namespace = settings.PINECONE_NAMESPACE
+        self.chunk_store = chunk_store or get_chunk_store()
 
-    def upsert_documents(self, documents: List[Dict[str, Any]]) -> None:
+    def upsert_documents(self, documents: List[Dict[str, Any]], namespace: Optional[str] = None) -> None:
+        namespace = namespace or self.namespace
         vectors = []
         
         for doc in documents:
+            if self.chunk_store is not None:
+                metadata = {**doc["metadata"], "content_hash": content_hash(doc["text"])}
+            else:
+                metadata = {"text": doc["text"], **doc["metadata"]}
+            
             vectors.append({
                 "id": doc["id"],
                 "values": doc["embedding"],
-                "metadata": {
-                    "text": doc["text"],
-                    **doc["metadata"]
-                }
+                "metadata": metadata
             })
         
+        if self.chunk_store is not None:
+            self.chunk_store.put_many(documents, namespace)
+        
         batch_size = 100
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
-            self.index.upsert(vectors=batch, namespace=self.namespace)
+            self.index.upsert(vectors=batch, namespace=namespace)
+        
+        if isinstance(self.index, LocalVectorIndex):
+            self.index.persist()
 
-    def delete_all(self) -> None:
+    def upsert_file_summaries(self, documents: List[Dict[str, Any]], namespace: Optional[str] = None) -> int:
+        """Index one summary vector per file (the normalized centroid of its chunk vectors) for hierarchical retrieval."""
+        namespace = namespace or self.namespace
+        files: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in documents:
+            files.setdefault(doc["metadata"]["file_name"], []).append(doc)
+        
+        vectors = []
+        for file_name, chunks in files.items():
+            embeddings = np.asarray([chunk["embedding"] for chunk in chunks], dtype=np.float32)
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            centroid = embeddings.mean(axis=0)
+            centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+            
+            metadata = {
+                k: v for k, v in chunks[0]["metadata"].items()
+                if k in ("file_name", "source", "case_id")
+            }
+            vectors.append({
+                "id": file_name,
+                "values": centroid.tolist(),
+                "metadata": {**metadata, "chunk_count": len(chunks)}
+            })
+        
+        batch_size = 100
+        for i in range(0, len(vectors), batch_size):
+            self.index.upsert(vectors=vectors[i:i + batch_size], namespace=file_namespace(namespace))
+        
+        if isinstance(self.index, LocalVectorIndex):
+            self.index.persist()
+        
+        return len(vectors)
+
+    def delete_documents(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        namespace = namespace or self.namespace
+        
+        batch_size = 1000
+        for i in range(0, len(ids), batch_size):
+            self.index.delete(ids=ids[i:i + batch_size], namespace=namespace)
+        
+        if self.chunk_store is not None:
+            self.chunk_store.delete(ids, namespace)
+        
+        if isinstance(self.index, LocalVectorIndex):
+            self.index.persist()
+
+    def delete_file_summaries(self, file_names: List[str], namespace: Optional[str] = None) -> None:
+        if file_names:
+            self.index.delete(ids=list(file_names), namespace=file_namespace(namespace or self.namespace))
+            if isinstance(self.index, LocalVectorIndex):
+                self.index.persist()
+
+    def verify(self, namespace: str, documents: List[Dict[str, Any]]) -> Optional[str]:
+        """Wait until ``namespace`` serves every document; returns why not if it still doesn't at the deadline."""
+        deadline = time.monotonic() + settings.GENERATION_VERIFY_TIMEOUT_SECONDS
+        probe = documents[0]
+        
+        while True:
+            namespaces = self.index.describe_index_stats().get("namespaces", {})
+            count = namespaces[namespace]["vector_count"] if namespace in namespaces else 0
+            
+            if count < len(documents):
+                reason = f"{count} of {len(documents)} vectors visible"
+            else:
+                matches = self.index.query(vector=probe["embedding"], top_k=5, namespace=namespace)["matches"]
+                if probe["id"] in {match["id"] for match in matches}:
+                    return None
+                reason = f"probe chunk '{probe['id']}' not found by its own embedding"
+            
+            if time.monotonic() >= deadline:
+                return reason
+            time.sleep(1)
+
+    def delete_all(self, namespace: Optional[str] = None) -> None:
+        namespace = namespace or self.namespace
         stats = self.index.describe_index_stats()
         namespaces = stats.get("namespaces", {})
         
-        if self.namespace in namespaces:
-            self.index.delete(deleteAll=True, namespace=self.namespace)
+        if self.chunk_store is not None:
+            self.chunk_store.delete_namespace(namespace)
+        
+        if file_namespace(namespace) in namespaces:
+            self.index.delete(deleteAll=True, namespace=file_namespace(namespace))
+        
+        if namespace in namespaces:
+            self.index.delete(deleteAll=True, namespace=namespace)
+            if isinstance(self.index, LocalVectorIndex):
+                self.index.persist()
         else:
-            print(f"Namespace '{self.namespace}' doesn't exist yet. Nothing to delete.")
+            print(f"Namespace '{namespace}' doesn't exist yet. Nothing to delete.")
 
 
 class DocumentService:
-    def __init__(self):
-        self.embedding_processor = EmbeddingProcessor()
-        self.pinecone_db = InitPineCone()
+    def __init__(
+        self,
+        embedding_processor: Optional[EmbeddingProcessor] = None,
+        pinecone_db: Optional[InitPineCone] = None,
+        generations: Optional[GenerationPointer] = None,
+        enricher: Optional[ChunkEnricher] = None
+    ):
+        self.embedding_processor = embedding_processor or EmbeddingProcessor()
+        self.pinecone_db = pinecone_db or InitPineCone()
+        self.generations = generations or get_generation_pointer()
+        self.enricher = enricher or (
+            ChunkEnricher(chunk_store=self.pinecone_db.chunk_store) if settings.ENRICHMENT_ENABLED else None
+        )
+    
+    def enrich(self, chunks: List[Dict[str, Any]]) -> None:
+        """Store topic tags, entities and a reliability prior in each chunk's metadata."""
+        if self.enricher is not None and chunks:
+            computed = self.enricher.enrich(chunks)
+            logger.info(f"Enriched {len(chunks)} chunks ({computed} computed, the rest reused by content hash)")
     
-    def load_all_documents(self) -> dict:
+    def load_all_documents(
+        self,
+        case_id: Optional[str] = None,
+        case_files_dir: Optional[str] = None,
+        source: Optional[CaseSource] = None
+    ) -> dict:
+        """Index the case files into a new generation and make it live once verified.
+        
+        The active generation keeps serving queries until the pointer flips, so a reload
+        never exposes an empty or partial index. Without a generation pointer the
+        documents are upserted into the live namespace in place.
+        """
+        namespace = case_namespace(case_id)
+        generation = self.generations.new_generation() if self.generations is not None else None
+        target = physical_namespace(namespace, generation) if generation else namespace
+        
         try:
-            logger.info("Starting document loading process")
+            logger.info(f"Starting document loading process into '{target}'")
             
-            processed_chunks = self.embedding_processor.process_case_files()
+            source = source or LocalCaseSource(case_files_dir)
+            processed_chunks = self.embedding_processor.process_case_files(case_files_dir, case_id, source)
             
             logger.info(f"Generated {len(processed_chunks)} chunks from case files")
             
-            self.pinecone_db.upsert_documents(processed_chunks)
+            if source.failed:
+                raise RuntimeError(f"Could not read {len(source.failed)} case files: {', '.join(sorted(source.failed))}")
+            
+            if generation and not processed_chunks:
+                raise ValueError("No chunks to index; keeping the active generation")
+            
+            self.enrich(processed_chunks)
+            self.pinecone_db.upsert_documents(processed_chunks, target)
+            file_count = self.pinecone_db.upsert_file_summaries(processed_chunks, target)
+            
+            logger.info(f"Indexed summary vectors for {file_count} case files")
+            
+            if generation:
+                reason = self.pinecone_db.verify(target, processed_chunks)
+                if reason:
+                    raise RuntimeError(f"Generation {generation} failed verification: {reason}")
+                
+                retired = self.generations.activate(namespace, generation)
+                logger.info(f"Activated generation {generation} of '{namespace}'")
+                
+                for old in retired:
+                    self.pinecone_db.delete_all(physical_namespace(namespace, old))
+                    logger.info(f"Removed retired generation '{physical_namespace(namespace, old)}'")
             
             logger.info("Successfully uploaded documents to Pinecone")
             
             return {
                 "success": True,
                 "chunk_count": len(processed_chunks),
+                "generation": generation,
                 "message": "Documents successfully loaded and embedded"
             }
             
         except Exception as e:
             logger.error(f"Error loading documents: {str(e)}")
+            if generation:
+                self._discard(target)
             return {
                 "success": False,
                 "error": str(e),
                 "message": "Failed to load documents"
             }
     
-    def clear_documents(self) -> dict:
+    def sync_files(
+        self,
+        case_id: Optional[str] = None,
+        case_files_dir: Optional[str] = None,
+        file_names: Optional[List[str]] = None,
+        source: Optional[CaseSource] = None
+    ) -> dict:
+        """Re-index only the case files that were added, changed or deleted since they were last indexed.
+        
+        ``file_names`` limits the check to those files; by default every file in the source
+        and in the index is compared. S3 objects whose ETag matches the indexed one are
+        skipped without being downloaded; other files are compared by content hash.
+        Changes go into the active generation: a changed file's new chunks are upserted
+        before its leftover chunks are deleted, so it never disappears from search. Files
+        that cannot be read are left as indexed and counted in ``failed``. Needs the chunk
+        store to know what is indexed; without one this falls back to a full load.
+        """
+        chunk_store = self.pinecone_db.chunk_store
+        if chunk_store is None:
+            return self.load_all_documents(case_id, case_files_dir, source)
+        
+        source = source or LocalCaseSource(case_files_dir)
+        try:
+            namespace = case_namespace(case_id)
+            target = self.generations.resolve(namespace) if self.generations is not None else namespace
+            
+            indexed = chunk_store.files(target)
+            available = source.fingerprints()
+            candidates = set(file_names) if file_names is not None else set(indexed) | set(available)
+            
+            deleted = sorted(name for name in candidates if name in indexed and name not in available)
+            to_load = {
+                name for name in candidates & set(available)
+                if available[name] is None or indexed.get(name, {}).get("etag") != available[name]
+            }
+            changed: List[str] = []
+            
+            def changed_files():
+                for case_file in source.load(case_id, to_load):
+                    name = case_file["metadata"]["file_name"]
+                    if indexed.get(name, {}).get("file_hash") != case_file["metadata"]["file_hash"]:
+                        changed.append(name)
+                        yield case_file
+            
+            chunks = self.embedding_processor.embed_case_files(changed_files()) if to_load else []
+            added = [name for name in changed if name not in indexed]
+            
+            failed = sorted(source.failed)
+            if failed:
+                logger.warning(f"Could not read {len(failed)} case files, left as indexed: {', '.join(failed)}")
+            
+            if not changed and not deleted:
+                return {"success": True, "added": 0, "changed": 0, "deleted": 0, "failed": len(failed), "chunk_count": 0}
+            
+            new_ids = {chunk["id"] for chunk in chunks}
+            stale = [
+                chunk_id for name in changed + deleted
+                for chunk_id in indexed.get(name, {}).get("ids", []) if chunk_id not in new_ids
+            ]
+            replaced = [chunk_id for name in changed for chunk_id in indexed.get(name, {}).get("ids", [])]
+            # Read before the upsert overwrites the chunks whose ids are reused.
+            old_texts = {chunk["text"] for chunk in chunk_store.get_many(stale + replaced, target).values()}
+            
+            if chunks:
+                self.enrich(chunks)
+                self.pinecone_db.upsert_documents(chunks, target)
+                self.pinecone_db.upsert_file_summaries(chunks, target)
+            
+            if stale:
+                self.pinecone_db.delete_documents(stale, target)
+            self.pinecone_db.delete_file_summaries(deleted, target)
+            self.embedding_processor.forget(sorted(old_texts - {chunk["text"] for chunk in chunks}))
+            
+            record_corpus_sync("added", len(added))
+            record_corpus_sync("changed", len(changed) - len(added))
+            record_corpus_sync("deleted", len(deleted))
+            logger.info(
+                f"Synced '{target}': {len(added)} added, {len(changed) - len(added)} changed, "
+                f"{len(deleted)} deleted ({len(chunks)} chunks embedded, {len(stale)} removed)"
+            )
+            
+            return {
+                "success": True,
+                "added": len(added),
+                "changed": len(changed) - len(added),
+                "deleted": len(deleted),
+                "failed": len(failed),
+                "chunk_count": len(chunks)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error syncing documents: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to sync documents"
+            }
+    
+    def clear_documents(self, case_id: Optional[str] = None) -> dict:
         try:
-            logger.info("Clearing all documents from Pinecone")
+            namespace = case_namespace(case_id)
+            logger.info(f"Clearing all documents from Pinecone namespace '{namespace}'")
             
-            self.pinecone_db.delete_all()
+            if self.generations is None:
+                self.pinecone_db.delete_all(namespace)
+            else:
+                for generation in self.generations.forget(namespace):
+                    self.pinecone_db.delete_all(physical_namespace(namespace, generation))
             
             return {
                 "success": True,
@@ -104,4 +369,10 @@ class DocumentService:
                 "success": False,
                 "error": str(e),
                 "message": "Failed to clear documents"
-            }
\ No newline at end of file
+            }
+    
+    def _discard(self, namespace: str) -> None:
+        try:
+            self.pinecone_db.delete_all(namespace)
+        except Exception as e:
+            logger.error(f"Error removing unfinished generation '{namespace}': {str(e)}")
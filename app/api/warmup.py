@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.api.pipeline import InvestigationPipeline
+from app.core.clients import get_tokenizer
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Warm-up state of this process, reported by the ``/ready`` probe.
+
+    ``start`` warms up in a background thread so ``/health`` answers as soon as the server
+    is up. The process turns ready once the pipeline is built and the active vector index
+    namespace is loaded (retrying every ``WARMUP_RETRY_SECONDS`` until both succeed). Opening
+    the OpenAI and S3 connections and loading the tokenizer are best effort: failures are
+    reported but do not hold readiness back, since requests connect on demand anyway.
+    """
+
+    def __init__(self):
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = time.monotonic()
+        self.ready_after: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self) -> None:
+        self.ready_after = time.monotonic() - self.started_at
+        self._ready.set()
+
+    def start(self, pipeline_factory: Callable[[], InvestigationPipeline]) -> None:
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, args=(pipeline_factory,), name="warm-up", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "ready_after_seconds": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "warmup_ms": {name: round(ms, 1) for name, ms in self.steps.items()},
+            "errors": self.errors
+        }
+
+    def _run(self, pipeline_factory: Callable[[], InvestigationPipeline]) -> None:
+        steps = {"vector_index": warm_vector_index, "openai": warm_openai, "s3": warm_s3}
+        if settings.WATCH_CASE_FILES:
+            steps["tokenizer"] = lambda pipeline: get_tokenizer()
+
+        while not self._stop.is_set():
+            try:
+                pipeline = self._step("pipeline", pipeline_factory)
+                # Steps mostly wait on disk and network, so they overlap instead of adding up.
+                with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="warm-up") as pool:
+                    futures = {name: pool.submit(self._step, name, warm, pipeline) for name, warm in steps.items()}
+                for name, future in futures.items():
+                    if future.exception() is not None:
+                        logger.warning(f"Warm-up step '{name}' failed: {str(future.exception())}")
+                futures["vector_index"].result()
+                break
+            except Exception as e:
+                logger.error(f"Warm-up failed, retrying in {settings.WARMUP_RETRY_SECONDS}s: {str(e)}")
+                self._stop.wait(settings.WARMUP_RETRY_SECONDS)
+        else:
+            return
+
+        self.mark_ready()
+        logger.info(f"Ready after {self.ready_after:.2f}s (warm-up ms: {self.status()['warmup_ms']})")
+
+    def _step(self, name: str, warm: Callable, *args) -> Any:
+        start = time.perf_counter()
+        try:
+            result = warm(*args)
+            self.errors.pop(name, None)
+            return result
+        except Exception as e:
+            self.errors[name] = str(e)
+            raise
+        finally:
+            self.steps[name] = (time.perf_counter() - start) * 1000
+
+
+def warm_vector_index(pipeline: InvestigationPipeline) -> None:
+    """Probe the active namespace and its file summaries, loading them and the chunk store (or opening the Pinecone connection)."""
+    probe = [1.0] + [0.0] * (settings.embedding_dimension - 1)
+    pinecone_db = pipeline.retriever.pinecone_db
+    pinecone_db.similarity_search(probe, top_k=1)
+    pinecone_db.search_files(probe, top_n=1)
+
+
+def warm_openai(pipeline: InvestigationPipeline) -> None:
+    """Import the SDK (the retriever needs its exception types) and open a connection from each distinct client."""
+    import openai  # noqa: F401
+    clients = {
+        id(component.client): component.client
+        for component in (pipeline.guard_agent, pipeline.retriever, pipeline.reranker, pipeline.report_generator)
+    }
+    for client in clients.values():
+        client.with_options(timeout=settings.WARMUP_TIMEOUT_SECONDS).models.list()
+
+
+def warm_s3(pipeline: InvestigationPipeline) -> None:
+    storage = pipeline.s3_storage
+    storage.s3_client.head_bucket(Bucket=storage.bucket_name)
@@ -0,0 +1,158 @@
+import fcntl
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from app.api.services import DocumentService
+from app.core.config import settings
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: without watchdog the directory is polled
+    FileSystemEventHandler = object
+    Observer = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _WakeHandler(FileSystemEventHandler):
+    def __init__(self, wake: threading.Event):
+        self.wake = wake
+
+    def on_any_event(self, event) -> None:
+        self.wake.set()
+
+
+class CorpusWatcher:
+    """Background thread that keeps the index in step with the ``.txt`` files of a case directory.
+
+    The directory is polled every ``WATCH_POLL_INTERVAL_SECONDS`` (or woken early by
+    inotify/FSEvents when ``watchdog`` is installed). Files whose size or mtime changed are
+    collected until nothing has changed for ``WATCH_DEBOUNCE_SECONDS``, then only those
+    files are re-indexed through ``DocumentService.sync_files``. On start the whole
+    directory is reconciled against the index, so edits made while stopped are picked up;
+    a failed reconcile is retried after each quiet period until it succeeds.
+    An exclusive lock on ``WATCH_LOCK_PATH`` keeps it to one watcher when the API runs
+    several worker processes.
+    """
+
+    def __init__(
+        self,
+        service: Optional[DocumentService] = None,
+        case_files_dir: Optional[str] = None,
+        case_id: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        debounce: Optional[float] = None
+    ):
+        self.service = service or DocumentService()
+        self.case_files_dir = case_files_dir or settings.CASE_FILES_DIR
+        self.case_id = case_id
+        self.poll_interval = settings.WATCH_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self.debounce = settings.WATCH_DEBOUNCE_SECONDS if debounce is None else debounce
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._lock_file = None
+
+    def start(self) -> bool:
+        if not self._acquire_lock():
+            logger.info("Another process is already watching the case files")
+            return False
+
+        os.makedirs(self.case_files_dir, exist_ok=True)
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_WakeHandler(self._wake), self.case_files_dir, recursive=False)
+            self._observer.start()
+
+        self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Watching {self.case_files_dir} for case file changes "
+            f"({'filesystem events' if self._observer else f'polling every {self.poll_interval}s'})"
+        )
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def run_forever(self) -> None:
+        if not self.start():
+            return
+        try:
+            while self._thread.is_alive():
+                self._thread.join(1.0)
+        except KeyboardInterrupt:
+            self.stop(timeout=5)
+
+    def _acquire_lock(self) -> bool:
+        if os.path.dirname(settings.WATCH_LOCK_PATH):
+            os.makedirs(os.path.dirname(settings.WATCH_LOCK_PATH), exist_ok=True)
+        lock_file = open(settings.WATCH_LOCK_PATH, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in glob.glob(os.path.join(self.case_files_dir, "*.txt")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[os.path.basename(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _run(self) -> None:
+        snapshot = self._snapshot()
+        # Until the start-up reconcile succeeds (the index may not be reachable yet), it is
+        # retried in place of the changed files, which it covers.
+        reconciled = self._sync(None)
+
+        pending: Set[str] = set()
+        last_change = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.wait(self.debounce if pending or not reconciled else self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            current = self._snapshot()
+            changed = {name for name in current.keys() | snapshot.keys() if current.get(name) != snapshot.get(name)}
+            snapshot = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+
+            if (pending or not reconciled) and time.monotonic() - last_change >= self.debounce:
+                batch, pending = (sorted(pending) if reconciled else None), set()
+                if self._sync(batch):
+                    reconciled = True
+                else:
+                    # Retry the same files after another quiet period.
+                    pending |= set(batch or ())
+                    last_change = time.monotonic()
+
+    def _sync(self, file_names: Optional[List[str]]) -> bool:
+        result = self.service.sync_files(self.case_id, self.case_files_dir, file_names)
+        if not result["success"]:
+            logger.error(f"Corpus sync failed: {result.get('error', 'Unknown error')}")
+        return result["success"]
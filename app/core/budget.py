@@ -0,0 +1,57 @@
+import time
+from typing import List, Optional
+from app.core.config import settings
+
+
+class LatencyBudget:
+    """Per-request latency budget with cumulative per-stage deadlines.
+
+    Each pipeline stage owns a share of the total budget (see
+    ``settings.LATENCY_STAGE_DEADLINES``). Stages ask the budget how much time
+    they have left and degrade instead of blowing the request deadline.
+    A budget of 0 ms disables all deadlines.
+    """
+
+    def __init__(self, total_ms: Optional[int] = None):
+        self.total_ms = settings.LATENCY_BUDGET_MS if total_ms is None else total_ms
+        self.enabled = self.total_ms > 0
+        self.started_at = time.monotonic()
+        self.degradations: List[str] = []
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started_at) * 1000
+
+    def deadline_ms(self, stage: str) -> float:
+        share = settings.LATENCY_STAGE_DEADLINES.get(stage, 1.0)
+        return self.total_ms * share
+
+    def remaining_ms(self, stage: str) -> Optional[float]:
+        if not self.enabled:
+            return None
+        return max(0.0, self.deadline_ms(stage) - self.elapsed_ms())
+
+    def expired(self, stage: str) -> bool:
+        remaining = self.remaining_ms(stage)
+        return remaining is not None and remaining <= 0
+
+    def bind(self, client, stage: str):
+        """Return an OpenAI client whose request timeout ends at the stage deadline."""
+        remaining = self.remaining_ms(stage)
+        if remaining is None:
+            return client
+        return client.with_options(timeout=max(remaining / 1000, 0.05), max_retries=0)
+
+    def cap_max_tokens(self, max_tokens: int) -> int:
+        remaining = self.remaining_ms("generation")
+        if remaining is None:
+            return max_tokens
+
+        affordable = int(remaining / 1000 * settings.REPORT_TOKENS_PER_SECOND)
+        capped = max(settings.REPORT_MIN_TOKENS, min(max_tokens, affordable))
+        if capped < max_tokens:
+            self.degrade(f"report_max_tokens_capped:{capped}")
+        return capped
+
+    def degrade(self, degradation: str) -> None:
+        if degradation not in self.degradations:
+            self.degradations.append(degradation)
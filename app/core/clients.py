@@ -0,0 +1,51 @@
+"""Process-wide SDK clients, imported and built on first use.
+
+openai, pinecone, boto3 and tiktoken together account for about half a second of import
+time, so the API binds its port and answers liveness checks before any of them is loaded.
+Each client is created once per process and shared, so its connection pool (and the TLS
+sessions in it) is reused by every request instead of being rebuilt per request.
+"""
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import openai
+
+
+@lru_cache()
+def get_openai_client() -> "openai.OpenAI":
+    import openai
+    return openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+@lru_cache()
+def get_pinecone_client():
+    from pinecone import Pinecone
+    return Pinecone(
+        api_key=settings.PINECONE_API_KEY,
+        environment=settings.PINECONE_ENVIRONMENT
+    )
+
+
+@lru_cache()
+def get_pinecone_index():
+    return get_pinecone_client().Index(settings.PINECONE_INDEX)
+
+
+@lru_cache()
+def get_s3_client():
+    import boto3
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_REGION
+    )
+
+
+@lru_cache()
+def get_tokenizer():
+    """The ``cl100k_base`` encoding; the first call may download its BPE ranks."""
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
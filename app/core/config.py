@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Dict
 import os
 from dotenv import load_dotenv
 
@@ -6,29 +7,162 @@ load_dotenv()
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
+    API_WORKERS: int = 1
+    # Build clients, open upstream connections and load the vector index before /ready succeeds
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 10.0
+    WARMUP_RETRY_SECONDS: float = 5.0
+    # Responses of at least this many bytes are gzip-compressed for clients that accept it
+    GZIP_MINIMUM_SIZE: int = 1000
+    GZIP_COMPRESS_LEVEL: int = 5
+    EVIDENCE_MAX_IDS: int = 100
+    REPORTS_MAX_PAGE_SIZE: int = 100
+    # Profile /investigate requests sent with "X-Profile: 1", or a random PROFILE_SAMPLE_RATE of all of them.
+    # /profiles is only served while one of them is on, and needs "X-Profile-Token: <PROFILE_TOKEN>" if set.
+    PROFILE_HEADER_ENABLED: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_TOKEN: str = ""
+    PROFILER: str = "auto"  # pyinstrument if installed, else cProfile; or "cprofile"
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    PROFILE_SUMMARY_LINES: int = 40
+    PROFILE_DIR: str = "data/profiles"
+    PROFILE_KEEP: int = 100
     PROJECT_NAME: str = "Crypto Detective - RAG System"
     
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    # Shorter text-embedding-3 vectors via the API's ``dimensions`` parameter; 0 keeps the model default
+    EMBEDDING_DIMENSIONS: int = 0
+    EMBEDDING_CACHE_PATH: str = ""
+    EMBEDDING_CACHE_PRECISION: str = "float32"  # or float16
+    # Collect concurrent requests' query embeddings for this long into one call; 0 embeds each on its own
+    EMBEDDING_BATCH_WINDOW_MS: float = 0.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_INFLIGHT: int = 4
     LLM_MODEL: str = "gpt-4o-mini"
     
     PINECONE_API_KEY: str = os.getenv("PINECONE_API_KEY", "")
     PINECONE_ENVIRONMENT: str = os.getenv("PINECONE_ENVIRONMENT", "")
     PINECONE_INDEX: str = os.getenv("PINECONE_INDEX", "crypto-detective")
-    PINECONE_NAMESPACE: str = "case-files"
+    PINECONE_NAMESPACE: str = "case-files"  # cases ingested with a case id live in "<namespace>-<case id>"
+    
+    VECTOR_BACKEND: str = "pinecone"
+    LOCAL_INDEX_DIR: str = "data/local_index"
+    # "exact" scans every vector; "ivf" probes IVF_NPROBE of IVF_NLIST clusters once a namespace
+    # holds IVF_MIN_VECTORS vectors (IVF_NLIST=0 picks 4*sqrt(n))
+    LOCAL_INDEX_ANN: str = "exact"
+    # float16 or int8 keep compressed vectors in memory for scanning; the top
+    # RESCORE_FACTOR * top_k candidates are rescored against the float32 vectors on disk
+    LOCAL_INDEX_PRECISION: str = "float32"
+    RESCORE_FACTOR: int = 4
+    # Map persisted float32 vectors read-only instead of loading them, so API workers share one copy
+    LOCAL_INDEX_MMAP: bool = False
+    IVF_NLIST: int = 0
+    IVF_NPROBE: int = 16
+    IVF_MIN_VECTORS: int = 20000
+    # Chunk text and metadata live here instead of in vector metadata; empty (the default, so an
+    # existing index keeps serving text from its metadata) keeps text in the index
+    CHUNK_STORE_PATH: str = ""
+    CHUNK_STORE_MMAP_BYTES: int = 256 * 1024 * 1024
+    # Memory map for the embedding cache and memo store databases
+    SQLITE_MMAP_BYTES: int = 256 * 1024 * 1024
+    # Each load builds a new index generation and flips GENERATIONS_DIR/<namespace>.json to it once
+    # verified; GENERATIONS_KEEP older generations stay for rollback. Empty loads in place.
+    GENERATIONS_DIR: str = "data/generations"
+    GENERATIONS_KEEP: int = 1
+    GENERATION_VERIFY_TIMEOUT_SECONDS: float = 60.0
     
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     AWS_REGION: str = os.getenv("AWS_REGION", "")
     S3_BUCKET: str = os.getenv("S3_BUCKET", "")
+    # Ingest case files from s3://<CASE_FILES_S3_BUCKET or S3_BUCKET>/<CASE_FILES_S3_PREFIX>
+    CASE_FILES_S3_BUCKET: str = ""
+    CASE_FILES_S3_PREFIX: str = "case_files/"
+    S3_DOWNLOAD_CONCURRENCY: int = 8
     
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
     TOP_K_RETRIEVAL: int = 5  
+    TOP_K_RETRIEVAL_MAX: int = 20  # upper bound on a request's own top_k
     TOP_K_RERANK: int = 3    
+    # LLM-score at most this many retrieved candidates, picked by vector score plus enrichment prior; 0 scores all
+    RERANK_MAX_CANDIDATES: int = 0
+    
+    # Topic tags, entities and a reliability prior stored as chunk metadata at ingestion (app/rag/enrichment.py)
+    ENRICHMENT_ENABLED: bool = True
+    ENRICHMENT_MAX_ENTITIES: int = 20
+    ENRICHMENT_PRIOR_WEIGHT: float = 0.1
+    ENRICHMENT_TOPIC_WEIGHT: float = 0.05
+    # Exclude chunks with a lower reliability prior from vector search; needs an enriched index
+    ENRICHMENT_MIN_RELIABILITY: float = 0.0
+    
+    RETRIEVAL_STRATEGY: str = "multi-step"  # single-step, multi-step or hierarchical
+    # Hierarchical retrieval: pick the closest files by summary vector, then search only their chunks
+    HIERARCHICAL_TOP_FILES: int = 3
+    
+    # Maximal Marginal Relevance: choose a diverse TOP_K_RETRIEVAL out of MMR_FETCH_K candidates.
+    # Off by default: every search then returns MMR_FETCH_K full vectors from the index.
+    MMR_ENABLED: bool = False
+    MMR_FETCH_K: int = 20
+    MMR_LAMBDA: float = 0.7
+    
+    REPORT_MAX_TOKENS: int = 2000
+    REPORT_MIN_TOKENS: int = 300
+    REPORT_TOKENS_PER_SECOND: float = 60.0
+    
+    SINGLE_FLIGHT_ENABLED: bool = True
     
-    RETRIEVAL_STRATEGY: str = "multi-step"
+    MEMO_STORE_PATH: str = ""
+    MEMO_MAX_ENTRIES: int = 100000
+    MEMO_TTL_SECONDS: int = 7 * 86400
+    
+    BATCH_MAX_QUERIES: int = 100
+    BATCH_MAX_CONCURRENCY: int = 4
+    
+    # JOB_WORKERS in-process job worker threads per API process; by default jobs are left
+    # to scripts/run_job_workers.py
+    JOB_QUEUE_PATH: str = "data/jobs.sqlite"
+    JOB_WORKERS: int = 0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: int = 300
+    JOB_MAX_WAIT_SECONDS: int = 30
+    JOB_POLL_INTERVAL_SECONDS: float = 0.5
+    JOB_RETENTION_SECONDS: int = 86400
+    
+    LATENCY_BUDGET_MS: int = 0
+    LATENCY_STAGE_DEADLINES: Dict[str, float] = {
+        "guard": 0.10,
+        "expansion": 0.25,
+        "retrieval": 0.40,
+        "rerank": 0.60,
+        "generation": 1.00
+    }
     
     CASE_FILES_DIR: str = "data/case_files"
+    # Re-index added, changed and deleted case files in the background while the API runs
+    WATCH_CASE_FILES: bool = False
+    WATCH_POLL_INTERVAL_SECONDS: float = 2.0
+    WATCH_DEBOUNCE_SECONDS: float = 1.0
+    WATCH_LOCK_PATH: str = "data/watcher.lock"
+    
+    @property
+    def embedding_dimension(self) -> int:
+        """Length of the vectors EMBEDDING_MODEL returns with the configured EMBEDDING_DIMENSIONS."""
+        if self.EMBEDDING_DIMENSIONS:
+            return self.EMBEDDING_DIMENSIONS
+        return 3072 if self.EMBEDDING_MODEL == "text-embedding-3-large" else 1536
+    
+    @property
+    def embedding_options(self) -> Dict[str, int]:
+        """Extra ``embeddings.create`` arguments; ``dimensions`` is only accepted by text-embedding-3 models."""
+        return {"dimensions": self.EMBEDDING_DIMENSIONS} if self.EMBEDDING_DIMENSIONS else {}
+    
+    @property
+    def embedding_model_key(self) -> str:
+        """Identifies the vector space for caches: the model plus any dimension reduction."""
+        if self.EMBEDDING_DIMENSIONS:
+            return f"{self.EMBEDDING_MODEL}@{self.EMBEDDING_DIMENSIONS}"
+        return self.EMBEDDING_MODEL
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,125 @@
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple, Any
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+
+try:
+    from opentelemetry import trace as otel_trace
+    _tracer = otel_trace.get_tracer("crypto-detective.rag")
+except ImportError:
+    _tracer = None
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Latency of investigation pipeline stages",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+LLM_REQUESTS = Counter(
+    "rag_openai_requests_total",
+    "OpenAI API calls made by pipeline components",
+    ["component", "model"]
+)
+
+LLM_TOKENS = Counter(
+    "rag_openai_tokens_total",
+    "OpenAI token usage reported by API responses",
+    ["component", "model", "kind"]
+)
+
+CACHE_LOOKUPS = Counter(
+    "rag_cache_lookups_total",
+    "Cache lookups by cache name and result",
+    ["cache", "result"]
+)
+
+COALESCED_REQUESTS = Counter(
+    "rag_coalesced_requests_total",
+    "Calls that attached to an identical in-flight computation instead of running their own",
+    ["stage"]
+)
+
+CORPUS_SYNC_FILES = Counter(
+    "rag_corpus_sync_files_total",
+    "Case files re-indexed incrementally by the corpus watcher",
+    ["change"]
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "rag_embedding_batch_size",
+    "Texts per micro-batched embedding request",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings(timings: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Collect stage timings (ms) for the current request context, into ``timings`` if given."""
+    if timings is None:
+        timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    STAGE_LATENCY.labels(stage=name).observe(seconds)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+
+@contextmanager
+def stage(name: str, **attributes: Any) -> Iterator[None]:
+    """Time a pipeline stage as a Prometheus observation and, if available, an OpenTelemetry span."""
+    span = _tracer.start_as_current_span(f"rag.{name}", attributes=attributes) if _tracer else nullcontext()
+    start = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            observe_stage(name, time.perf_counter() - start)
+
+
+def record_usage(component: str, response: Any) -> None:
+    model = getattr(response, "model", None) or "unknown"
+    LLM_REQUESTS.labels(component=component, model=model).inc()
+
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            LLM_TOKENS.labels(component=component, model=model, kind=kind).inc(tokens)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_coalesced(stage: str) -> None:
+    COALESCED_REQUESTS.labels(stage=stage).inc()
+
+
+def record_corpus_sync(change: str, count: int) -> None:
+    if count:
+        CORPUS_SYNC_FILES.labels(change=change).inc(count)
+
+
+def record_embedding_batch(size: int) -> None:
+    EMBEDDING_BATCH_SIZE.observe(size)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Several API workers: merge the samples every process wrote to the shared directory.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
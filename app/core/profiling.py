@@ -0,0 +1,205 @@
+"""Opt-in profiles of single investigations, saved by profile id for later download.
+
+A request is profiled when it carries ``X-Profile: 1`` (and ``PROFILE_HEADER_ENABLED`` is
+on) or is picked at random at ``PROFILE_SAMPLE_RATE``. Other requests skip this module
+entirely. Profiles are labelled with a hash of the query, never its text, and can only be
+listed or downloaded while profiling is enabled and, if ``PROFILE_TOKEN`` is set, with it. The profiler is pyinstrument (sampling, HTML artifact) when installed, otherwise
+cProfile (``.prof`` artifact for pstats or snakeviz). Both profile the thread running the
+pipeline; work it hands to other threads (parallel searches, the embedding batcher, batch
+pools) shows up as time spent waiting on them.
+"""
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = r"^[0-9a-f]{32}$"
+
+MEDIA_TYPES = {"html": "text/html", "prof": "application/octet-stream"}
+
+
+def requested(header: Optional[str]) -> bool:
+    """Whether to profile a request with this ``X-Profile`` header value."""
+    if header and settings.PROFILE_HEADER_ENABLED and header.lower() not in ("0", "false", "no"):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def enabled() -> bool:
+    return settings.PROFILE_HEADER_ENABLED or settings.PROFILE_SAMPLE_RATE > 0
+
+
+def token_accepted(token: Optional[str]) -> bool:
+    """Whether an ``X-Profile-Token`` value may read profiles; any value does if no token is configured."""
+    if not settings.PROFILE_TOKEN:
+        return True
+    return token is not None and hmac.compare_digest(token.encode("utf-8"), settings.PROFILE_TOKEN.encode("utf-8"))
+
+
+def query_label(query: str) -> str:
+    """A profile label that tells repeated queries apart without storing what was asked."""
+    return f"query:{hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _use_pyinstrument() -> bool:
+    if settings.PROFILER == "cprofile":
+        return False
+    try:
+        import pyinstrument  # noqa: F401
+        return True
+    except ImportError:  # optional: fall back to cProfile
+        return False
+
+
+class RequestProfile:
+    """Profiles one call and saves it to ``PROFILE_DIR`` as ``<profile_id>.<format>`` plus a JSON summary."""
+
+    def __init__(self, label: str):
+        self.profile_id = uuid.uuid4().hex
+        self.label = label
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call ``fn`` under the profiler; the profile is saved even if it raises."""
+        profiler = _Pyinstrument() if _use_pyinstrument() else _CProfile()
+        error = None
+        started_at = time.time()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            profiler.stop()
+            duration_ms = (time.perf_counter() - start) * 1000
+            try:
+                self._save(profiler, started_at, duration_ms, error)
+            except Exception as e:
+                logger.warning(f"Failed to save profile {self.profile_id}: {str(e)}")
+
+    def _save(self, profiler: Any, started_at: float, duration_ms: float, error: Optional[str]) -> None:
+        artifact, summary = profiler.output()
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        _write(os.path.join(settings.PROFILE_DIR, f"{self.profile_id}.{profiler.format}"), artifact)
+        info = {
+            "profile_id": self.profile_id,
+            "label": self.label,
+            "profiler": profiler.name,
+            "format": profiler.format,
+            "created_at": started_at,
+            "duration_ms": round(duration_ms, 1),
+            "error": error,
+            "summary": summary
+        }
+        # Written last: a profile is listed once its summary exists.
+        _write(os.path.join(settings.PROFILE_DIR, f"{self.profile_id}.json"), json.dumps(info).encode("utf-8"))
+        logger.info(f"Saved profile {self.profile_id} ({duration_ms:.0f} ms): {self.label}")
+        prune(settings.PROFILE_KEEP)
+
+
+class _CProfile:
+    name = "cprofile"
+    format = "prof"
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profiler.enable()
+
+    def stop(self) -> None:
+        self.profiler.disable()
+
+    def output(self) -> Tuple[bytes, str]:
+        """The marshalled stats (what ``pstats`` and snakeviz load) and the top functions by cumulative time."""
+        self.profiler.create_stats()
+        artifact = marshal.dumps(self.profiler.stats)  # before pstats.Stats, which takes the stats over
+        text = io.StringIO()
+        pstats.Stats(self.profiler, stream=text).sort_stats("cumulative").print_stats(settings.PROFILE_SUMMARY_LINES)
+        return artifact, text.getvalue()
+
+
+class _Pyinstrument:
+    name = "pyinstrument"
+    format = "html"
+
+    def __init__(self):
+        from pyinstrument import Profiler
+        self.profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        self.profiler.start()
+
+    def stop(self) -> None:
+        self.profiler.stop()
+
+    def output(self) -> Tuple[bytes, str]:
+        return self.profiler.output_html().encode("utf-8"), self.profiler.output_text()
+
+
+def _write(path: str, data: bytes) -> None:
+    temp_path = f"{path}.tmp-{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def list_profiles(limit: int) -> List[Dict[str, Any]]:
+    """Summaries of the most recent profiles, newest first, without their summary text."""
+    profiles = []
+    for info in _load_all():
+        info.pop("summary", None)
+        profiles.append(info)
+    return profiles[:limit]
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """A profile's summary plus ``path`` and ``media_type`` of its artifact, or None."""
+    try:
+        with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.{info['format']}")
+    if not os.path.exists(path):
+        return None
+    return {**info, "path": path, "media_type": MEDIA_TYPES[info["format"]]}
+
+
+def prune(keep: int) -> None:
+    """Delete all but the ``keep`` most recent profiles."""
+    for info in _load_all()[keep:]:
+        for format in ("json", info.get("format")):
+            try:
+                os.remove(os.path.join(settings.PROFILE_DIR, f"{info['profile_id']}.{format}"))
+            except FileNotFoundError:
+                pass
+
+
+def _load_all() -> List[Dict[str, Any]]:
+    try:
+        names = [name for name in os.listdir(settings.PROFILE_DIR) if name.endswith(".json")]
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for name in names:
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, name), "r", encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (FileNotFoundError, ValueError):
+            continue  # deleted by another worker's prune, or still being replaced
+    return sorted(profiles, key=lambda info: info["created_at"], reverse=True)
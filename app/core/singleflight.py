@@ -0,0 +1,80 @@
+import contextvars
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import record_coalesced
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one in-flight computation.
+
+    The first caller for a key runs ``fn``; callers arriving while it is still running
+    wait for and share its result (or exception). Nothing is cached once the call
+    finishes, so later calls compute afresh.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return self.do_shared(key, fn, *args, **kwargs)[0]
+
+    def do_shared(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """Like ``do``, also returning whether the result came from another caller's computation."""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return fn(*args, **kwargs), False
+
+        future, leader = self._join(key)
+        if not leader:
+            record_coalesced(self.name)
+            return future.result(), True
+
+        self._run(key, future, fn, *args, **kwargs)
+        return future.result(), False
+
+    def do_within(self, key: Hashable, timeout: Optional[float], fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Like ``do``, but every caller, the first included, waits at most ``timeout`` seconds.
+
+        The shared computation itself is not bounded by any caller's timeout: with a timeout
+        it runs on its own thread, so a caller that gives up (``concurrent.futures.TimeoutError``)
+        leaves it to finish for the others. Without one it runs on the first caller's thread.
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+
+        future, leader = self._join(key)
+        if not leader:
+            record_coalesced(self.name)
+        elif timeout is None:
+            self._run(key, future, fn, *args, **kwargs)
+        else:
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run,
+                args=(self._run, key, future, fn, *args),
+                kwargs=kwargs,
+                name=f"singleflight-{self.name}",
+                daemon=True
+            ).start()
+        return future.result(timeout=timeout)
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        return future, leader
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[..., Any], *args, **kwargs) -> None:
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
@@ -0,0 +1,124 @@
+import math
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+
+class IVFIndex:
+    """Inverted-file (IVF-Flat) index over the rows of an L2-normalised vector matrix.
+
+    Rows are clustered around ``nlist`` centroids with spherical k-means. A query only
+    scores the rows of its ``nprobe`` closest clusters, so its cost falls from ``n`` to
+    roughly ``n * nprobe / nlist`` dot products; raising ``nprobe`` trades speed for recall.
+    The index only stores one cluster id per row and leaves the vectors to its owner.
+    """
+
+    def __init__(self, nlist: int, seed: int = 0):
+        self.nlist = nlist
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_size = 0
+        # (row order, cluster offsets), built on first use; replaced whole so concurrent readers never see half
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def default_nlist(n: int) -> int:
+        return max(1, min(4096, int(4 * math.sqrt(n))))
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, max_samples: int = 100000) -> None:
+        rng = np.random.default_rng(self.seed)
+        n = len(vectors)
+        nlist = max(1, min(self.nlist, n))
+
+        sample = vectors[rng.choice(n, max_samples, replace=False)] if n > max_samples else vectors
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].astype(np.float32)
+
+        for _ in range(iterations):
+            labels = _nearest(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+            filled = np.flatnonzero(counts)
+            sums = np.zeros_like(centroids)
+            sums[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+            centroids = _normalize_rows(sums)
+
+        self.nlist = nlist
+        self.centroids = centroids
+        self.assignments = _nearest(vectors, centroids)
+        self.trained_size = n
+        self._invalidate()
+
+    def copy(self) -> "IVFIndex":
+        """An independent copy to modify while readers keep using this one."""
+        index = IVFIndex(self.nlist, self.seed)
+        index.centroids = self.centroids
+        index.assignments = self.assignments.copy()
+        index.trained_size = self.trained_size
+        return index
+
+    def add(self, vectors: np.ndarray) -> None:
+        self.assignments = np.concatenate([self.assignments, _nearest(vectors, self.centroids)])
+        self._invalidate()
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        self.assignments[rows] = _nearest(vectors, self.centroids)
+        self._invalidate()
+
+    def keep(self, rows: np.ndarray) -> None:
+        """Drop every row not listed in ``rows``, mirroring how the owner compacts its matrix."""
+        self.assignments = self.assignments[rows]
+        self._invalidate()
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Row indices in the ``nprobe`` clusters closest to ``query``."""
+        lists = self._lists
+        if lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            lists = self._lists = (order, np.searchsorted(self.assignments[order], np.arange(self.nlist + 1)))
+        order, offsets = lists
+
+        nprobe = min(nprobe, self.nlist)
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "centroids": self.centroids,
+            "assignments": self.assignments,
+            "trained_size": np.asarray(self.trained_size),
+            "seed": np.asarray(self.seed)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "IVFIndex":
+        index = cls(len(state["centroids"]), int(state["seed"]))
+        index.centroids = np.asarray(state["centroids"], dtype=np.float32)
+        index.assignments = np.asarray(state["assignments"], dtype=np.int32)
+        index.trained_size = int(state["trained_size"])
+        return index
+
+    def _invalidate(self) -> None:
+        self._lists = None
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 16384) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), batch_size):
+        labels[i:i + batch_size] = np.argmax(vectors[i:i + batch_size] @ centroids.T, axis=1)
+    return labels
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
@@ -0,0 +1,64 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class EvidenceCandidate:
+    """A retrieved chunk on its way through retrieval, reranking and report generation.
+
+    Slotted, so a candidate pool costs one small object per match rather than a dict per
+    match plus a copy at every stage. Candidates may be shared between requests (single-flight,
+    batch searches), so stages never modify one; reranking makes ``rescored`` copies of the
+    few it keeps. ``DocumentResponse`` reads the response fields straight from the attributes.
+    """
+
+    __slots__ = ("id", "text", "metadata", "score", "values", "vector_score", "relevance_score", "confidence")
+
+    def __init__(
+        self,
+        id: str,
+        text: str,
+        metadata: Dict[str, Any],
+        score: float,
+        values: Optional[Sequence[float]] = None,
+        vector_score: Optional[float] = None,
+        relevance_score: Optional[float] = None,
+        confidence: Optional[str] = None
+    ):
+        self.id = id
+        self.text = text
+        self.metadata = metadata
+        self.score = score
+        self.values = values
+        self.vector_score = vector_score
+        self.relevance_score = relevance_score
+        self.confidence = confidence
+
+    def rescored(self, score: float, relevance_score: float, confidence: str) -> "EvidenceCandidate":
+        """A copy ranked by ``score``, keeping the current score as the vector score and dropping the vector."""
+        return EvidenceCandidate(
+            self.id, self.text, self.metadata, score,
+            vector_score=self.score, relevance_score=relevance_score, confidence=confidence
+        )
+
+    def __repr__(self) -> str:
+        return f"EvidenceCandidate(id={self.id!r}, score={self.score:.4f})"
+
+
+def candidate_scores(candidates: Sequence[EvidenceCandidate]) -> np.ndarray:
+    return np.fromiter((candidate.score for candidate in candidates), dtype=np.float64, count=len(candidates))
+
+
+def candidate_vectors(candidates: Sequence[EvidenceCandidate]) -> np.ndarray:
+    return np.asarray([candidate.values for candidate in candidates], dtype=np.float32)
+
+
+def best_per_id(candidates: Sequence[EvidenceCandidate]) -> List[EvidenceCandidate]:
+    """The highest-scoring candidate of each chunk id, best first."""
+    seen = set()
+    best = []
+    for position in np.argsort(-candidate_scores(candidates), kind="stable"):
+        candidate = candidates[position]
+        if candidate.id not in seen:
+            seen.add(candidate.id)
+            best.append(candidate)
+    return best
@@ -0,0 +1,138 @@
+import glob
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, Iterator, Optional
+from app.core.config import settings
+from app.core.clients import get_s3_client
+from app.db.chunk_store import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def case_file(
+    file_name: str,
+    content: str,
+    source: str,
+    case_id: Optional[str] = None,
+    **metadata: Any
+) -> Dict[str, Any]:
+    """A loaded case file in the shape ``EmbeddingProcessor.embed_case_files`` chunks."""
+    metadata = {
+        "source": source,
+        "file_name": file_name,
+        "file_hash": content_hash(content),
+        **metadata
+    }
+    if case_id:
+        metadata["case_id"] = case_id
+
+    return {
+        "id": f"{case_id}/{file_name}" if case_id else file_name,
+        "content": content,
+        "metadata": metadata
+    }
+
+
+class LocalCaseSource:
+    """The ``.txt`` files of a local directory.
+
+    A file that cannot be read (say, deleted after it was listed) is skipped and recorded
+    in ``failed`` (file name -> error) for the caller to report; ``failed`` is reset on each load.
+    """
+
+    def __init__(self, case_files_dir: Optional[str] = None):
+        self.case_files_dir = case_files_dir or settings.CASE_FILES_DIR
+        self.failed: Dict[str, str] = {}
+
+    def fingerprints(self) -> Dict[str, Optional[str]]:
+        """File name -> a cheap change marker; local files have none, so changes are found by content hash."""
+        return {os.path.basename(path): None for path in glob.glob(os.path.join(self.case_files_dir, "*.txt"))}
+
+    def load(self, case_id: Optional[str] = None, file_names: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        self.failed = {}
+        wanted = set(file_names) if file_names is not None else None
+        for file_path in glob.glob(os.path.join(self.case_files_dir, "*.txt")):
+            file_name = os.path.basename(file_path)
+            if wanted is not None and file_name not in wanted:
+                continue
+            try:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    content = file.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to read {file_path}: {str(e)}")
+                self.failed[file_name] = str(e)
+                continue
+            yield case_file(file_name, content, file_path, case_id)
+
+
+class S3CaseSource:
+    """The ``.txt`` objects under an S3 prefix, downloaded concurrently straight into memory.
+
+    Objects are listed page by page and fetched by a pool of ``S3_DOWNLOAD_CONCURRENCY``
+    threads. At most twice that many downloads are in flight or waiting to be consumed, so
+    files stream into chunking and embedding while the rest are still downloading, and
+    memory stays bounded however large the prefix is. Each object's ETag is kept in its
+    metadata so unchanged objects can be skipped without downloading them. An object that
+    fails to download is skipped and recorded in ``failed`` like an unreadable local file.
+    """
+
+    def __init__(
+        self,
+        prefix: Optional[str] = None,
+        bucket: Optional[str] = None,
+        s3_client=None,
+        max_workers: Optional[int] = None
+    ):
+        self.s3_client = s3_client or get_s3_client()
+        self.bucket_name = bucket or settings.CASE_FILES_S3_BUCKET or settings.S3_BUCKET
+        self.prefix = settings.CASE_FILES_S3_PREFIX if prefix is None else prefix
+        self.max_workers = max_workers or settings.S3_DOWNLOAD_CONCURRENCY
+        self.failed: Dict[str, str] = {}
+
+    def list_objects(self) -> Dict[str, Dict[str, Any]]:
+        """File name (the key below the prefix) -> key and ETag of every ``.txt`` object."""
+        objects = {}
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                if item["Key"].endswith(".txt"):
+                    objects[item["Key"][len(self.prefix):].lstrip("/")] = {"key": item["Key"], "etag": item["ETag"]}
+        return objects
+
+    def fingerprints(self) -> Dict[str, Optional[str]]:
+        return {name: obj["etag"] for name, obj in self.list_objects().items()}
+
+    def load(self, case_id: Optional[str] = None, file_names: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        self.failed = {}
+        objects = self.list_objects()
+        if file_names is not None:
+            wanted = set(file_names)
+            objects = {name: obj for name, obj in objects.items() if name in wanted}
+
+        queue = iter(sorted(objects.items()))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-download") as pool:
+            pending = set()
+            for name, obj in queue:
+                pending.add(pool.submit(self._download, name, obj["key"], case_id))
+                if len(pending) >= 2 * self.max_workers:
+                    break
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    next_item = next(queue, None)
+                    if next_item is not None:
+                        pending.add(pool.submit(self._download, next_item[0], next_item[1]["key"], case_id))
+                    if future.result() is not None:
+                        yield future.result()
+
+    def _download(self, file_name: str, key: str, case_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            content = response["Body"].read().decode("utf-8")
+        except Exception as e:
+            logger.error(f"Failed to download s3://{self.bucket_name}/{key}: {str(e)}")
+            self.failed[file_name] = str(e)
+            return None
+        return case_file(file_name, content, f"s3://{self.bucket_name}/{key}", case_id, etag=response["ETag"])
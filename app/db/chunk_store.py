@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ChunkStore:
+    """Local store of chunk text and metadata keyed by chunk id.
+
+    The vector index only keeps ids, vectors and the small metadata needed for filtering;
+    search results are hydrated from here in one batched lookup. The SQLite file is read
+    through a memory map so hot chunks are served from the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={settings.CHUNK_STORE_MMAP_BYTES}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                namespace TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (namespace, id)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_id ON chunks (id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_content_hash ON chunks (content_hash)")
+        self._conn.commit()
+
+    def put_many(self, chunks: List[Dict[str, Any]], namespace: str = "") -> None:
+        rows = [
+            (chunk["id"], chunk["text"], json.dumps(chunk.get("metadata", {})), content_hash(chunk["text"]), namespace)
+            for chunk in chunks
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, text, metadata, content_hash, namespace) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def get_many(self, ids: List[str], namespace: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        scope, params = ("AND namespace = ?", [namespace]) if namespace is not None else ("", [])
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT id, text, metadata, content_hash FROM chunks WHERE id IN ({placeholders}) {scope}",
+                    batch + params
+                ).fetchall()
+                for chunk_id, text, metadata, digest in rows:
+                    found[chunk_id] = {"text": text, "metadata": json.loads(metadata), "content_hash": digest}
+        return found
+
+    def metadata_by_hash(self, hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Metadata of a stored chunk for each content hash found, from any namespace."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT content_hash, metadata FROM chunks WHERE content_hash IN ({placeholders})", batch
+                ).fetchall()
+                for digest, metadata in rows:
+                    found.setdefault(digest, json.loads(metadata))
+        return found
+
+    def list_namespace(self, namespace: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, text, metadata FROM chunks WHERE namespace = ? ORDER BY id", (namespace,)
+            ).fetchall()
+        return [{"id": chunk_id, "text": text, "metadata": json.loads(metadata)} for chunk_id, text, metadata in rows]
+
+    def files(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        """Per source file in ``namespace``: its chunk ids, and the content hash and S3 ETag (if any) of the file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, json_extract(metadata, '$.file_name'), json_extract(metadata, '$.file_hash'), "
+                "json_extract(metadata, '$.etag') FROM chunks WHERE namespace = ?",
+                (namespace,)
+            ).fetchall()
+        files: Dict[str, Dict[str, Any]] = {}
+        for chunk_id, file_name, file_hash, etag in rows:
+            entry = files.setdefault(file_name, {"ids": [], "file_hash": file_hash, "etag": etag})
+            entry["ids"].append(chunk_id)
+        return files
+
+    def namespaces(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT namespace FROM chunks ORDER BY namespace")]
+
+    def delete(self, ids: List[str], namespace: str = "") -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE namespace = ? AND id = ?", [(namespace, chunk_id) for chunk_id in ids]
+            )
+            self._conn.commit()
+
+    def delete_namespace(self, namespace: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+@lru_cache()
+def get_chunk_store() -> Optional[ChunkStore]:
+    """Process-wide chunk store, or ``None`` to keep chunk text in the vector index metadata."""
+    return ChunkStore(settings.CHUNK_STORE_PATH) if settings.CHUNK_STORE_PATH else None
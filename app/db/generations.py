@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+
+def physical_namespace(namespace: str, generation: str) -> str:
+    """Index namespace holding one build of ``namespace``; generation "" is the unversioned legacy build."""
+    return f"{namespace}.gen-{generation}" if generation else namespace
+
+
+class GenerationPointer:
+    """Active index generation of each logical namespace, one small JSON file per namespace.
+
+    A rebuild writes into a fresh physical namespace while queries keep reading the
+    active one. ``activate`` then flips the pointer with an atomic ``os.replace``, so a
+    reader sees the old generation or the new one and never a half-built mix. Files are
+    re-read only when their mtime changes, so resolving a namespace costs one ``stat``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Any] = {}
+
+    def _file(self, namespace: str) -> str:
+        return os.path.join(self.path, f"{namespace}.json")
+
+    def read(self, namespace: str) -> Dict[str, Any]:
+        path = self._file(namespace)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {"active": "", "generations": []}
+
+        with self._lock:
+            cached = self._cache.get(namespace)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        with self._lock:
+            self._cache[namespace] = (mtime, record)
+        return record
+
+    def resolve(self, namespace: str) -> str:
+        return physical_namespace(namespace, self.read(namespace)["active"])
+
+    @staticmethod
+    def new_generation() -> str:
+        return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:6]}"
+
+    def activate(self, namespace: str, generation: str) -> List[str]:
+        """Make ``generation`` live; returns the generations that fall outside ``GENERATIONS_KEEP``."""
+        record = self.read(namespace)
+        # The build that was live before the first versioned one is generation "".
+        history = [g for g in record["generations"] or [record["active"]] if g != generation]
+        keep = max(settings.GENERATIONS_KEEP, 0)
+        retired = history[:len(history) - keep] if keep else history
+
+        self._write(namespace, {
+            "active": generation,
+            "generations": history[len(retired):] + [generation],
+            "activated_at": time.time()
+        })
+        return retired
+
+    def forget(self, namespace: str) -> List[str]:
+        """Drop the pointer; returns every generation it tracked, including the legacy one."""
+        record = self.read(namespace)
+        generations = set(record["generations"]) | {record["active"], ""}
+        path = self._file(namespace)
+        if os.path.exists(path):
+            os.remove(path)
+        with self._lock:
+            self._cache.pop(namespace, None)
+        return sorted(generations)
+
+    def _write(self, namespace: str, record: Dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file(namespace))
+
+
+@lru_cache()
+def get_generation_pointer() -> Optional[GenerationPointer]:
+    """Process-wide generation pointer, or ``None`` to load documents into the live namespace in place."""
+    return GenerationPointer(settings.GENERATIONS_DIR) if settings.GENERATIONS_DIR else None
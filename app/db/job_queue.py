@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class JobQueue:
+    """Durable SQLite-backed queue of investigation jobs.
+
+    Jobs move ``queued -> running -> succeeded | failed``. A running job holds a lease,
+    which its worker renews while the investigation runs; if the worker dies the lease
+    expires and another worker picks the job up again,
+    up to ``JOB_MAX_ATTEMPTS`` attempts; a job whose last lease expires is failed. Only
+    the worker holding a job's lease can complete or fail it, so a worker that lost its
+    lease cannot overwrite the outcome of the retry. Several processes can share one
+    queue file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.JOB_QUEUE_PATH
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                lease_expires_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def enqueue(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request), now, now)
+            )
+        return self.get(job_id)
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job, including running jobs whose lease expired."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'failed', error = 'Investigation failed: lease expired',
+                        updated_at = ?, lease_expires_at = NULL
+                    WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?
+                    """,
+                    (now, now, settings.JOB_MAX_ATTEMPTS)
+                )
+                row = self._conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE status = 'queued'
+                       OR (status = 'running' AND lease_expires_at < ? AND attempts < ?)
+                    ORDER BY created_at
+                    LIMIT 1
+                    """,
+                    (now, settings.JOB_MAX_ATTEMPTS)
+                ).fetchone()
+
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                self._conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'running', worker = ?, attempts = attempts + 1,
+                        updated_at = ?, lease_expires_at = ?
+                    WHERE id = ?
+                    """,
+                    (worker_id, now, now + settings.JOB_LEASE_SECONDS, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return self.get(row["id"])
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Record the result; False if ``worker_id`` no longer holds the job."""
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'succeeded', result = ?, error = NULL, updated_at = ?, lease_expires_at = NULL
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (json.dumps(result), time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def renew(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease by ``JOB_LEASE_SECONDS`` from now; False if ``worker_id`` no longer holds the job."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (now + settings.JOB_LEASE_SECONDS, now, job_id, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Record a failed attempt; the job is retried until it runs out of attempts.
+
+        Returns False if ``worker_id`` no longer holds the job.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END,
+                    error = ?, updated_at = ?, lease_expires_at = NULL
+                WHERE id = ? AND worker = ? AND status = 'running'
+                """,
+                (settings.JOB_MAX_ATTEMPTS, error, time.time(), job_id, worker_id)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "request": json.loads(row["request"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def purge_finished(self, older_than_seconds: Optional[float] = None) -> int:
+        retention = settings.JOB_RETENTION_SECONDS if older_than_seconds is None else older_than_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*TERMINAL_STATUSES, time.time() - retention)
+            )
+        return cursor.rowcount
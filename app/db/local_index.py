@@ -0,0 +1,513 @@
+import json
+import operator
+import os
+import shutil
+import threading
+import numpy as np
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.db.ann import IVFIndex
+from app.db.quantization import PRECISIONS, quantize, approximate_scores
+
+
+class _Namespace:
+    """One namespace's vectors and records.
+
+    Once published in ``LocalVectorIndex._namespaces`` its vectors, records and IVF
+    clustering are never modified in place: writers build a ``changed`` copy and swap it
+    in, so queries can score a namespace without holding the index lock.
+    """
+
+    def __init__(self, dimension: int):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.metadata: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        self.ivf: Optional[IVFIndex] = None
+        # Compressed copy of ``vectors`` for scanning, rebuilt lazily after changes
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        # mtime of records.json when last loaded or written; None until the namespace is on disk
+        self.loaded_mtime: Optional[int] = None
+        self.dirty = False
+
+    def changed(self) -> "_Namespace":
+        """A copy to modify and publish in place of this one; its fields still share this one's data."""
+        copy = _Namespace.__new__(_Namespace)
+        copy.__dict__.update(self.__dict__)
+        copy.codes = None
+        copy.scales = None
+        copy.dirty = True
+        return copy
+
+
+class LocalVectorIndex:
+    """In-process cosine index exposing the subset of the Pinecone ``Index`` API the app uses.
+
+    Vectors are kept L2-normalised in a float32 matrix per namespace so a query is a
+    single matrix-vector product. With ``ann="ivf"`` large namespaces are clustered into
+    an ``IVFIndex`` and a query only scores the rows of the closest clusters. With a
+    ``precision`` of float16 or int8 the scan runs over a compressed copy of the vectors,
+    the float32 matrix is memory-mapped from disk once persisted, and only the best
+    candidates are rescored at full precision. With ``LOCAL_INDEX_MMAP`` the float32 matrix
+    and the compressed codes are memory-mapped read-only, so every API worker process
+    shares one copy through the page cache. ``persist``
+    writes each namespace to ``path`` as a ``.npy`` matrix plus a JSON file of ids and
+    metadata (and the IVF clustering when there is one). Namespaces written by another
+    process are picked up on first use and reloaded when their files change on disk.
+    Queries hold the lock only to take a namespace snapshot and score it unlocked; writes
+    and reloads build a new snapshot and swap it in, so a query never sees a half-applied
+    change and never waits for another query.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dimension: int = 1536,
+        ann: Optional[str] = None,
+        nprobe: Optional[int] = None,
+        precision: Optional[str] = None
+    ):
+        self.path = path
+        self.dimension = dimension
+        self.ann = ann or settings.LOCAL_INDEX_ANN
+        self.nprobe = nprobe or settings.IVF_NPROBE
+        self.precision = precision or settings.LOCAL_INDEX_PRECISION
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{self.precision}', expected one of {', '.join(PRECISIONS)}")
+        self._lock = threading.RLock()
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._deleted: set = set()
+
+        if path and os.path.isdir(path):
+            self.load()
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "") -> Dict[str, Any]:
+        with self._lock:
+            current = self._refresh(namespace)
+            self._deleted.discard(namespace)
+            ns = current.changed() if current is not None else _Namespace(self.dimension)
+            ns.dirty = True
+            ns.metadata = list(ns.metadata)
+
+            new_ids, new_metadata, new_values = [], [], []
+            updates: Dict[int, np.ndarray] = {}
+            for vector in vectors:
+                values = _normalize(np.asarray(vector["values"], dtype=np.float32))
+                metadata = vector.get("metadata", {})
+
+                row = ns.rows.get(vector["id"])
+                if row is not None:
+                    updates[row] = values
+                    ns.metadata[row] = metadata
+                else:
+                    new_ids.append(vector["id"])
+                    new_metadata.append(metadata)
+                    new_values.append(values)
+
+            updated_rows = np.fromiter(updates, dtype=np.int64, count=len(updates))
+            if len(updated_rows):
+                ns.vectors = np.array(ns.vectors)
+                ns.vectors[updated_rows] = np.stack(list(updates.values()))
+
+            if new_ids:
+                start = len(ns.ids)
+                ns.vectors = np.vstack([ns.vectors, np.stack(new_values)])
+                ns.ids = ns.ids + new_ids
+                ns.metadata.extend(new_metadata)
+                ns.rows = dict(ns.rows)
+                for offset, vector_id in enumerate(new_ids):
+                    ns.rows[vector_id] = start + offset
+
+            if ns.ivf is not None:
+                ns.ivf = ns.ivf.copy()
+                if len(updated_rows):
+                    ns.ivf.update(updated_rows, ns.vectors[updated_rows])
+                if new_ids:
+                    ns.ivf.add(ns.vectors[len(ns.ids) - len(new_ids):])
+            self._maybe_train(ns)
+
+            self._namespaces[namespace] = ns
+            return {"upserted_count": len(vectors)}
+
+    def build_ann(self, namespace: str = "", nlist: Optional[int] = None) -> int:
+        """(Re)cluster a namespace for IVF search regardless of its size; returns the cluster count."""
+        with self._lock:
+            current = self._namespaces.get(namespace)
+            if current is None or not current.ids:
+                return 0
+            ivf = IVFIndex(nlist or settings.IVF_NLIST or IVFIndex.default_nlist(len(current.ids)))
+            ivf.train(current.vectors)
+            ns = current.changed()
+            ns.codes, ns.scales = current.codes, current.scales
+            ns.ivf = ivf
+            self._namespaces[namespace] = ns
+            return ivf.nlist
+
+    def _maybe_train(self, ns: _Namespace) -> None:
+        # Cluster once a namespace is big enough, and again whenever it has grown 4x since.
+        # Only called on a namespace that is not yet published.
+        if self.ann != "ivf" or len(ns.ids) < settings.IVF_MIN_VECTORS:
+            return
+        if ns.ivf is not None and len(ns.ids) <= 4 * ns.ivf.trained_size:
+            return
+        ivf = IVFIndex(settings.IVF_NLIST or IVFIndex.default_nlist(len(ns.ids)))
+        ivf.train(ns.vectors)
+        ns.ivf = ivf
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 5,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        # Only taking the snapshot needs the lock; writers publish a new one instead of changing it.
+        with self._lock:
+            ns = self._refresh(namespace)
+            if ns is None or not ns.ids:
+                return {"matches": [], "namespace": namespace}
+            if self.precision != "float32" and ns.codes is None:
+                ns.codes, ns.scales = quantize(ns.vectors, self.precision)
+
+        query_vector = _normalize(np.asarray(vector, dtype=np.float32))
+
+        rows, scores = None, None
+        if ns.ivf is not None:
+            rows = ns.ivf.candidates(query_vector, self.nprobe)
+            scores = self._score(ns, query_vector, filter, rows)
+            if np.count_nonzero(scores > -np.inf) < min(top_k, len(ns.ids)):
+                # Too few candidates survived the probe (e.g. a selective filter): search exactly.
+                rows, scores = None, None
+
+        if scores is None:
+            scores = self._score(ns, query_vector, filter)
+
+        if self.precision != "float32":
+            scores = self._rescore(ns, query_vector, scores, rows, top_k)
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        matches = []
+        for position in top:
+            if scores[position] == -np.inf:
+                break
+            row = position if rows is None else rows[position]
+            match = {"id": ns.ids[row], "score": float(scores[position])}
+            if include_metadata:
+                match["metadata"] = dict(ns.metadata[row])
+            if include_values:
+                # An array rather than Pinecone's list; consumers stack the rows with numpy
+                match["values"] = np.array(ns.vectors[row])
+            matches.append(match)
+
+        return {"matches": matches, "namespace": namespace}
+
+    def _score(
+        self,
+        ns: _Namespace,
+        query_vector: np.ndarray,
+        filter: Optional[Dict[str, Any]],
+        rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        if self.precision == "float32":
+            vectors = ns.vectors if rows is None else ns.vectors[rows]
+            scores = vectors @ query_vector
+        else:
+            codes, scales = ns.codes, ns.scales
+            if rows is not None:
+                codes = codes[rows]
+                scales = scales[rows] if scales is not None else None
+            scores = approximate_scores(codes, scales, query_vector)
+
+        if filter:
+            metadata = ns.metadata if rows is None else [ns.metadata[row] for row in rows]
+            mask = np.fromiter(
+                (matches_filter(item, filter) for item in metadata),
+                dtype=bool,
+                count=len(metadata)
+            )
+            scores = np.where(mask, scores, -np.inf)
+
+        return scores
+
+    def _rescore(
+        self,
+        ns: _Namespace,
+        query_vector: np.ndarray,
+        scores: np.ndarray,
+        rows: Optional[np.ndarray],
+        top_k: int
+    ) -> np.ndarray:
+        """Replace approximate scores of the best candidates with exact float32 ones; drop the rest."""
+        k = min(top_k * settings.RESCORE_FACTOR, len(scores))
+        positions = np.argpartition(-scores, k - 1)[:k]
+        positions = positions[scores[positions] > -np.inf]
+
+        exact_rows = positions if rows is None else rows[positions]
+        order = np.argsort(exact_rows)
+        rescored = np.full(len(scores), -np.inf, dtype=np.float32)
+        rescored[positions[order]] = ns.vectors[exact_rows[order]] @ query_vector
+        return rescored
+
+    def fetch(self, ids: List[str], namespace: str = "") -> Dict[str, Any]:
+        with self._lock:
+            ns = self._refresh(namespace)
+            vectors = {}
+            if ns is not None:
+                for vector_id in ids:
+                    row = ns.rows.get(vector_id)
+                    if row is not None:
+                        vectors[vector_id] = {
+                            "id": vector_id,
+                            "values": ns.vectors[row].tolist(),
+                            "metadata": dict(ns.metadata[row])
+                        }
+            return {"vectors": vectors, "namespace": namespace}
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        deleteAll: bool = False,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        with self._lock:
+            ns = self._refresh(namespace)
+            if ns is None:
+                return {}
+
+            if deleteAll:
+                del self._namespaces[namespace]
+                self._deleted.add(namespace)
+                return {}
+
+            drop = set(ids or [])
+            keep = [
+                row for row, vector_id in enumerate(ns.ids)
+                if vector_id not in drop and not (filter and matches_filter(ns.metadata[row], filter))
+            ]
+
+            ns = ns.changed()
+            ns.vectors = ns.vectors[keep]
+            if ns.ivf is not None:
+                ns.ivf = ns.ivf.copy()
+                ns.ivf.keep(np.asarray(keep, dtype=np.int64))
+            ns.ids = [ns.ids[row] for row in keep]
+            ns.metadata = [ns.metadata[row] for row in keep]
+            ns.rows = {vector_id: row for row, vector_id in enumerate(ns.ids)}
+            self._namespaces[namespace] = ns
+            return {}
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {
+                name: {"vector_count": len(ns.ids)}
+                for name, ns in self._namespaces.items()
+            }
+            return {
+                "dimension": self.dimension,
+                "namespaces": namespaces,
+                "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values())
+            }
+
+    def unload(self, namespace: str) -> None:
+        """Drop a namespace from memory, leaving its files on disk."""
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+    def persist(self) -> None:
+        """Write namespaces changed since they were loaded and remove deleted ones from disk."""
+        if not self.path:
+            return
+
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            for name, ns in self._namespaces.items():
+                if not ns.dirty:
+                    continue
+                ns_dir = self._dir(name)
+                os.makedirs(ns_dir, exist_ok=True)
+
+                _atomic_save_npy(os.path.join(ns_dir, "vectors.npy"), ns.vectors)
+
+                if self.precision != "float32":
+                    # Saved so other processes map the codes instead of each quantizing its own copy
+                    if ns.codes is None:
+                        ns.codes, ns.scales = quantize(ns.vectors, self.precision)
+                    _atomic_save_npy(os.path.join(ns_dir, f"codes.{self.precision}.npy"), ns.codes)
+                    if ns.scales is not None:
+                        _atomic_save_npy(os.path.join(ns_dir, f"scales.{self.precision}.npy"), ns.scales)
+
+                ivf_path = os.path.join(ns_dir, "ivf.npz")
+                if ns.ivf is not None:
+                    _atomic_save_npz(ivf_path, ns.ivf.state())
+                elif os.path.exists(ivf_path):
+                    os.remove(ivf_path)
+
+                # records.json goes last: its mtime tells readers in other processes to reload
+                records_path = os.path.join(ns_dir, "records.json")
+                _atomic_write_json(records_path, {
+                    "ids": ns.ids,
+                    "metadata": ns.metadata
+                })
+                ns.loaded_mtime = os.stat(records_path).st_mtime_ns
+                ns.dirty = False
+
+            for name in self._deleted:
+                if os.path.isfile(os.path.join(self._dir(name), "records.json")):
+                    shutil.rmtree(self._dir(name))
+            self._deleted.clear()
+
+    def load(self) -> None:
+        with self._lock:
+            self._namespaces = {}
+            for entry in os.listdir(self.path):
+                name = "" if entry == "_default" else entry
+                ns = self._load_namespace(name)
+                if ns is not None:
+                    self._namespaces[name] = ns
+
+    def _dir(self, namespace: str) -> str:
+        return os.path.join(self.path, namespace or "_default")
+
+    def _refresh(self, namespace: str) -> Optional[_Namespace]:
+        """The in-memory namespace, (re)loaded when another process has written or removed it on disk."""
+        ns = self._namespaces.get(namespace)
+        if not self.path or (ns is not None and ns.loaded_mtime is None):
+            return ns
+
+        try:
+            mtime = os.stat(os.path.join(self._dir(namespace), "records.json")).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            if ns is not None and not ns.dirty:
+                del self._namespaces[namespace]
+                return None
+            return ns
+
+        if ns is None or (ns.loaded_mtime != mtime and not ns.dirty):
+            ns = self._load_namespace(namespace)
+            if ns is not None:
+                self._namespaces[namespace] = ns
+        return ns
+
+    def _load_namespace(self, namespace: str) -> Optional[_Namespace]:
+        ns_dir = self._dir(namespace)
+        records_path = os.path.join(ns_dir, "records.json")
+        if not os.path.isfile(records_path):
+            return None
+
+        mtime = os.stat(records_path).st_mtime_ns
+        with open(records_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+
+        ns = _Namespace(self.dimension)
+        # Compressed indexes scan an in-memory copy, so the float32 matrix can stay on disk.
+        mmap_mode = "r" if self.precision != "float32" or settings.LOCAL_INDEX_MMAP else None
+        ns.vectors = np.load(os.path.join(ns_dir, "vectors.npy"), mmap_mode=mmap_mode)
+        if len(ns.vectors) != len(records["ids"]):
+            # Caught between a writer's vectors.npy and records.json; the next call retries.
+            return None
+        ns.ids = records["ids"]
+        ns.metadata = records["metadata"]
+        ns.rows = {vector_id: row for row, vector_id in enumerate(ns.ids)}
+        ns.loaded_mtime = mtime
+
+        codes_path = os.path.join(ns_dir, f"codes.{self.precision}.npy")
+        scales_path = os.path.join(ns_dir, f"scales.{self.precision}.npy")
+        if self.precision != "float32" and os.path.isfile(codes_path):
+            codes = np.load(codes_path, mmap_mode="r")
+            scales = np.load(scales_path, mmap_mode="r") if os.path.isfile(scales_path) else None
+            if len(codes) == len(ns.ids) and (scales is not None) == (self.precision == "int8"):
+                ns.codes, ns.scales = codes, scales
+
+        ivf_path = os.path.join(ns_dir, "ivf.npz")
+        if self.ann == "ivf" and os.path.isfile(ivf_path):
+            with np.load(ivf_path) as state:
+                ivf = IVFIndex.from_state(dict(state))
+            if len(ivf.assignments) == len(ns.ids):
+                ns.ivf = ivf
+        self._maybe_train(ns)
+        return ns
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Evaluate a Pinecone-style metadata filter ($eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $and, $or)."""
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for op, expected in condition.items():
+            if op == "$eq" and not _equals(value, expected):
+                return False
+            if op == "$ne" and _equals(value, expected):
+                return False
+            if op == "$in" and not any(_equals(value, item) for item in expected):
+                return False
+            if op == "$nin" and any(_equals(value, item) for item in expected):
+                return False
+            if op in _COMPARISONS and not (isinstance(value, (int, float)) and _COMPARISONS[op](value, expected)):
+                return False
+
+    return True
+
+
+_COMPARISONS = {
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le
+}
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    if isinstance(value, list):
+        return expected in value
+    return value == expected
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _atomic_save_npy(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _atomic_save_npz(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+@lru_cache()
+def get_local_index() -> LocalVectorIndex:
+    """Process-wide index over ``LOCAL_INDEX_DIR``, loaded once rather than per request."""
+    return LocalVectorIndex(settings.LOCAL_INDEX_DIR, dimension=settings.embedding_dimension)
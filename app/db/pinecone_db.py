@@ -1,42 +1,173 @@
-from pinecone import Pinecone
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
+from app.core.clients import get_pinecone_index
+from app.core.metrics import stage
+from app.db.candidates import EvidenceCandidate
+from app.db.chunk_store import ChunkStore, get_chunk_store
+from app.db.generations import GenerationPointer, get_generation_pointer
+from app.db.local_index import LocalVectorIndex, get_local_index
+
+def case_namespace(case_id: Optional[str] = None) -> str:
+    """Namespace holding one case's chunks, or the shared namespace when no case is given."""
+    return f"{settings.PINECONE_NAMESPACE}-{case_id}" if case_id else settings.PINECONE_NAMESPACE
+
+
+def file_namespace(namespace: str) -> str:
+    """Namespace holding one summary vector per case file for the chunks in ``namespace``."""
+    return f"{namespace}.files"
+
+
+def file_filter(file_names: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    return {"file_name": {"$in": list(file_names)}} if file_names else None
+
+
+def all_of(*filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The conjunction of the given metadata filters, skipping ``None``s."""
+    filters = [f for f in filters if f]
+    if len(filters) > 1:
+        return {"$and": filters}
+    return filters[0] if filters else None
+
 
 class PineconeDB:
-    def __init__(self):
-        pc = Pinecone(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENVIRONMENT
-        )
+    def __init__(
+        self,
+        index=None,
+        chunk_store: Optional[ChunkStore] = None,
+        generations: Optional[GenerationPointer] = None
+    ):
+        if index is None and settings.VECTOR_BACKEND == "local":
+            index = get_local_index()
         
-        self.index = pc.Index(settings.PINECONE_INDEX)
+        self.index = index if index is not None else get_pinecone_index()
         self.namespace = settings.PINECONE_NAMESPACE
+        self.chunk_store = chunk_store or get_chunk_store()
+        self.generations = generations or get_generation_pointer()
+        self._resolved: Dict[str, str] = {}
+    
+    def resolve(self, namespace: Optional[str] = None) -> str:
+        """Physical namespace of the active generation of ``namespace``."""
+        namespace = namespace or self.namespace
+        if self.generations is None:
+            return namespace
+        
+        physical = self.generations.resolve(namespace)
+        previous = self._resolved.get(namespace)
+        if previous != physical:
+            self._resolved[namespace] = physical
+            # Another process flipped the pointer; free the retired generation held in memory.
+            if previous is not None and isinstance(self.index, LocalVectorIndex):
+                self.index.unload(previous)
+                self.index.unload(file_namespace(previous))
+        return physical
     
     def similarity_search(
         self, 
         query_embedding: List[float], 
         top_k: int = 5,
-        filter: Optional[Dict[str, Any]] = None
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False,
+        namespace: Optional[str] = None
+    ) -> List[EvidenceCandidate]:
+        namespace = self.resolve(namespace)
+
+        with stage("vector_search"):
+            results = self.index.query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=self.chunk_store is None,
+                include_values=include_values,
+                namespace=namespace,
+                filter=filter
+            )
+        
+        matches = results["matches"]
+        if self.chunk_store is not None:
+            chunks = self.hydrate([match["id"] for match in matches], namespace)
+        else:
+            chunks = {match["id"]: _split_text(match["metadata"]) for match in matches}
+        
+        candidates = []
+        for match in matches:
+            chunk = chunks.get(match["id"])
+            if chunk is None:
+                continue
+            values = match.get("values") if include_values else None
+            candidates.append(EvidenceCandidate(
+                match["id"],
+                chunk["text"],
+                chunk["metadata"],
+                match["score"],
+                values if values is not None and len(values) else None
+            ))
+        
+        return candidates
+    
+    def search_files(
+        self,
+        query_embedding: List[float],
+        top_n: int,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None
     ) -> List[Dict[str, Any]]:
+        """Coarse search over per-file summary vectors; returns file names and scores."""
+        with stage("file_search"):
+            results = self.index.query(
+                vector=query_embedding,
+                top_k=top_n,
+                include_metadata=True,
+                namespace=file_namespace(self.resolve(namespace)),
+                filter=filter
+            )
+        
+        return [
+            {"file_name": match["metadata"]["file_name"], "score": match["score"]}
+            for match in results["matches"]
+        ]
+    
+    def get_chunks(self, ids: List[str], namespace: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Text and metadata of chunks by id, from the active generation of ``namespace``."""
+        namespace = self.resolve(namespace)
+        if self.chunk_store is not None:
+            return self.hydrate(ids, namespace)
+        
+        fetched = self.index.fetch(ids=ids, namespace=namespace)
+        return {
+            chunk_id: _split_text(vector["metadata"])
+            for chunk_id, vector in fetched["vectors"].items()
+            if "text" in (vector["metadata"] or {})
+        }
+    
+    def hydrate(self, ids: List[str], namespace: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Look up chunk text and metadata locally, fetching chunks ingested before the chunk store from the index.
+
+        ``namespace`` is a physical namespace, as returned by ``resolve``.
+        """
+        if not ids:
+            return {}
+        
+        with stage("hydrate"):
+            chunks = self.chunk_store.get_many(ids, namespace or self.namespace)
+            missing = [chunk_id for chunk_id in ids if chunk_id not in chunks]
+            
+            if missing:
+                # Rows stored before namespaces were recorded
+                chunks.update(self.chunk_store.get_many(missing))
+                missing = [chunk_id for chunk_id in missing if chunk_id not in chunks]
+            
+            if missing:
+                fetched = self.index.fetch(ids=missing, namespace=namespace or self.namespace)
+                for chunk_id, vector in fetched["vectors"].items():
+                    metadata = vector["metadata"] or {}
+                    if "text" in metadata:
+                        chunks[chunk_id] = _split_text(metadata)
+        
+        return chunks
+
 
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True,
-            namespace=self.namespace,
-            filter=filter
-        )
-        
-        documents = []
-        for match in results["matches"]:
-            documents.append({
-                "id": match["id"],
-                "score": match["score"],
-                "text": match["metadata"]["text"],
-                "metadata": {
-                    k: v for k, v in match["metadata"].items() if k != "text"
-                }
-            })
-        
-        return documents
+def _split_text(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "text": metadata["text"],
+        "metadata": {k: v for k, v in metadata.items() if k != "text"}
+    }
     
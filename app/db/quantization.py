@@ -0,0 +1,53 @@
+import numpy as np
+from typing import Optional, Tuple
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+def quantize(
+    vectors: np.ndarray,
+    precision: str,
+    block_size: int = 65536
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Compress a float32 matrix to ``precision``; int8 codes carry one scale per row.
+
+    Works block by block so a memory-mapped matrix is never fully loaded.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+    if precision == "float32":
+        return np.asarray(vectors, dtype=np.float32), None
+
+    codes = np.empty(vectors.shape, dtype=np.float16 if precision == "float16" else np.int8)
+    scales = np.empty(len(vectors), dtype=np.float32) if precision == "int8" else None
+
+    for i in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[i:i + block_size], dtype=np.float32)
+        if precision == "float16":
+            codes[i:i + block_size] = block
+        else:
+            block_scales = np.abs(block).max(axis=1) / 127.0
+            block_scales[block_scales == 0] = 1.0
+            codes[i:i + block_size] = np.round(block / block_scales[:, None])
+            scales[i:i + block_size] = block_scales
+
+    return codes, scales
+
+
+def dequantize(codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    vectors = codes.astype(np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+
+def approximate_scores(
+    codes: np.ndarray,
+    scales: Optional[np.ndarray],
+    query: np.ndarray,
+    block_size: int = 4096
+) -> np.ndarray:
+    """Dot products of ``query`` with every quantized row, decoded one cache-sized block at a time."""
+    scores = np.empty(len(codes), dtype=np.float32)
+    for i in range(0, len(codes), block_size):
+        block = codes[i:i + block_size].astype(np.float32) @ query
+        scores[i:i + block_size] = block * scales[i:i + block_size] if scales is not None else block
+    return scores
@@ -1,18 +1,18 @@
-import boto3
 import json
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.core.config import settings
+from app.core.clients import get_s3_client
+import time
 import uuid
 
+# Keys start with the time remaining until this millisecond, so S3's ascending key order is newest
+# first. The 14-digit zero padding puts them ahead of the older report_<YYYYmmdd>_... keys.
+REPORT_KEY_MAX_MS = 10**13 - 1
+
 class S3Storage:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+    def __init__(self, s3_client=None):
+        self.s3_client = s3_client or get_s3_client()
         self.bucket_name = settings.S3_BUCKET
     
     def save_report(self, report_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,7 +22,8 @@ class S3Storage:
             
             query_slug = "".join(c if c.isalnum() else "_" for c in report_data["query"][:30])
             
-            filename = f"report_{timestamp}_{query_slug}_{report_id}.json"
+            newest_first = f"{REPORT_KEY_MAX_MS - int(time.time() * 1000):014d}"
+            filename = f"report_{newest_first}_{timestamp}_{query_slug}_{report_id}.json"
             
             report_json = json.dumps(report_data, indent=2)
             
@@ -57,12 +58,19 @@ class S3Storage:
                 "error": str(e)
             }
     
-    def list_reports(self, limit: int = 10) -> Dict[str, Any]:
+    def list_reports(self, limit: int = 10, continuation_token: Optional[str] = None) -> Dict[str, Any]:
+        """One page of saved reports, newest first; pass the returned ``next_token`` to get the next page.
+
+        The order is S3's key order, which ``save_report`` keys make newest first. Reports
+        saved under the older ``report_<timestamp>_...`` keys follow all of them, oldest first.
+        """
         try:
+            page_args = {"ContinuationToken": continuation_token} if continuation_token else {}
             response = self.s3_client.list_objects_v2(
                 Bucket=self.bucket_name,
                 Prefix="report_",
-                MaxKeys=limit
+                MaxKeys=limit,
+                **page_args
             )
             
             reports = []
@@ -86,7 +94,8 @@ class S3Storage:
             
             return {
                 "success": True,
-                "reports": sorted(reports, key=lambda x: x["last_modified"], reverse=True)
+                "reports": reports,
+                "next_token": response.get("NextContinuationToken") if response.get("IsTruncated") else None
             }
             
         except Exception as e:
@@ -95,4 +104,24 @@ class S3Storage:
                 "success": False,
                 "error": str(e),
                 "reports": []
+            }
+    
+    def get_report(self, filename: str) -> Dict[str, Any]:
+        """A saved report's JSON exactly as stored, so it can be served without re-encoding."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=filename)
+            return {
+                "success": True,
+                "filename": filename,
+                "body": response["Body"].read()
+            }
+            
+        except Exception as e:
+            error_code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if error_code not in ("NoSuchKey", "404"):
+                print(f"Error reading report from S3: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "not_found": error_code in ("NoSuchKey", "404")
             }
\ No newline at end of file
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import record_embedding_batch
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+class EmbeddingBatcher:
+    """Collects embedding texts from concurrent callers into shared ``embeddings.create`` calls.
+
+    The first text to arrive opens a window of ``window_ms``; everything queued until the
+    window closes (or ``max_batch_size`` texts are waiting) goes out as one request per
+    ``key``, and each caller gets back its own vectors. Callers passing the same key must
+    embed into the same vector space with the same client, since one caller's ``embed``
+    serves them all. Up to ``max_inflight`` batches are sent concurrently.
+    """
+
+    def __init__(
+        self,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        max_inflight: Optional[int] = None
+    ):
+        self.window = (settings.EMBEDDING_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_MAX_SIZE
+        self.max_inflight = max_inflight or settings.EMBEDDING_BATCH_MAX_INFLIGHT
+
+        self._queue: "queue.Queue[Tuple[str, Hashable, EmbedFn, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def embed(self, texts: List[str], embed: EmbedFn, key: Optional[Hashable] = None) -> List[List[float]]:
+        """Embed ``texts`` as part of a shared batch; ``embed`` performs the actual API call.
+
+        Only texts queued under the same ``key`` (default: the ``embed`` function itself)
+        share a call.
+        """
+        if not texts:
+            return []
+        if len(texts) >= self.max_batch_size:
+            return embed(texts)
+
+        self._ensure_started()
+
+        key = embed if key is None else key
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, key, embed, future))
+            futures.append(future)
+
+        return [future.result() for future in futures]
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="embedding-batch")
+                thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            groups: Dict[Any, List[Tuple[str, Hashable, EmbedFn, Future]]] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for group in groups.values():
+                self._pool.submit(self._dispatch, group)
+
+    @staticmethod
+    def _dispatch(batch: List[Tuple[str, Hashable, EmbedFn, Future]]) -> None:
+        # Every item shares one key, so the first caller's embed function serves the whole batch.
+        texts = list(dict.fromkeys(text for text, _, _, _ in batch))
+        record_embedding_batch(len(batch))
+
+        try:
+            vectors = dict(zip(texts, batch[0][2](texts)))
+        except BaseException as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for text, _, _, future in batch:
+            future.set_result(vectors[text])
+
+
+_shared: Optional[EmbeddingBatcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """Process-wide batcher shared by all retrievers, or ``None`` when batching is disabled."""
+    global _shared
+
+    if settings.EMBEDDING_BATCH_WINDOW_MS <= 0:
+        return None
+
+    with _shared_lock:
+        if _shared is None:
+            _shared = EmbeddingBatcher()
+        return _shared
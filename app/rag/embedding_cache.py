@@ -0,0 +1,108 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+from functools import lru_cache
+from typing import List, Optional, Callable
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+_CACHE_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of embedding vectors keyed by model and text hash.
+
+    With ``precision="float16"`` vectors are stored at half the size; they are keyed
+    separately from float32 entries so switching precision never mixes the two.
+    """
+
+    def __init__(self, path: str, precision: Optional[str] = None):
+        self.path = path
+        self.precision = precision or settings.EMBEDDING_CACHE_PRECISION
+        if self.precision not in _CACHE_DTYPES:
+            raise ValueError(f"Unknown cache precision '{self.precision}', expected float32 or float16")
+        self.dtype = _CACHE_DTYPES[self.precision]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_BYTES}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def _key(self, model: str, text: str) -> str:
+        return self.key(model if self.precision == "float32" else f"{model}|{self.precision}", text)
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        keys = [self._key(model, text) for text in texts]
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+        return [
+            np.frombuffer(found[key], dtype=self.dtype).astype(np.float32).tolist() if key in found else None
+            for key in keys
+        ]
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        rows = [
+            (self._key(model, text), model, np.asarray(vector, dtype=self.dtype).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def delete_many(self, model: str, texts: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", [(self._key(model, text),) for text in texts])
+            self._conn.commit()
+
+
+@lru_cache()
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide embedding cache, or ``None`` when ``EMBEDDING_CACHE_PATH`` is not configured."""
+    return EmbeddingCache(settings.EMBEDDING_CACHE_PATH) if settings.EMBEDDING_CACHE_PATH else None
+
+
+def embed_with_cache(
+    cache: Optional[EmbeddingCache],
+    model: str,
+    texts: List[str],
+    embed: Callable[[List[str]], List[List[float]]]
+) -> List[List[float]]:
+    """Embed ``texts`` through ``embed``, serving and filling ``cache`` when one is configured."""
+    if cache is None:
+        return embed(texts)
+
+    vectors = cache.get_many(model, texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+    for vector in vectors:
+        record_cache_lookup("embedding", vector is not None)
+
+    if missing:
+        missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+        embedded = dict(zip(missing_texts, embed(missing_texts)))
+        cache.put_many(model, missing_texts, [embedded[text] for text in missing_texts])
+        for i in missing:
+            vectors[i] = embedded[texts[i]]
+
+    return vectors
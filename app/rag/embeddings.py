@@ -1,42 +1,40 @@
-import os
-import glob
-import openai
-from typing import List, Dict, Any
-import tiktoken
+from typing import List, Dict, Any, Iterable, Optional, Union, TYPE_CHECKING
 from app.core.config import settings
+from app.core.clients import get_openai_client, get_tokenizer
+from app.core.metrics import record_usage
+from app.db.case_sources import LocalCaseSource, S3CaseSource
+from app.rag.embedding_cache import EmbeddingCache, embed_with_cache, get_embedding_cache
+
+if TYPE_CHECKING:
+    import openai
+
+CaseSource = Union[LocalCaseSource, S3CaseSource]
 
 
 class EmbeddingProcessor:
-    def __init__(self):
+    def __init__(
+        self,
+        client: Optional["openai.OpenAI"] = None,
+        tokenizer=None,
+        cache: Optional[EmbeddingCache] = None
+    ):
 
-        self.client = openai.OpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.client = client or get_openai_client()
 
         self.model = settings.EMBEDDING_MODEL
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")  
+        self.tokenizer = tokenizer or get_tokenizer()
         self.chunk_size = settings.CHUNK_SIZE
         self.chunk_overlap = settings.CHUNK_OVERLAP
+        self.cache = cache or get_embedding_cache()
     
-    def load_case_files(self) -> List[Dict[str, Any]]:
-        """Load all case files from the case_files directory."""
-        case_files = []
-        file_pattern = os.path.join(settings.CASE_FILES_DIR, "*.txt")
-        
-        for file_path in glob.glob(file_pattern):
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                file_name = os.path.basename(file_path)
-                case_files.append({
-                    "id": file_name,
-                    "content": content,
-                    "metadata": {
-                        "source": file_path,
-                        "file_name": file_name
-                    }
-                })
-        
-        return case_files
+    def load_case_files(
+        self,
+        case_files_dir: Optional[str] = None,
+        case_id: Optional[str] = None,
+        file_names: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Load all case files from the case_files directory, or only ``file_names`` when given."""
+        return list(LocalCaseSource(case_files_dir).load(case_id, file_names))
     
     def chunk_text(self, text: str) -> List[str]:
         tokens = self.tokenizer.encode(text)
@@ -53,11 +51,16 @@ class EmbeddingProcessor:
         return chunks
     
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return embed_with_cache(self.cache, settings.embedding_model_key, texts, self._request_embeddings)
+    
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
         try:
             response = self.client.embeddings.create(
                 input=texts, 
-                model=self.model
+                model=self.model,
+                **settings.embedding_options
             )
+            record_usage("ingestion", response)
             
             embeddings = [item.embedding for item in response.data]
             
@@ -66,9 +69,25 @@ class EmbeddingProcessor:
             print(f"Error generating embeddings: {e}")
             raise
     
-    def process_case_files(self) -> List[Dict[str, Any]]:
-        case_files = self.load_case_files()
+    def forget(self, texts: List[str]) -> None:
+        """Evict embeddings of chunk texts that are no longer indexed."""
+        if self.cache is not None and texts:
+            self.cache.delete_many(settings.embedding_model_key, texts)
+    
+    def process_case_files(
+        self,
+        case_files_dir: Optional[str] = None,
+        case_id: Optional[str] = None,
+        source: Optional[CaseSource] = None
+    ) -> List[Dict[str, Any]]:
+        source = source or LocalCaseSource(case_files_dir)
+        return self.embed_case_files(source.load(case_id))
+    
+    def embed_case_files(self, case_files: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Chunk and embed case files, embedding each full batch while later files are still arriving."""
         all_chunks = []
+        embedded = 0
+        batch_size = 100
         
         for case_file in case_files:
             chunks = self.chunk_text(case_file["content"])
@@ -84,14 +103,17 @@ class EmbeddingProcessor:
                         "total_chunks": len(chunks)
                     }
                 })
-        
-        batch_size = 100
-        for i in range(0, len(all_chunks), batch_size):
-            batch = all_chunks[i:i + batch_size]
-            texts = [chunk["text"] for chunk in batch]
-            embeddings = self.create_embeddings(texts)
             
-            for j, embedding in enumerate(embeddings):
-                all_chunks[i + j]["embedding"] = embedding
+            while len(all_chunks) - embedded >= batch_size:
+                self._embed_chunks(all_chunks[embedded:embedded + batch_size])
+                embedded += batch_size
+        
+        for i in range(embedded, len(all_chunks), batch_size):
+            self._embed_chunks(all_chunks[i:i + batch_size])
         
-        return all_chunks
\ No newline at end of file
+        return all_chunks
+    
+    def _embed_chunks(self, batch: List[Dict[str, Any]]) -> None:
+        embeddings = self.create_embeddings([chunk["text"] for chunk in batch])
+        for chunk, embedding in zip(batch, embeddings):
+            chunk["embedding"] = embedding
@@ -0,0 +1,160 @@
+"""Ingestion-time chunk attributes that stand in for part of the query-time rerank judgement.
+
+Each chunk gets topic tags matching the rerank criteria (the hack itself, transactions,
+suspects, timeline, attack methods), the wallets, transaction hashes and timestamps it
+mentions, and a reliability prior in [0, 1]. The prior starts neutral (0.5), rises with
+concrete evidence (logs, blockchain analysis, extracted entities) and drops for the
+distractor language the case files use for unrelated or speculative material ("no
+direct link", "unrelated to the current investigation", "experts believe"). The rules
+read only the chunk, so the attributes are computed once per chunk content hash and
+memoized, or reused from the chunk store when no memo store is configured; bump
+``ENRICHMENT_VERSION`` when they change.
+"""
+import re
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from app.core.config import settings
+from app.db.candidates import EvidenceCandidate
+from app.db.chunk_store import ChunkStore, content_hash
+from app.rag.memo_store import MemoStore, get_memo_store
+
+ENRICHMENT_VERSION = "1"
+
+NEUTRAL_RELIABILITY = 0.5
+
+TOPIC_PATTERNS = {
+    "crypto_hack": r"\b(stolen|theft|hack(ed|er|ers)?|breach(ed)?|cryptocurrenc(y|ies))\b",
+    "transactions": r"\b(transactions?|transfer(s|red)?|wallets?|addresses|funds|mixer|tornado cash|blockchain|launder(ed|ing)?|cash(ed)? out|withdrawn)\b",
+    "suspects": r"\b(hackers?|attackers?|suspects?|perpetrators?|cybercriminals?|hacker group|ip address(es)?)\b",
+    "timeline": r"\b(within \w+ (minutes|hours|days)|(minutes|hours|days|weeks) (before|after)|shortly after|timeline|\d{1,2}:\d{2})\b",
+    "attack_methods": r"\b(phishing|malware|keystrokes?|credential[- ]stuffing|credentials|sql injection|exploits?|brute[- ]force|login attempts?|ransom)\b",
+}
+
+ENTITY_PATTERNS = {
+    "wallets": r"\b0x[a-fA-F0-9]{40}\b|\b(?:bc1[a-z0-9]{25,59}|[13][a-km-zA-HJ-NP-Z1-9]{25,34})\b",
+    "tx_hashes": r"\b(?:0x)?[a-fA-F0-9]{64}\b",
+    "timestamps": r"\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?(?:Z|[+-]\d{2}:?\d{2})?)?\b|\b\d{1,2}:\d{2}(?::\d{2})?\s?(?:AM|PM|UTC)?\b",
+}
+
+EVIDENCE_PATTERN = r"\b(logs?|log entries|blockchain analysis|analysis (identified|revealed|tools)|investigators (found|noticed)|flagged|recorded|traced)\b"
+DISTRACTOR_PATTERN = r"\b(unrelated to|no (direct )?(link|connection)|not (connected|related) to|no financial data|non-sensitive|earlier security incident|rather than crypto)\b"
+SPECULATION_PATTERN = r"\b(rumou?rs?|allegedly|unverified|speculat\w*|believe[sd]?|likely|possibly|may have|might have)\b"
+
+_topics = {topic: re.compile(pattern, re.IGNORECASE) for topic, pattern in TOPIC_PATTERNS.items()}
+_entities = {kind: re.compile(pattern) for kind, pattern in ENTITY_PATTERNS.items()}
+_evidence = re.compile(EVIDENCE_PATTERN, re.IGNORECASE)
+_distractor = re.compile(DISTRACTOR_PATTERN, re.IGNORECASE)
+_speculation = re.compile(SPECULATION_PATTERN, re.IGNORECASE)
+
+
+def tag_topics(text: str) -> List[str]:
+    return [topic for topic, pattern in _topics.items() if pattern.search(text)]
+
+
+def extract_entities(text: str) -> Dict[str, List[str]]:
+    entities = {}
+    for kind, pattern in _entities.items():
+        found = list(dict.fromkeys(match.group(0) for match in pattern.finditer(text)))
+        if kind == "wallets":
+            found = [value for value in found if not _entities["tx_hashes"].fullmatch(value)]
+        entities[kind] = found[:settings.ENRICHMENT_MAX_ENTITIES]
+    return entities
+
+
+def reliability_prior(text: str, entities: Dict[str, List[str]]) -> float:
+    evidence = min(len(_evidence.findall(text)), 3) + (1 if any(entities.values()) else 0)
+    speculation = min(len(_speculation.findall(text)), 2)
+    score = NEUTRAL_RELIABILITY + 0.08 * evidence - 0.05 * speculation
+    if _distractor.search(text):
+        score -= 0.35
+    return round(float(np.clip(score, 0.05, 0.95)), 3)
+
+
+# Every metadata key enrich_text can set
+ATTRIBUTE_KEYS = ("topics", *ENTITY_PATTERNS, "reliability", "enrichment_version")
+
+
+def enrich_text(text: str) -> Dict[str, Any]:
+    """The metadata attributes of one chunk."""
+    entities = extract_entities(text)
+    return {
+        "topics": tag_topics(text),
+        # Only the entity kinds found, to keep vector store metadata small.
+        **{kind: values for kind, values in entities.items() if values},
+        "reliability": reliability_prior(text, entities),
+        "enrichment_version": ENRICHMENT_VERSION
+    }
+
+
+class ChunkEnricher:
+    """Adds ``enrich_text`` attributes to chunk metadata, computing them once per chunk content hash.
+
+    Known attributes come from the memo store when one is configured, otherwise from the
+    chunk store, whose rows keep the attributes of every chunk already indexed.
+    """
+
+    def __init__(self, memo_store: Optional[MemoStore] = None, chunk_store: Optional[ChunkStore] = None):
+        self.memo_store = memo_store or get_memo_store()
+        self.chunk_store = chunk_store
+
+    def enrich(self, chunks: List[Dict[str, Any]]) -> int:
+        """Update each chunk's metadata in place; returns how many distinct texts had to be computed."""
+        keys = {
+            content_hash(chunk["text"]): MemoStore.key("enrichment", "rules", ENRICHMENT_VERSION, chunk["text"])
+            for chunk in chunks
+        }
+        known = self._known(keys)
+
+        attributes: Dict[str, Dict[str, Any]] = {}
+        computed: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks:
+            text_hash = content_hash(chunk["text"])
+            if text_hash not in attributes:
+                attributes[text_hash] = known.get(text_hash) or computed.setdefault(
+                    keys[text_hash], enrich_text(chunk["text"])
+                )
+            chunk["metadata"].update(attributes[text_hash])
+
+        if computed and self.memo_store is not None:
+            self.memo_store.put_many("enrichment", computed)
+        return len(computed)
+
+    def _known(self, keys: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Attributes already computed, by content hash."""
+        if self.memo_store is not None:
+            memoized = self.memo_store.get_many(list(keys.values()))
+            return {text_hash: memoized[key] for text_hash, key in keys.items() if key in memoized}
+
+        if self.chunk_store is not None:
+            return {
+                text_hash: {key: metadata[key] for key in ATTRIBUTE_KEYS if key in metadata}
+                for text_hash, metadata in self.chunk_store.metadata_by_hash(list(keys)).items()
+                if metadata.get("enrichment_version") == ENRICHMENT_VERSION
+            }
+        return {}
+
+
+def prior_adjustments(query: str, documents: Sequence[EvidenceCandidate]) -> np.ndarray:
+    """Per-candidate score offsets from the enrichment attributes.
+
+    ``ENRICHMENT_PRIOR_WEIGHT`` times the reliability prior's distance from neutral, plus
+    ``ENRICHMENT_TOPIC_WEIGHT`` when the chunk shares a topic with the query. Chunks
+    indexed without enrichment get no offset.
+    """
+    query_topics = set(tag_topics(query))
+    return np.fromiter(
+        (
+            settings.ENRICHMENT_PRIOR_WEIGHT * (doc.metadata.get("reliability", NEUTRAL_RELIABILITY) - NEUTRAL_RELIABILITY)
+            + (settings.ENRICHMENT_TOPIC_WEIGHT if query_topics.intersection(doc.metadata.get("topics") or ()) else 0.0)
+            for doc in documents
+        ),
+        dtype=np.float64,
+        count=len(documents)
+    )
+
+
+def reliability_filter() -> Optional[Dict[str, Any]]:
+    """Vector search filter dropping chunks below ``ENRICHMENT_MIN_RELIABILITY``, if set."""
+    if settings.ENRICHMENT_MIN_RELIABILITY > 0:
+        return {"reliability": {"$gte": settings.ENRICHMENT_MIN_RELIABILITY}}
+    return None
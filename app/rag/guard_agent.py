@@ -1,13 +1,16 @@
-import openai
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Optional, TYPE_CHECKING
 from app.core.config import settings
+from app.core.clients import get_openai_client
+from app.core.budget import LatencyBudget
+from app.core.metrics import record_usage
 import re
 
+if TYPE_CHECKING:
+    import openai
+
 class GuardAgent:
-    def __init__(self):
-        self.client = openai.OpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
+    def __init__(self, client: Optional["openai.OpenAI"] = None):
+        self.client = client or get_openai_client()
         self.model = settings.LLM_MODEL
         self.relevant_topics = [
             "cryptocurrency", "crypto", "exchange", "hack", "hacker", "theft", "stolen", 
@@ -20,16 +23,23 @@ class GuardAgent:
             "trail", "cover tracks", "obfuscation", "million"
         ]
     
-    def is_query_relevant(self, query: str) -> Tuple[bool, str]:
+    def is_query_relevant(self, query: str, budget: Optional[LatencyBudget] = None) -> Tuple[bool, str]:
         query_lower = query.lower()
         keyword_match = any(topic.lower() in query_lower for topic in self.relevant_topics)
         
         if not keyword_match:
-            return self._validate_with_llm(query)
+            return self._validate_with_llm(query, budget)
         
         return True, "Query contains investigation-related keywords"
     
-    def _validate_with_llm(self, query: str) -> Tuple[bool, str]:
+    def _validate_with_llm(self, query: str, budget: Optional[LatencyBudget] = None) -> Tuple[bool, str]:
+        # Fails closed: the budget comes from the client, so a spent deadline must not skip the check.
+        if budget is not None and budget.expired("guard"):
+            budget.degrade("guard_deadline_exceeded")
+            return False, "Guard deadline exceeded before the query could be validated"
+        
+        client = budget.bind(self.client, "guard") if budget is not None else self.client
+        
         try:
             prompt = f"""
             You are a security system for a detective AI that only answers questions about a cryptocurrency exchange hack investigation.
@@ -51,7 +61,7 @@ class GuardAgent:
             - "IRRELEVANT: This query is not about the crypto hack investigation"
             """
             
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a security evaluation system."},
@@ -60,6 +70,7 @@ class GuardAgent:
                 temperature=0.1,
                 max_tokens=300
             )
+            record_usage("guard", response)
             
             content = response.choices[0].message.content
             
@@ -74,6 +85,9 @@ class GuardAgent:
                 return False, "Query appears to be unrelated to the investigation"
         
         except Exception as e:
+            if budget is not None and budget.expired("guard"):
+                budget.degrade("guard_deadline_exceeded")
+                return False, "Guard deadline exceeded before the query could be validated"
             return True, f"Error validating query, proceeding with caution: {str(e)}"
     
     def _extract_explanation(self, content: str) -> str:
@@ -1,25 +1,30 @@
-import openai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from app.core.config import settings
+from app.core.clients import get_openai_client
+from app.core.budget import LatencyBudget
+from app.core.metrics import record_usage
+from app.db.candidates import EvidenceCandidate
 import datetime
 
+if TYPE_CHECKING:
+    import openai
+
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, client: Optional["openai.OpenAI"] = None):
         self.model = settings.LLM_MODEL
         
-        self.client = openai.OpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.client = client or get_openai_client()
     
     def generate_report(
         self, 
         query: str, 
-        documents: List[Dict[str, Any]], 
-        retrieval_info: Dict[str, Any]
+        documents: List[EvidenceCandidate], 
+        retrieval_info: Dict[str, Any],
+        budget: Optional[LatencyBudget] = None
     ) -> Dict[str, Any]:
         
         document_context = "\n\n".join([
-            f"DOCUMENT {i+1} (Confidence: {doc['confidence']}):\n{doc['text']}"
+            f"DOCUMENT {i+1} (Confidence: {doc.confidence}):\n{doc.text}"
             for i, doc in enumerate(documents)
         ])
         
@@ -56,16 +61,38 @@ class ReportGenerator:
         When evidence is contradictory, clearly note the contradictions.
         """
         
+        if budget is not None and budget.expired("generation"):
+            # A call with no time left can only time out; answer with the evidence instead.
+            budget.degrade("report_skipped")
+            return {
+                "report": (
+                    "Report generation skipped: the latency budget ran out before the report could be written. "
+                    f"{len(documents)} evidence documents were retrieved and are listed with this response."
+                ),
+                "query": query,
+                "timestamp": timestamp,
+                "evidence_count": len(documents),
+                "retrieval_strategy": retrieval_info["strategy"],
+                "skipped": True
+            }
+        
+        max_tokens = settings.REPORT_MAX_TOKENS
+        client = self.client
+        if budget is not None:
+            max_tokens = budget.cap_max_tokens(max_tokens)
+            client = budget.bind(self.client, "generation")
+        
         try:
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a criminal investigation AI assistant."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=2000
+                max_tokens=max_tokens
             )
+            record_usage("report", response)
             
             report_content = response.choices[0].message.content
             
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.db.chunk_store import content_hash
+
+
+class MemoStore:
+    """SQLite-backed memo of LLM intermediates such as query expansions and per-chunk rerank scores.
+
+    Keys hash everything the result depends on: the kind of intermediate, the model, the prompt
+    version and the hashed inputs (query text, chunk content). Editing a chunk or bumping a
+    prompt version therefore produces new keys, and stale entries age out through the TTL and
+    least-recently-used eviction down to ``max_entries``.
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries or settings.MEMO_MAX_ENTRIES
+        self.ttl_seconds = settings.MEMO_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_BYTES}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memo (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memo_accessed ON memo (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(kind: str, model: str, prompt_version: str, *inputs: str) -> str:
+        parts = [kind, model, prompt_version] + [content_hash(text) for text in inputs]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM memo WHERE key IN ({placeholders}) AND created_at >= ?",
+                    (*batch, now - self.ttl_seconds)
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                self._conn.executemany("UPDATE memo SET accessed_at = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        self.put_many(kind, {key: value})
+
+    def put_many(self, kind: str, items: Dict[str, Any]) -> None:
+        if not items:
+            return
+
+        now = time.time()
+        rows = [(key, kind, json.dumps(value), now, now) for key, value in items.items()]
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?)", rows)
+            self._writes += len(rows)
+            if self._writes >= 1000:
+                self._writes = 0
+                self._evict()
+            self._conn.commit()
+
+    def evict(self) -> int:
+        with self._lock:
+            removed = self._evict()
+            self._conn.commit()
+        return removed
+
+    def _evict(self) -> int:
+        removed = self._conn.execute(
+            "DELETE FROM memo WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        removed += self._conn.execute(
+            """
+            DELETE FROM memo WHERE key IN (
+                SELECT key FROM memo ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        ).rowcount
+        return removed
+
+
+@lru_cache()
+def get_memo_store() -> Optional[MemoStore]:
+    """Process-wide memo store, or ``None`` when ``MEMO_STORE_PATH`` is not configured."""
+    return MemoStore(settings.MEMO_STORE_PATH) if settings.MEMO_STORE_PATH else None
@@ -0,0 +1,36 @@
+import numpy as np
+from typing import List
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """Maximal Marginal Relevance: pick ``k`` row indices trading relevance against redundancy.
+
+    Each step takes the candidate maximising
+    ``lambda_mult * relevance - (1 - lambda_mult) * max cosine similarity to anything already picked``.
+    The pairwise similarities are computed once as a single matrix product.
+    """
+    n = len(relevance)
+    if k >= n:
+        return [int(i) for i in np.argsort(-relevance)]
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+    similarity = vectors @ vectors.T
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    first = int(np.argmax(relevance))
+    selected = [first]
+    redundancy = similarity[first].copy()
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
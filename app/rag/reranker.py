@@ -1,21 +1,57 @@
-import openai
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Optional, TYPE_CHECKING
 from app.core.config import settings
+from app.core.clients import get_openai_client
+from app.core.budget import LatencyBudget
+from app.core.metrics import record_usage, record_cache_lookup
+from app.db.candidates import EvidenceCandidate, candidate_scores
+from app.rag.enrichment import prior_adjustments
+from app.rag.memo_store import MemoStore, get_memo_store
+
+if TYPE_CHECKING:
+    import openai
+
+# Bump when the rerank prompt changes so memoized scores are not reused.
+RERANK_PROMPT_VERSION = "1"
 
 class DocumentReranker:
-    def __init__(self):
-        self.client = openai.OpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
+    def __init__(self, client: Optional["openai.OpenAI"] = None, memo_store: Optional[MemoStore] = None):
+        self.client = client or get_openai_client()
+        self.memo_store = memo_store or get_memo_store()
 
         self.top_k = settings.TOP_K_RERANK
     
-    def rerank_documents(self, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def rerank_documents(
+        self,
+        query: str,
+        documents: List[EvidenceCandidate],
+        budget: Optional[LatencyBudget] = None
+    ) -> List[EvidenceCandidate]:
         if not documents:
             return []
         
+        adjustments = prior_adjustments(query, documents)
+        max_candidates = max(settings.RERANK_MAX_CANDIDATES, self.top_k)
+        if settings.RERANK_MAX_CANDIDATES and len(documents) > max_candidates:
+            # Spend LLM calls only on the candidates the enrichment prior ranks highest, in retrieval order.
+            keep = np.sort(np.argsort(-(candidate_scores(documents) + adjustments), kind="stable")[:max_candidates])
+            documents = [documents[i] for i in keep]
+            adjustments = adjustments[keep]
+        
         batch_size = min(5, len(documents))  
-        reranked_docs = []
+        relevance_scores = []
+        
+        memo_keys = []
+        memoized = {}
+        scored = {}
+        if self.memo_store is not None:
+            memo_keys = [
+                MemoStore.key("rerank", settings.LLM_MODEL, RERANK_PROMPT_VERSION, query, doc.text)
+                for doc in documents
+            ]
+            memoized = self.memo_store.get_many(memo_keys)
+            for key in memo_keys:
+                record_cache_lookup("rerank", key in memoized)
         
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
@@ -28,7 +64,7 @@ class DocumentReranker:
                 Detective's Query: {query}
                 
                 Document:
-                {doc["text"]}
+                {doc.text}
                 
                 Consider:
                 1. Direct evidence related to the crypto hack
@@ -49,9 +85,21 @@ class DocumentReranker:
                 prompts.append(prompt)
             
             llm_scores = []
-            for prompt in prompts:
+            for j, prompt in enumerate(prompts):
+                memo_key = memo_keys[i + j] if memo_keys else None
+                if memo_key in memoized:
+                    llm_scores.append(memoized[memo_key])
+                    continue
+                
+                if budget is not None and budget.expired("rerank"):
+                    budget.degrade("rerank_vector_fallback")
+                    llm_scores.append(batch[len(llm_scores)].score)
+                    continue
+                
+                client = budget.bind(self.client, "rerank") if budget is not None else self.client
+                
                 try:
-                    response = self.client.chat.completions.create(
+                    response = client.chat.completions.create(
                         model=settings.LLM_MODEL,
                         messages=[
                             {"role": "system", "content": "You are a criminal investigation assistant."},
@@ -60,6 +108,7 @@ class DocumentReranker:
                         temperature=0.1,
                         max_tokens=50
                     )
+                    record_usage("reranker", response)
                     
                     score_text = response.choices[0].message.content.strip()
                     digits = ''.join(c for c in score_text if c.isdigit())
@@ -67,28 +116,33 @@ class DocumentReranker:
                     
                     score = max(0, min(100, score))
                     llm_scores.append(score / 100.0)  
+                    if memo_key is not None:
+                        scored[memo_key] = score / 100.0
                     
                 except Exception as e:
                     print(f"Error getting LLM score: {e}")
-                    llm_scores.append(batch[len(llm_scores)]["score"])
+                    if budget is not None and budget.expired("rerank"):
+                        budget.degrade("rerank_vector_fallback")
+                    llm_scores.append(batch[len(llm_scores)].score)
             
 
-            for j, doc in enumerate(batch):
-                vector_score = doc["score"]
-                llm_score = llm_scores[j]
-                combined_score = 0.4 * vector_score + 0.6 * llm_score
-                
-                reranked_docs.append({
-                    **doc,
-                    "score": combined_score,
-                    "vector_score": vector_score,
-                    "relevance_score": llm_score,
-                    "confidence": self._get_confidence_label(combined_score)
-                })
+            relevance_scores.extend(llm_scores)
+        
+        if scored:
+            self.memo_store.put_many("rerank", scored)
         
-        reranked_docs = sorted(reranked_docs, key=lambda x: x["score"], reverse=True)[:self.top_k]
+        relevance = np.asarray(relevance_scores, dtype=np.float64)
+        # Ranked on the unclipped sum so the enrichment offsets still order candidates pushed past 1;
+        # the reported score is clipped to [0, 1].
+        fused = 0.4 * candidate_scores(documents) + 0.6 * relevance + adjustments
+        combined = np.clip(fused, 0.0, 1.0)
+        top = np.argsort(-fused, kind="stable")[:self.top_k]
         
-        return reranked_docs
+        # New objects only for the documents kept; the candidates themselves may be shared.
+        return [
+            documents[i].rescored(float(combined[i]), float(relevance[i]), self._get_confidence_label(combined[i]))
+            for i in top
+        ]
     
     def _get_confidence_label(self, score: float) -> str:
         if score >= 0.8:
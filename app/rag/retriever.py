@@ -1,34 +1,171 @@
-import openai
-from typing import List, Dict, Any, Tuple
+import copy
+import math
+import numpy as np
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Tuple, Optional, TYPE_CHECKING
 from app.core.config import settings
-from app.db.pinecone_db import PineconeDB
+from app.core.clients import get_openai_client
+from app.core.budget import LatencyBudget
+from app.core.metrics import stage, record_usage, record_cache_lookup
+from app.core.singleflight import SingleFlight
+from app.db.candidates import EvidenceCandidate, best_per_id, candidate_scores, candidate_vectors
+from app.db.pinecone_db import PineconeDB, all_of, case_namespace, file_filter
+from app.rag.embedding_batcher import EmbeddingBatcher, get_embedding_batcher
+from app.rag.embedding_cache import EmbeddingCache, embed_with_cache, get_embedding_cache
+from app.rag.enrichment import reliability_filter
+from app.rag.memo_store import MemoStore, get_memo_store
+from app.rag.mmr import mmr_select
 import json
 
+if TYPE_CHECKING:
+    import openai
+
+# Bump when the expansion prompt changes so memoized expansions are not reused.
+EXPANSION_PROMPT_VERSION = "1"
+
+_embeddings = SingleFlight("embedding")
+_expansions = SingleFlight("expansion")
+
 class DocumentRetriever:
-    def __init__(self):
-        self.client = openai.OpenAI(
-            api_key=settings.OPENAI_API_KEY
-        )
-        self.pinecone_db = PineconeDB()
-        self.strategy = settings.RETRIEVAL_STRATEGY
-        self.top_k = settings.TOP_K_RETRIEVAL
+    def __init__(
+        self,
+        client: Optional["openai.OpenAI"] = None,
+        pinecone_db: Optional[PineconeDB] = None,
+        strategy: Optional[str] = None,
+        top_k: Optional[int] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_batcher: Optional[EmbeddingBatcher] = None,
+        memo_store: Optional[MemoStore] = None
+    ):
+        self.client = client or get_openai_client()
+        self.pinecone_db = pinecone_db or PineconeDB()
+        self.strategy = strategy or settings.RETRIEVAL_STRATEGY
+        self.top_k = top_k or settings.TOP_K_RETRIEVAL
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self.embedding_batcher = embedding_batcher or get_embedding_batcher()
+        self.memo_store = memo_store or get_memo_store()
+    
+    def with_options(self, strategy: Optional[str] = None, top_k: Optional[int] = None) -> "DocumentRetriever":
+        """This retriever with a request's own strategy and top_k, sharing its clients and stores."""
+        strategy, top_k = strategy or self.strategy, top_k or self.top_k
+        if (strategy, top_k) == (self.strategy, self.top_k):
+            return self
+        retriever = copy.copy(self)
+        retriever.strategy, retriever.top_k = strategy, top_k
+        return retriever
     
     def get_embedding(self, text: str) -> List[float]:
+        return _embeddings.do((settings.embedding_model_key, text), self.get_embeddings, [text])[0]
+    
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return embed_with_cache(self.embedding_cache, settings.embedding_model_key, texts, self._request_embeddings)
+    
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        with stage("embedding"):
+            if self.embedding_batcher is not None:
+                # Retrievers built per request share the client, so key on it rather than the bound method.
+                key = (self.client, settings.embedding_model_key)
+                return self.embedding_batcher.embed(texts, self._create_embeddings, key)
+            return self._create_embeddings(texts)
+    
+    def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
         response = self.client.embeddings.create(
-            input=[text],
-            model=settings.EMBEDDING_MODEL
+            input=texts,
+            model=settings.EMBEDDING_MODEL,
+            **settings.embedding_options
         )
-        return response.data[0].embedding
+        record_usage("retriever", response)
+        return [item.embedding for item in response.data]
     
-    def single_step_retrieval(self, query: str) -> List[Dict[str, Any]]:
-        query_embedding = self.get_embedding(query)
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        case_id: Optional[str] = None,
+        file_names: Optional[List[str]] = None
+    ) -> List[EvidenceCandidate]:
+        """Vector search within a case partition, returning chunk vectors alongside matches when MMR needs them.
+
+        With the hierarchical strategy the chunk search is restricted to the files whose
+        summary vectors are closest to the query.
+        """
+        if self.strategy == "hierarchical":
+            file_names = self.select_files(query_embedding, case_id, file_names) or file_names
+        
         return self.pinecone_db.similarity_search(
             query_embedding=query_embedding,
-            top_k=self.top_k
+            top_k=top_k,
+            filter=all_of(file_filter(file_names), reliability_filter()),
+            include_values=settings.MMR_ENABLED,
+            namespace=case_namespace(case_id)
         )
     
-    def generate_search_queries(self, query: str) -> List[str]:
-        """Use LLM to generate multiple search queries for the original query."""
+    def select_files(
+        self,
+        query_embedding: List[float],
+        case_id: Optional[str] = None,
+        file_names: Optional[List[str]] = None
+    ) -> List[str]:
+        matches = self.pinecone_db.search_files(
+            query_embedding,
+            settings.HIERARCHICAL_TOP_FILES,
+            filter=file_filter(file_names),
+            namespace=case_namespace(case_id)
+        )
+        return [match["file_name"] for match in matches]
+    
+    def candidate_k(self, top_k: int, num_queries: int = 1) -> int:
+        """How many matches to fetch per search so MMR has a larger pool to diversify from."""
+        if not settings.MMR_ENABLED:
+            return top_k
+        return max(top_k, math.ceil(settings.MMR_FETCH_K / num_queries))
+    
+    def single_step_retrieval(
+        self,
+        query: str,
+        case_id: Optional[str] = None,
+        file_names: Optional[List[str]] = None
+    ) -> List[EvidenceCandidate]:
+        query_embedding = self.get_embedding(query)
+        results = self.search(query_embedding, self.candidate_k(self.top_k), case_id, file_names)
+        return self.select_diverse(results)
+    
+    def generate_search_queries(self, query: str, budget: Optional[LatencyBudget] = None) -> List[str]:
+        """Use LLM to generate multiple search queries for the original query.
+
+        Concurrent requests for the same query share one expansion call, which runs without
+        any request's deadline; each request waits only until its own expansion deadline and
+        otherwise searches the original query alone.
+        """
+        remaining = budget.remaining_ms("expansion") if budget is not None else None
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return self._generate_search_queries(query, budget)
+        if remaining is not None and remaining <= 0:
+            budget.degrade("query_expansion_skipped")
+            return [query]
+        
+        try:
+            return _expansions.do_within(
+                (settings.LLM_MODEL, query),
+                remaining / 1000 if remaining is not None else None,
+                self._generate_search_queries,
+                query
+            )
+        except FutureTimeoutError:
+            budget.degrade("query_expansion_skipped")
+            return [query]
+    
+    def _generate_search_queries(self, query: str, budget: Optional[LatencyBudget] = None) -> List[str]:
+        import openai
+
+        memo_key = None
+        if self.memo_store is not None:
+            memo_key = MemoStore.key("expansion", settings.LLM_MODEL, EXPANSION_PROMPT_VERSION, query)
+            memoized = self.memo_store.get(memo_key)
+            record_cache_lookup("expansion", memoized is not None)
+            if memoized is not None:
+                return memoized
+        
         prompt = f"""
         You are an expert detective working on a crypto exchange hack case.
         Given the following investigation question, generate 3 specific search queries that would help
@@ -41,15 +178,26 @@ class DocumentRetriever:
         and digital forensics where appropriate.
         """
         
-        response = self.client.chat.completions.create(
-            model=settings.LLM_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a criminal investigation assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=300
-        )
+        client = budget.bind(self.client, "expansion") if budget is not None else self.client
+        
+        try:
+            with stage("expansion"):
+                response = client.chat.completions.create(
+                    model=settings.LLM_MODEL,
+                    messages=[
+                        {"role": "system", "content": "You are a criminal investigation assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=300
+                )
+        except openai.APITimeoutError:
+            if budget is None:
+                raise
+            budget.degrade("query_expansion_skipped")
+            return [query]
+        
+        record_usage("expansion", response)
         
         try:
             content = response.choices[0].message.content
@@ -59,6 +207,8 @@ class DocumentRetriever:
             if start_idx >= 0 and end_idx > start_idx:
                 json_str = content[start_idx:end_idx]
                 queries = json.loads(json_str)
+                if memo_key is not None:
+                    self.memo_store.put("expansion", memo_key, queries)
                 return queries
             else:
                 lines = [line.strip() for line in content.split('\n') if line.strip()]
@@ -68,42 +218,80 @@ class DocumentRetriever:
             print(f"Error parsing LLM output: {e}")
             return [query]
     
-    def multi_step_retrieval(self, query: str) -> Tuple[List[Dict[str, Any]], List[str]]:
-        expanded_queries = self.generate_search_queries(query)
+    def multi_step_retrieval(
+        self,
+        query: str,
+        budget: Optional[LatencyBudget] = None,
+        case_id: Optional[str] = None,
+        file_names: Optional[List[str]] = None
+    ) -> Tuple[List[EvidenceCandidate], List[str]]:
+        expanded_queries = self.generate_search_queries(query, budget)
         
         all_results = []
         
         for expanded_query in expanded_queries:
+            if all_results and budget is not None and budget.expired("retrieval"):
+                budget.degrade("expanded_searches_truncated")
+                break
+            
             query_embedding = self.get_embedding(expanded_query)
-            results = self.pinecone_db.similarity_search(
-                query_embedding=query_embedding,
-                top_k=self.top_k // len(expanded_queries) + 1  
+            results = self.search(
+                query_embedding,
+                self.candidate_k(self.expansion_top_k(len(expanded_queries)), len(expanded_queries)),
+                case_id,
+                file_names
             )
             all_results.extend(results)
         
-        unique_results = {}
-        for result in all_results:
-            if result["id"] not in unique_results or result["score"] > unique_results[result["id"]]["score"]:
-                unique_results[result["id"]] = result
-        
-        final_results = sorted(
-            list(unique_results.values()),
-            key=lambda x: x["score"],
-            reverse=True
-        )[:self.top_k]
+        return self.merge_results(all_results), expanded_queries
+    
+    @property
+    def expands_queries(self) -> bool:
+        return self.strategy == "multi-step"
+    
+    def expansion_top_k(self, num_queries: int) -> int:
+        return self.top_k // num_queries + 1
+    
+    def merge_results(self, all_results: List[EvidenceCandidate]) -> List[EvidenceCandidate]:
+        return self.select_diverse(best_per_id(all_results))
+    
+    def select_diverse(self, documents: List[EvidenceCandidate]) -> List[EvidenceCandidate]:
+        """Reduce score-sorted candidates to top_k, using MMR over chunk vectors to drop near-duplicates."""
+        if (
+            settings.MMR_ENABLED
+            and len(documents) > self.top_k
+            and all(doc.values is not None for doc in documents)
+        ):
+            selected = mmr_select(
+                candidate_scores(documents).astype(np.float32),
+                candidate_vectors(documents),
+                self.top_k,
+                settings.MMR_LAMBDA
+            )
+            documents = [documents[i] for i in selected]
         
-        return final_results, expanded_queries
+        return documents[:self.top_k]
     
-    def retrieve(self, query: str) -> Dict[str, Any]:
-        if self.strategy == "single-step":
-            results = self.single_step_retrieval(query)
+    def retrieve(
+        self,
+        query: str,
+        budget: Optional[LatencyBudget] = None,
+        case_id: Optional[str] = None,
+        file_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        skip_expansion = budget is not None and budget.expired("expansion")
+        if skip_expansion and self.expands_queries:
+            budget.degrade("query_expansion_skipped")
+        
+        if not self.expands_queries or skip_expansion:
+            results = self.single_step_retrieval(query, case_id, file_names)
             return {
                 "documents": results,
-                "strategy": "single-step",
+                "strategy": "single-step" if self.expands_queries else self.strategy,
                 "expanded_queries": None
             }
         else: 
-            results, expanded_queries = self.multi_step_retrieval(query)
+            results, expanded_queries = self.multi_step_retrieval(query, budget, case_id, file_names)
             return {
                 "documents": results,
                 "strategy": "multi-step",
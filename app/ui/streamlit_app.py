@@ -1,11 +1,70 @@
 import streamlit as st
 import requests
+import html
 import json
+import math
 import pandas as pd
 import os
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Optional
 
 API_URL = os.getenv("API_URL", "http://localhost:8000/api/v1")
+EVIDENCE_PAGE_SIZE = int(os.getenv("EVIDENCE_PAGE_SIZE", "5"))
+REPORTS_PAGE_SIZE = int(os.getenv("REPORTS_PAGE_SIZE", "10"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"API Error: {status_code}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled session per Streamlit server, so reruns and users reuse keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _checked(response: requests.Response) -> requests.Response:
+    if response.status_code != 200:
+        try:
+            detail = response.json()
+        except ValueError:
+            detail = response.text
+        raise APIError(response.status_code, detail)
+    return response
+
+
+@st.cache_data(ttl=RESULT_CACHE_TTL_SECONDS, max_entries=100, show_spinner=False)
+def run_investigation(query: str, case_id: Optional[str], strategy: str, top_k: int) -> Dict[str, Any]:
+    """The investigation of ``query`` plus its report as download-ready JSON, cached per query and settings.
+
+    Reruns (pagination, widget changes) and repeated queries are served from the cache
+    instead of calling the API, and so the LLM, again. Errors are raised, so never cached.
+    """
+    payload = {"query": query, "strategy": strategy, "top_k": top_k, **({"case_id": case_id} if case_id else {})}
+    result = _checked(get_session().post(f"{API_URL}/investigate", json=payload)).json()
+    return {"result": result, "report_json": json.dumps(result['report'], indent=2)}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def list_reports(token: Optional[str], limit: int) -> Dict[str, Any]:
+    params = {"limit": limit, **({"token": token} if token else {})}
+    return _checked(get_session().get(f"{API_URL}/reports", params=params)).json()
+
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def fetch_report(filename: str) -> bytes:
+    """A saved report's JSON as stored; reports never change once saved."""
+    return _checked(get_session().get(f"{API_URL}/reports/{filename}")).content
+
 
 st.set_page_config(
     page_title="Crypto Detective - RAG System",
@@ -105,6 +164,12 @@ with st.sidebar:
         
         **Frontend:** Streamlit
         """)
+    
+    st.divider()
+    show_history = st.toggle(
+        "Browse report history",
+        help="Reports saved to S3 by earlier investigations; opening one makes no new LLM calls"
+    )
 
 query = st.text_area("Enter your investigation query", height=100, 
                     placeholder="E.g., What methods did the hacker use to cover their tracks?")
@@ -126,145 +191,236 @@ with st.expander("Advanced Settings"):
             value=5,
             help="Maximum number of evidence documents to retrieve"
         )
+    case_id = st.text_input(
+        "Case ID",
+        help="Search only this case's files; leave empty for the shared case files"
+    ).strip() or None
 
 if st.button("Investigate", type="primary", disabled=not query):
+    st.session_state["investigation_query"] = query
+    st.session_state["investigation_settings"] = (case_id, retrieval_strategy, top_k)
+    st.session_state["evidence_page"] = 1
+
+# Kept across reruns, so paging through evidence re-renders the cached result instead of re-investigating.
+active_query = st.session_state.get("investigation_query")
+
+if active_query:
     with st.spinner("Detective AI is investigating..."):
         try:
-            payload = {"query": query}
+            investigation = run_investigation(active_query, *st.session_state["investigation_settings"])
+        except APIError as e:
+            investigation = None
+            st.error(str(e))
+            st.json(e.detail)
+        except Exception as e:
+            investigation = None
+            st.error(f"Error: {str(e)}")
+    
+    if investigation is not None:
+        result = investigation["result"]
+        
+        tab1, tab2, tab3 = st.tabs(["Investigation Report", "Evidence Analysis", "Technical Details"])
+        
+        with tab1:
+            if result['report'].get('is_relevant') is False:
+                st.header("Query Rejected")
+                st.error("⚠️ This query is not related to the crypto exchange hack investigation")
+            else:
+                st.header("Investigation Report")
             
-            response = requests.post(f"{API_URL}/investigate", json=payload)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption(f"Query: {result['query']}")
+                st.caption(f"Generated: {result['report']['timestamp']}")
+            with col2:
+                st.caption(f"Evidence Sources: {result['report'].get('evidence_count', 'N/A')}")
+                st.caption(f"Report ID: {result['storage'].get('report_id', 'N/A')}")
             
-            if response.status_code == 200:
-                result = response.json()
+            if result['report'].get('is_relevant') is False:
+                st.error(result['report']['report'])
+                st.warning(f"Reason: {result['report'].get('rejection_reason', 'Query not related to the investigation')}")
+                st.info("Please rephrase your query to focus on the cryptocurrency exchange hack investigation.")
+            else:
+                report_text = result['report']['report']
                 
-                tab1, tab2, tab3 = st.tabs(["Investigation Report", "Evidence Analysis", "Technical Details"])
+                st.markdown(report_text)
+            
+            if result['storage'].get('url'):
+                st.download_button(
+                    label="Download Full Report (JSON)",
+                    data=investigation["report_json"],
+                    file_name=f"investigation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json"
+                )
+        
+        with tab2:
+            st.header("Retrieved Evidence")
+            
+            if result['retrieval']['strategy'] == 'multi-step' and result['retrieval'].get('expanded_queries'):
+                st.subheader("Expanded Investigation Queries")
+                with st.expander("View expanded queries used for evidence retrieval", expanded=True):
+                    for i, exp_query in enumerate(result['retrieval']['expanded_queries']):
+                        st.markdown(f"**Query {i+1}:** {exp_query}")
+            
+            documents = result['retrieval']['documents']
+            evidence_df = [
+                {
+                    "Document": f"Doc {i+1}",
+                    "Source": doc['metadata'].get('file_name', 'Unknown'),
+                    "Confidence": doc['confidence'],
+                    "Score": round(doc['score'] * 100, 2)
+                }
+                for i, doc in enumerate(documents)
+            ]
+            
+            st.subheader("Evidence Documents")
+            # Only one page of cards is rendered per run.
+            page_count = max(1, math.ceil(len(documents) / EVIDENCE_PAGE_SIZE))
+            page = 1
+            if page_count > 1:
+                page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="evidence_page")
+            first = (page - 1) * EVIDENCE_PAGE_SIZE
+            
+            for i, doc in enumerate(documents[first:first + EVIDENCE_PAGE_SIZE], start=first):
+                confidence_class = f"confidence-{doc['confidence'].lower().replace(' ', '-')}"
+                st.markdown(f"""
+                <div class="evidence-card">
+                    <h4>Evidence {i+1}: <span class="{confidence_class}">{doc['confidence']} Confidence ({round(doc['score'] * 100, 2)}%)</span></h4>
+                    <p><strong>Source:</strong> {html.escape(doc['metadata'].get('file_name', 'Unknown'))}</p>
+                    <p>{html.escape(doc['text'])}</p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            st.subheader("Evidence Comparison")
+            evidence_table = pd.DataFrame(evidence_df)
+            st.dataframe(evidence_table, use_container_width=True)
+        
+        with tab3:
+            st.header("Technical Process Details")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("Retrieval Strategy")
+                st.info(f"Strategy used: **{result['retrieval']['strategy']}**")
                 
-                with tab1:
-                    if result['report'].get('is_relevant') is False:
-                        st.header("Query Rejected")
-                        st.error("⚠️ This query is not related to the crypto exchange hack investigation")
-                    else:
-                        st.header("Investigation Report")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.caption(f"Query: {result['query']}")
-                        st.caption(f"Generated: {result['report']['timestamp']}")
-                    with col2:
-                        st.caption(f"Evidence Sources: {result['report'].get('evidence_count', 'N/A')}")
-                        st.caption(f"Report ID: {result['storage'].get('report_id', 'N/A')}")
-                    
-                    if result['report'].get('is_relevant') is False:
-                        st.error(result['report']['report'])
-                        st.warning(f"Reason: {result['report'].get('rejection_reason', 'Query not related to the investigation')}")
-                        st.info("Please rephrase your query to focus on the cryptocurrency exchange hack investigation.")
-                    else:
-                        report_text = result['report']['report']
-                        
-                        st.markdown(report_text)
-                    
-                    if result['storage'].get('url'):
-                        st.download_button(
-                            label="Download Full Report (JSON)",
-                            data=json.dumps(result['report'], indent=2),
-                            file_name=f"investigation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                            mime="application/json"
-                        )
+                if result['retrieval']['strategy'] == 'multi-step':
+                    st.markdown("""
+                    **Multi-step Retrieval Process:**
+                    1. Original query expanded into multiple search queries
+                    2. Each search query executed against the vector database
+                    3. Results combined and deduplicated
+                    4. Top results selected based on relevance scores
+                    """)
+                else:
+                    st.markdown("""
+                    **Single-step Retrieval Process:**
+                    1. Query directly compared to all document embeddings
+                    2. Top matching documents retrieved based on vector similarity
+                    """)
+            
+            with col2:
+                st.subheader("Reranking Details")
+                
+                rerank_data = []
+                for i, doc in enumerate(documents):
+                    rerank_data.append({
+                        "Document": f"Doc {i+1}",
+                        "Vector Score": round(doc.get('vector_score', 0) * 100, 2),
+                        "Relevance Score": round(doc.get('relevance_score', 0) * 100, 2),
+                        "Combined Score": round(doc['score'] * 100, 2)
+                    })
                 
-                with tab2:
-                    st.header("Retrieved Evidence")
-                    
-                    if result['retrieval']['strategy'] == 'multi-step' and result['retrieval'].get('expanded_queries'):
-                        st.subheader("Expanded Investigation Queries")
-                        with st.expander("View expanded queries used for evidence retrieval", expanded=True):
-                            for i, exp_query in enumerate(result['retrieval']['expanded_queries']):
-                                st.markdown(f"**Query {i+1}:** {exp_query}")
-                    
-                    evidence_df = []
-                    
-                    st.subheader("Evidence Documents")
-                    for i, doc in enumerate(result['retrieval']['documents']):
-                        evidence_df.append({
-                            "Document": f"Doc {i+1}",
-                            "Source": doc['metadata'].get('file_name', 'Unknown'),
-                            "Confidence": doc['confidence'],
-                            "Score": round(doc['score'] * 100, 2)
-                        })
-                        
-                        confidence_class = f"confidence-{doc['confidence'].lower().replace(' ', '-')}"
-                        st.markdown(f"""
-                        <div class="evidence-card">
-                            <h4>Evidence {i+1}: <span class="{confidence_class}">{doc['confidence']} Confidence ({round(doc['score'] * 100, 2)}%)</span></h4>
-                            <p><strong>Source:</strong> {doc['metadata'].get('file_name', 'Unknown')}</p>
-                            <p>{doc['text']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    st.subheader("Evidence Comparison")
-                    evidence_table = pd.DataFrame(evidence_df)
-                    st.dataframe(evidence_table, use_container_width=True)
+                rerank_df = pd.DataFrame(rerank_data)
+                st.dataframe(rerank_df, use_container_width=True)
                 
-                with tab3:
-                    st.header("Technical Process Details")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.subheader("Retrieval Strategy")
-                        st.info(f"Strategy used: **{result['retrieval']['strategy']}**")
-                        
-                        if result['retrieval']['strategy'] == 'multi-step':
-                            st.markdown("""
-                            **Multi-step Retrieval Process:**
-                            1. Original query expanded into multiple search queries
-                            2. Each search query executed against the vector database
-                            3. Results combined and deduplicated
-                            4. Top results selected based on relevance scores
-                            """)
-                        else:
-                            st.markdown("""
-                            **Single-step Retrieval Process:**
-                            1. Query directly compared to all document embeddings
-                            2. Top matching documents retrieved based on vector similarity
-                            """)
-                    
-                    with col2:
-                        st.subheader("Reranking Details")
-                        
-                        rerank_data = []
-                        for i, doc in enumerate(result['retrieval']['documents']):
-                            rerank_data.append({
-                                "Document": f"Doc {i+1}",
-                                "Vector Score": round(doc.get('vector_score', 0) * 100, 2),
-                                "Relevance Score": round(doc.get('relevance_score', 0) * 100, 2),
-                                "Combined Score": round(doc['score'] * 100, 2)
-                            })
-                        
-                        rerank_df = pd.DataFrame(rerank_data)
-                        st.dataframe(rerank_df, use_container_width=True)
-                        
-                        st.markdown("""
-                        **Reranking Process:**
-                        1. Vector similarity score from initial retrieval
-                        2. LLM-based relevance assessment for context understanding
-                        3. Combined score calculation (40% vector + 60% relevance)
-                        4. Final ranking based on combined score
-                        """)
-                    
-                    # S3 Storage information
-                    st.subheader("Report Storage")
-                    if result['storage'].get('success'):
-                        st.success(f"Report successfully saved to S3 bucket: {result['storage'].get('filename')}")
-                        if result['storage'].get('url'):
-                            st.markdown(f"Access URL (valid for 24 hours): [View Report]({result['storage'].get('url')})")
-                    else:
-                        st.error(f"Failed to save report to S3: {result['storage'].get('error', 'Unknown error')}")
+                st.markdown("""
+                **Reranking Process:**
+                1. Vector similarity score from initial retrieval
+                2. LLM-based relevance assessment for context understanding
+                3. Combined score calculation (40% vector + 60% relevance)
+                4. Final ranking based on combined score
+                """)
             
+            # S3 Storage information
+            st.subheader("Report Storage")
+            if result['storage'].get('success'):
+                st.success(f"Report successfully saved to S3 bucket: {result['storage'].get('filename')}")
+                if result['storage'].get('url'):
+                    st.markdown(f"Access URL (valid for 24 hours): [View Report]({result['storage'].get('url')})")
             else:
-                st.error(f"API Error: {response.status_code}")
-                st.json(response.json())
+                st.error(f"Failed to save report to S3: {result['storage'].get('error', 'Unknown error')}")
+
+if show_history:
+    st.divider()
+    st.header("Report History")
+    
+    # Continuation tokens of the pages visited so far; None is the first page.
+    if "report_pages" not in st.session_state:
+        st.session_state["report_pages"] = [None]
+    report_pages = st.session_state["report_pages"]
+    
+    try:
+        listing = list_reports(report_pages[-1], REPORTS_PAGE_SIZE)
+    except Exception as e:
+        listing = None
+        st.error(f"Failed to list reports: {str(e)}")
+    
+    if listing is not None and not listing['reports']:
+        st.info("No saved reports yet.")
+    elif listing is not None:
+        st.caption(f"Page {len(report_pages)}")
+        st.dataframe(
+            pd.DataFrame([
+                {"Report": item['filename'], "Saved": item['last_modified'], "Size (bytes)": item['size']}
+                for item in listing['reports']
+            ]),
+            use_container_width=True
+        )
         
-        except Exception as e:
-            st.error(f"Error: {str(e)}")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button(
+                "Previous page",
+                disabled=len(report_pages) == 1,
+                on_click=lambda: report_pages.pop()
+            )
+        with col2:
+            st.button(
+                "Next page",
+                disabled=not listing.get('next_token'),
+                on_click=lambda: report_pages.append(listing['next_token'])
+            )
+        
+        selected = st.selectbox(
+            "Open a report",
+            [item['filename'] for item in listing['reports']],
+            index=None,
+            placeholder="Choose a saved report"
+        )
+        if selected:
+            try:
+                report_json = fetch_report(selected)
+                report = json.loads(report_json)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.caption(f"Query: {report.get('query', 'N/A')}")
+                    st.caption(f"Generated: {report.get('timestamp', 'N/A')}")
+                with col2:
+                    st.caption(f"Evidence Sources: {report.get('evidence_count', 'N/A')}")
+                    st.caption(f"Retrieval Strategy: {report.get('retrieval_strategy', 'N/A')}")
+                
+                st.markdown(report.get('report', ''))
+                
+                # The stored bytes are offered as is rather than decoded and re-encoded.
+                st.download_button(
+                    label="Download Report (JSON)",
+                    data=report_json,
+                    file_name=selected,
+                    mime="application/json"
+                )
+            except Exception as e:
+                st.error(f"Failed to load report: {str(e)}")
 
 # Footer
 st.divider()
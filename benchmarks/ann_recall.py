@@ -0,0 +1,109 @@
+"""Recall and throughput of IVF search in ``LocalVectorIndex`` against exact search.
+
+Builds a synthetic corpus of noisy vectors around many topic centres, indexes it,
+and reports recall@k and queries/sec for exact search and for IVF at each ``nprobe``.
+
+Example:
+    python -m benchmarks.ann_recall --vectors 100000,1000000 --dimension 256 \\
+        --queries 200 --top-k 10 --nprobe 1,4,8,16,32,64
+"""
+import argparse
+import json
+import time
+import numpy as np
+from typing import Dict, Any, List
+from app.db.local_index import LocalVectorIndex
+
+
+def synthetic_vectors(centers: np.ndarray, n: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    vectors = np.empty((n, centers.shape[1]), dtype=np.float32)
+    for i in range(0, n, 100000):
+        batch = min(100000, n - i)
+        vectors[i:i + batch] = centers[rng.integers(0, len(centers), batch)] + noise * rng.standard_normal(
+            (batch, centers.shape[1])
+        )
+    return vectors
+
+
+def load_index(vectors: np.ndarray, ann: str, precision: str = "float32") -> LocalVectorIndex:
+    index = LocalVectorIndex(dimension=vectors.shape[1], ann=ann, precision=precision)
+    ids = [str(i) for i in range(len(vectors))]
+    for i in range(0, len(vectors), 50000):
+        index.upsert([
+            {"id": ids[j], "values": vectors[j]} for j in range(i, min(i + 50000, len(vectors)))
+        ])
+    return index
+
+
+def run_queries(index: LocalVectorIndex, queries: np.ndarray, top_k: int) -> Dict[str, Any]:
+    index.query(vector=queries[0], top_k=top_k)
+    results = []
+    started_at = time.perf_counter()
+    for query in queries:
+        matches = index.query(vector=query, top_k=top_k)["matches"]
+        results.append({match["id"] for match in matches})
+    elapsed = time.perf_counter() - started_at
+    return {"results": results, "qps": round(len(queries) / elapsed, 1)}
+
+
+def benchmark(n: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.topics, args.dimension)).astype(np.float32)
+    vectors = synthetic_vectors(centers, n, args.noise, rng)
+    queries = synthetic_vectors(centers, args.queries, args.noise, rng)
+
+    index = load_index(vectors, "exact")
+    exact = run_queries(index, queries, args.top_k)
+
+    started_at = time.perf_counter()
+    nlist = index.build_ann(nlist=args.nlist or None)
+    build_seconds = time.perf_counter() - started_at
+
+    rows = [{
+        "vectors": n, "mode": "exact", "nprobe": None, "nlist": None,
+        "recall": 1.0, "qps": exact["qps"], "build_s": 0.0
+    }]
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        approx = run_queries(index, queries, args.top_k)
+        recall = np.mean([
+            len(found & truth) / len(truth) for found, truth in zip(approx["results"], exact["results"])
+        ])
+        rows.append({
+            "vectors": n, "mode": "ivf", "nprobe": nprobe, "nlist": nlist,
+            "recall": round(float(recall), 4), "qps": approx["qps"], "build_s": round(build_seconds, 2)
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall@k and QPS against exact search")
+    parser.add_argument("--vectors", default="100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=1.8, help="Spread of vectors around their topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF clusters (0 = 4*sqrt(n))")
+    parser.add_argument("--nprobe", default="1,4,8,16,32,64")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    args.nprobe = [int(value) for value in args.nprobe.split(",")]
+
+    rows = []
+    print(f"{'vectors':>9} {'mode':>5} {'nlist':>6} {'nprobe':>6} {'recall@' + str(args.top_k):>9} {'qps':>9} {'build s':>8}")
+    for n in [int(value) for value in args.vectors.split(",")]:
+        for row in benchmark(n, args):
+            rows.append(row)
+            print(
+                f"{row['vectors']:>9} {row['mode']:>5} {row['nlist'] or '-':>6} {row['nprobe'] or '-':>6} "
+                f"{row['recall']:>9} {row['qps']:>9} {row['build_s']:>8}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import tempfile
+from typing import Optional, Dict, Any
+from app.api import main
+from app.api.services import DocumentService, InitPineCone
+from app.db.chunk_store import ChunkStore
+from app.db.generations import GenerationPointer
+from app.db.local_index import LocalVectorIndex
+from app.db.pinecone_db import PineconeDB
+from app.db.s3_storage import S3Storage
+from app.rag.embedding_cache import EmbeddingCache
+from app.rag.embeddings import EmbeddingProcessor
+from app.rag.guard_agent import GuardAgent
+from app.rag.llm import ReportGenerator
+from app.rag.reranker import DocumentReranker
+from app.rag.retriever import DocumentRetriever
+from benchmarks.stubs import LatencyProfile, FixtureStore, StubOpenAI, StubS3Client, LatencyIndex, load_tokenizer
+
+
+class StubBackends:
+    """Pipeline components wired to stub clients and a local index built from the case files."""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyProfile] = None,
+        fixtures: Optional[FixtureStore] = None,
+        dimension: int = 1536
+    ):
+        self.latency = latency or LatencyProfile()
+        self.openai = StubOpenAI(self.latency, fixtures, dimension)
+        self.s3 = StubS3Client(self.latency)
+        self.index = LocalVectorIndex(dimension=dimension)
+        self.chunk_store = ChunkStore(":memory:")
+        self.generations = GenerationPointer(tempfile.mkdtemp(prefix="generations-"))
+        self.tokenizer = load_tokenizer()
+
+    def document_service(self, cache: Optional[EmbeddingCache] = None) -> DocumentService:
+        return DocumentService(
+            embedding_processor=EmbeddingProcessor(client=self.openai, tokenizer=self.tokenizer, cache=cache),
+            pinecone_db=InitPineCone(index=self.index, chunk_store=self.chunk_store),
+            generations=self.generations
+        )
+
+    def ingest(self) -> Dict[str, Any]:
+        result = self.document_service().load_all_documents()
+        if not result["success"]:
+            raise RuntimeError(f"Stub ingestion failed: {result['error']}")
+
+        self.openai.calls.clear()
+        return result
+
+    def components(self, strategy: Optional[str] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "retriever": DocumentRetriever(
+                client=self.openai,
+                pinecone_db=PineconeDB(
+                    index=LatencyIndex(self.index, self.latency),
+                    chunk_store=self.chunk_store,
+                    generations=self.generations
+                ),
+                strategy=strategy,
+                top_k=top_k
+            ),
+            "reranker": DocumentReranker(client=self.openai),
+            "report_generator": ReportGenerator(client=self.openai),
+            "s3_storage": S3Storage(s3_client=self.s3),
+            "guard_agent": GuardAgent(client=self.openai)
+        }
+
+    def install(self, app, strategy: Optional[str] = None, top_k: Optional[int] = None) -> None:
+        components = self.components(strategy, top_k)
+        app.dependency_overrides[main.get_retriever] = lambda: components["retriever"]
+        app.dependency_overrides[main.get_reranker] = lambda: components["reranker"]
+        app.dependency_overrides[main.get_report_generator] = lambda: components["report_generator"]
+        app.dependency_overrides[main.get_s3_storage] = lambda: components["s3_storage"]
+        app.dependency_overrides[main.get_guard_agent] = lambda: components["guard_agent"]
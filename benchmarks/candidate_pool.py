@@ -0,0 +1,171 @@
+"""Time and allocations of moving a large candidate pool through retrieval and rerank fusion.
+
+Builds ``--queries`` synthetic match lists of ``--matches`` each (ids overlapping across
+queries, as with multi-step expansion), then runs them through the steps between the
+vector search and the report: building candidates from the raw matches, merging to the
+best match per id, top-k selection and the vector/LLM score fusion and sort of the
+reranker (applied here to the whole merged pool to show how it scales). The dict pipeline
+the API used before ``EvidenceCandidate`` is reproduced alongside for comparison. MMR is
+left out unless ``--mmr`` is given: its pool-by-pool similarity matrix costs the same in
+both pipelines and would dominate the numbers. Peak traced memory comes from
+``tracemalloc``; times are medians of ``--repeats`` untraced runs.
+
+Example:
+    python -m benchmarks.candidate_pool --queries 4 --matches 2000 --dimension 256
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+import numpy as np
+from typing import Any, Callable, Dict, List
+from app.core.config import settings
+from app.db.candidates import EvidenceCandidate, best_per_id, candidate_scores
+from app.rag.mmr import mmr_select
+from app.rag.retriever import DocumentRetriever
+from benchmarks.backends import StubBackends
+
+CONFIDENCE = ((0.8, "High"), (0.5, "Medium"))
+
+
+def confidence_label(score: float) -> str:
+    for threshold, label in CONFIDENCE:
+        if score >= threshold:
+            return label
+    return "Low"
+
+
+def synthetic_matches(args: argparse.Namespace) -> List[List[Dict[str, Any]]]:
+    rng = np.random.default_rng(0)
+    id_space = int(args.queries * args.matches * 0.6)
+    vectors = rng.standard_normal((id_space, args.dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    text = "x" * args.text_bytes
+    results = []
+    for _ in range(args.queries):
+        rows = rng.choice(id_space, size=args.matches, replace=False)
+        scores = np.sort(rng.random(args.matches))[::-1]
+        results.append([
+            {
+                "id": f"chunk_{row}",
+                "score": float(score),
+                "values": vectors[row].tolist(),
+                "chunk": {"text": text, "metadata": {"file_name": f"case_{row % 50}.txt", "chunk_index": int(row)}}
+            }
+            for row, score in zip(rows, scores)
+        ])
+    return results
+
+
+def dict_pipeline(matches: List[List[Dict[str, Any]]], top_k: int, relevance: np.ndarray) -> List[Dict[str, Any]]:
+    all_results = []
+    for query_matches in matches:
+        for match in query_matches:
+            all_results.append({
+                "id": match["id"],
+                "score": match["score"],
+                "text": match["chunk"]["text"],
+                "metadata": match["chunk"]["metadata"],
+                "values": match["values"]
+            })
+
+    unique_results = {}
+    for result in all_results:
+        if result["id"] not in unique_results or result["score"] > unique_results[result["id"]]["score"]:
+            unique_results[result["id"]] = result
+    pool = sorted(list(unique_results.values()), key=lambda x: x["score"], reverse=True)
+
+    selected = pool
+    if settings.MMR_ENABLED:
+        selected = [pool[i] for i in mmr_select(
+            np.array([doc["score"] for doc in pool], dtype=np.float32),
+            np.array([doc["values"] for doc in pool], dtype=np.float32),
+            top_k,
+            settings.MMR_LAMBDA
+        )]
+    [{k: v for k, v in doc.items() if k != "values"} for doc in selected[:top_k]]
+
+    fused = []
+    for doc, llm_score in zip(pool, relevance):
+        combined_score = 0.4 * doc["score"] + 0.6 * float(llm_score)
+        fused.append({
+            **{k: v for k, v in doc.items() if k != "values"},
+            "score": combined_score,
+            "vector_score": doc["score"],
+            "relevance_score": float(llm_score),
+            "confidence": confidence_label(combined_score)
+        })
+    return sorted(fused, key=lambda x: x["score"], reverse=True)[:top_k]
+
+
+def candidate_pipeline(
+    matches: List[List[Dict[str, Any]]],
+    retriever: DocumentRetriever,
+    relevance: np.ndarray
+) -> List[EvidenceCandidate]:
+    all_results = []
+    for query_matches in matches:
+        for match in query_matches:
+            all_results.append(EvidenceCandidate(
+                match["id"], match["chunk"]["text"], match["chunk"]["metadata"], match["score"], match["values"]
+            ))
+
+    # merge_results, kept in two steps so the fusion below can use the whole merged pool.
+    pool = best_per_id(all_results)
+    retriever.select_diverse(pool)
+
+    combined = 0.4 * candidate_scores(pool) + 0.6 * relevance
+    top = np.argsort(-combined, kind="stable")[:retriever.top_k]
+    return [pool[i].rescored(float(combined[i]), float(relevance[i]), confidence_label(combined[i])) for i in top]
+
+
+def measure(run: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started_at)
+    return {"ms": round(statistics.median(times) * 1000, 2), "peak_mib": round(peak / 2**20, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candidate pool: dicts versus EvidenceCandidate objects")
+    parser.add_argument("--queries", type=int, default=4, help="Match lists merged, as from query expansion")
+    parser.add_argument("--matches", type=int, default=2000, help="Matches per query")
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--text-bytes", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--mmr", action="store_true", help="Include MMR selection over the merged pool")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    settings.MMR_ENABLED = args.mmr
+    matches = synthetic_matches(args)
+    unique = len({match["id"] for query_matches in matches for match in query_matches})
+    relevance = np.random.default_rng(1).random(unique)
+    retriever = StubBackends().components(top_k=args.top_k)["retriever"]
+
+    results = {
+        "dicts": measure(lambda: dict_pipeline(matches, args.top_k, relevance), args.repeats),
+        "candidates": measure(lambda: candidate_pipeline(matches, retriever, relevance), args.repeats)
+    }
+
+    print(f"{args.queries * args.matches} matches, {unique} unique chunks, dimension {args.dimension}")
+    print(f"{'pipeline':<11} {'median ms':>10} {'peak MiB':>9}")
+    for name, row in results.items():
+        print(f"{name:<11} {row['ms']:>10} {row['peak_mib']:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"matches": args.queries * args.matches, "unique": unique, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""How quickly a fresh API process becomes useful: import time, liveness, readiness and first requests.
+
+First imports ``app.api.main`` in ``--import-runs`` fresh interpreters and reports the
+median import time and which heavy SDKs it pulled in. Then, with warm-up off and on, starts
+``uvicorn benchmarks.stub_app:app`` on a local index (built as in ``serve_scaling``) and
+records when ``/health`` and ``/ready`` first answer 200 and the latency of the first two
+``/investigate`` requests. The ``connect`` stub latency is paid by the first call on each
+OpenAI and S3 client, standing in for DNS, TCP and TLS set-up.
+
+Example:
+    python -m benchmarks.cold_start --filler-vectors 200000 --latency connect=300,embedding=20,report=200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from typing import Any, Dict, List, Optional
+from benchmarks.serve_scaling import build_index
+
+HEAVY_MODULES = ("openai", "pinecone", "boto3", "tiktoken", "httpx")
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+started_at = time.perf_counter()
+import app.api.main
+print(json.dumps({{
+    "seconds": time.perf_counter() - started_at,
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def import_time(runs: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "import_ms": round(statistics.median(s["seconds"] for s in samples) * 1000, 1),
+        "heavy_modules_loaded": samples[-1]["loaded"]
+    }
+
+
+def wait_for(url: str, deadline: float) -> Optional[float]:
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return time.monotonic()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def investigate(url: str, query: str) -> float:
+    started_at = time.perf_counter()
+    response = httpx.post(f"{url}/api/v1/investigate", json={"query": query}, timeout=60)
+    response.raise_for_status()
+    return (time.perf_counter() - started_at) * 1000
+
+
+def run(warmup: bool, env: Dict[str, str], args: argparse.Namespace) -> Dict[str, Any]:
+    server_env = {**os.environ, **env, "STUB_LATENCY": args.latency, "WARMUP_ON_STARTUP": str(warmup).lower()}
+    url = f"http://127.0.0.1:{args.port}"
+    started_at = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.stub_app:app", "--port", str(args.port), "--log-level", "warning"],
+        env=server_env
+    )
+    try:
+        deadline = started_at + args.timeout
+        live_at = wait_for(f"{url}/api/v1/health", deadline)
+        ready_at = wait_for(f"{url}/api/v1/ready", deadline)
+        if live_at is None or ready_at is None:
+            raise RuntimeError("Server did not become ready in time")
+
+        # Distinct queries so the second request does not hit the first one's caches.
+        first_ms = investigate(url, f"{args.query} (first)")
+        second_ms = investigate(url, f"{args.query} (second)")
+        status = httpx.get(f"{url}/api/v1/ready", timeout=5).json()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "warmup": warmup,
+        "live_s": round(live_at - started_at, 3),
+        "ready_s": round(ready_at - started_at, 3),
+        "first_request_ms": round(first_ms, 1),
+        "second_request_ms": round(second_ms, 1),
+        "useful_after_s": round(ready_at - started_at + first_ms / 1000, 3),
+        "warmup_ms": status["warmup_ms"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold start: import time, readiness and first-request latency")
+    parser.add_argument("--import-runs", type=int, default=5)
+    parser.add_argument("--filler-vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--precision", default="float32")
+    parser.add_argument("--mmap", action="store_true", help="Memory-map the index instead of reading it into memory")
+    parser.add_argument("--latency", default="connect=300,embedding=20,guard=50,expansion=100,rerank=100,report=200",
+                        help="Stub latencies; 'connect' is paid once per client")
+    parser.add_argument("--query", default="Which wallet received the stolen funds?")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    imports = import_time(args.import_runs)
+    print(f"import app.api.main: {imports['import_ms']} ms, heavy modules loaded: {imports['heavy_modules_loaded'] or 'none'}")
+
+    with tempfile.TemporaryDirectory(prefix="cold-start-") as directory:
+        env = build_index(directory, args)
+        rows: List[Dict[str, Any]] = [run(warmup, env, args) for warmup in (False, True)]
+
+    print(f"{'warm-up':>7} {'live s':>7} {'ready s':>8} {'1st ms':>8} {'2nd ms':>8} {'useful s':>9}")
+    for row in rows:
+        print(
+            f"{'on' if row['warmup'] else 'off':>7} {row['live_s']:>7} {row['ready_s']:>8} "
+            f"{row['first_request_ms']:>8} {row['second_request_ms']:>8} {row['useful_after_s']:>9}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**imports, "runs": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
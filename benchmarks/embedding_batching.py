@@ -0,0 +1,105 @@
+"""Measure query-embedding throughput with and without cross-request micro-batching.
+
+Simulates ``--concurrency`` clients that each embed distinct query texts through
+``DocumentRetriever.get_embedding`` against a stub embeddings endpoint with a fixed
+per-call latency and a limited number of connections, once per batching window.
+
+Example:
+    python -m benchmarks.embedding_batching --concurrency 50 --requests 1000 \\
+        --latency 40 --windows 0,2,5,10 --max-batch-size 64
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from app.db.chunk_store import ChunkStore
+from app.db.local_index import LocalVectorIndex
+from app.db.pinecone_db import PineconeDB
+from app.rag.embedding_batcher import EmbeddingBatcher
+from app.rag.retriever import DocumentRetriever
+from benchmarks.run_benchmark import percentiles
+from benchmarks.stubs import LatencyProfile, StubOpenAI
+
+
+class ConnectionLimitedOpenAI(StubOpenAI):
+    """Stub client that allows only ``max_connections`` embedding calls at once, like a pooled HTTP client."""
+
+    def __init__(self, max_connections: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._connections = threading.BoundedSemaphore(max_connections)
+
+    def _create_embeddings(self, *args, **kwargs):
+        with self._connections:
+            return super()._create_embeddings(*args, **kwargs)
+
+
+def run(window_ms: float, args: argparse.Namespace) -> Dict[str, Any]:
+    client = ConnectionLimitedOpenAI(
+        args.max_connections,
+        LatencyProfile({"embedding": args.latency}, jitter=args.jitter),
+        dimension=args.dimension
+    )
+    batcher = EmbeddingBatcher(window_ms, args.max_batch_size, args.max_inflight) if window_ms > 0 else None
+    retriever = DocumentRetriever(
+        client=client,
+        pinecone_db=PineconeDB(index=LocalVectorIndex(dimension=args.dimension), chunk_store=ChunkStore(":memory:"))
+    )
+    # Bypass the process-wide batcher so each window is measured in isolation.
+    retriever.embedding_batcher = batcher
+
+    texts = [f"window {window_ms} query {i} about the stolen wallet funds" for i in range(args.requests)]
+    latencies: List[float] = []
+
+    def embed(text: str) -> None:
+        started_at = time.perf_counter()
+        retriever.get_embedding(text)
+        latencies.append((time.perf_counter() - started_at) * 1000)
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(embed, texts))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "window_ms": window_ms,
+        "requests": args.requests,
+        "embedding_calls": client.calls["embedding"],
+        "mean_batch_size": round(args.requests / max(client.calls["embedding"], 1), 2),
+        "throughput_rps": round(args.requests / elapsed, 2),
+        "latency_ms": percentiles(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-request embedding micro-batching")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=40.0, help="Stub embedding call latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--max-connections", type=int, default=10, help="Concurrent embedding calls the client allows")
+    parser.add_argument("--windows", default="0,2,5,10", help="Comma-separated batching windows in ms (0 = no batching)")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-inflight", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for window_ms in [float(w) for w in args.windows.split(",") if w.strip()]:
+        result = run(window_ms, args)
+        results.append(result)
+        print(
+            f"window={result['window_ms']:>5}ms  calls={result['embedding_calls']:>5}  "
+            f"batch={result['mean_batch_size']:>6}  {result['throughput_rps']:>8} req/s  "
+            f"p50={result['latency_ms']['p50']}ms  p95={result['latency_ms']['p95']}ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
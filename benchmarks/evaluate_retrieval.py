@@ -0,0 +1,276 @@
+"""Retrieval quality and cost evaluation over the labeled case-file questions.
+
+Sweeps chunking and top-k settings for every retrieval strategy, with and
+without LLM reranking, and reports recall@k, MRR and nDCG@k next to latency and
+LLM call counts. Indexes are built in the in-process ``LocalVectorIndex`` and
+embeddings go through ``EmbeddingCache``, so re-running a sweep only embeds
+chunks it has not seen before.
+
+Examples:
+    python -m benchmarks.evaluate_retrieval \\
+        --chunk-sizes 64,128,500 --chunk-overlaps 0,16,50 \\
+        --top-k-retrieval 3,5,8 --top-k-rerank 2,3 --strategies single-step,multi-step,hierarchical
+
+    # real OpenAI embeddings and LLM calls, cached across runs
+    python -m benchmarks.evaluate_retrieval --backend openai
+"""
+import argparse
+import itertools
+import json
+import logging
+import math
+import sys
+import tempfile
+import time
+import numpy as np
+import openai
+from typing import List, Dict, Any, Tuple
+from app.api.services import DocumentService, InitPineCone
+from app.core.config import settings
+from app.db.candidates import EvidenceCandidate
+from app.db.chunk_store import ChunkStore
+from app.db.generations import GenerationPointer
+from app.db.local_index import LocalVectorIndex
+from app.db.pinecone_db import PineconeDB
+from app.rag.embedding_cache import EmbeddingCache
+from app.rag.embeddings import EmbeddingProcessor
+from app.rag.reranker import DocumentReranker
+from app.rag.retriever import DocumentRetriever
+from benchmarks.stubs import LatencyProfile, StubOpenAI, CountingOpenAI, load_tokenizer
+
+LLM_CALL_KINDS = ("expansion", "rerank", "guard", "report")
+
+
+def load_qrels(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def judge(document: EvidenceCandidate, relevant: List[Dict[str, Any]]) -> List[int]:
+    """Indices of the labeled evidence items contained in a retrieved chunk."""
+    text = _normalize(document.text)
+    file_name = document.metadata.get("file_name")
+    return [
+        i for i, item in enumerate(relevant)
+        if item["file"] == file_name and _normalize(item["evidence"]) in text
+    ]
+
+
+def score_ranking(documents: List[EvidenceCandidate], relevant: List[Dict[str, Any]]) -> Dict[str, float]:
+    found = set()
+    reciprocal_rank = 0.0
+    dcg = 0.0
+
+    for rank, document in enumerate(documents, start=1):
+        new_items = [i for i in judge(document, relevant) if i not in found]
+        if new_items and not reciprocal_rank:
+            reciprocal_rank = 1.0 / rank
+        gain = max((relevant[i].get("grade", 1) for i in new_items), default=0)
+        dcg += (2 ** gain - 1) / math.log2(rank + 1)
+        found.update(new_items)
+
+    ideal = sorted((item.get("grade", 1) for item in relevant), reverse=True)[:len(documents)]
+    idcg = sum((2 ** grade - 1) / math.log2(rank + 1) for rank, grade in enumerate(ideal, start=1))
+
+    return {
+        "recall": len(found) / len(relevant),
+        "mrr": reciprocal_rank,
+        "ndcg": dcg / idcg if idcg else 0.0
+    }
+
+
+def build_index(
+    client,
+    tokenizer,
+    cache: EmbeddingCache,
+    chunk_size: int,
+    chunk_overlap: int
+) -> Tuple[PineconeDB, int]:
+    processor = EmbeddingProcessor(client=client, tokenizer=tokenizer, cache=cache)
+    processor.chunk_size = chunk_size
+    processor.chunk_overlap = chunk_overlap
+
+    index = LocalVectorIndex()
+    chunk_store = ChunkStore(":memory:")
+    generations = GenerationPointer(tempfile.mkdtemp(prefix="generations-"))
+    result = DocumentService(
+        embedding_processor=processor,
+        pinecone_db=InitPineCone(index=index, chunk_store=chunk_store),
+        generations=generations
+    ).load_all_documents()
+    if not result["success"]:
+        raise RuntimeError(f"Indexing failed: {result['error']}")
+    return PineconeDB(index=index, chunk_store=chunk_store, generations=generations), result["chunk_count"]
+
+
+def evaluate(
+    qrels: List[Dict[str, Any]],
+    retriever: DocumentRetriever,
+    reranker_top_ks: List[int],
+    rerank_modes: List[bool],
+    client
+) -> List[Dict[str, Any]]:
+    retrieved = []
+    for item in qrels:
+        calls_before = dict(client.calls)
+        start = time.perf_counter()
+        documents = retriever.retrieve(item["question"])["documents"]
+        retrieved.append((item, documents, (time.perf_counter() - start) * 1000, _call_delta(client, calls_before)))
+
+    rows = []
+    variants = [(False, None)] if False in rerank_modes else []
+    if True in rerank_modes:
+        variants += [(True, top_k) for top_k in reranker_top_ks]
+
+    for rerank, rerank_top_k in variants:
+        reranker = DocumentReranker(client=client)
+        if rerank_top_k:
+            reranker.top_k = rerank_top_k
+
+        scores, latencies, llm_calls, embedding_calls = [], [], 0, 0
+        for item, documents, retrieval_ms, calls in retrieved:
+            latency_ms = retrieval_ms
+            calls = dict(calls)
+            if rerank:
+                calls_before = dict(client.calls)
+                start = time.perf_counter()
+                documents = reranker.rerank_documents(item["question"], documents)
+                latency_ms += (time.perf_counter() - start) * 1000
+                for kind, count in _call_delta(client, calls_before).items():
+                    calls[kind] = calls.get(kind, 0) + count
+
+            scores.append(score_ranking(documents, item["relevant"]))
+            latencies.append(latency_ms)
+            llm_calls += sum(calls.get(kind, 0) for kind in LLM_CALL_KINDS)
+            embedding_calls += calls.get("embedding", 0)
+
+        rows.append({
+            "strategy": retriever.strategy,
+            "top_k_retrieval": retriever.top_k,
+            "rerank": rerank,
+            "top_k_rerank": rerank_top_k,
+            "recall": round(float(np.mean([s["recall"] for s in scores])), 4),
+            "mrr": round(float(np.mean([s["mrr"] for s in scores])), 4),
+            "ndcg": round(float(np.mean([s["ndcg"] for s in scores])), 4),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "llm_calls_per_query": round(llm_calls / len(qrels), 2),
+            "embedding_calls_per_query": round(embedding_calls / len(qrels), 2)
+        })
+
+    return rows
+
+
+def _call_delta(client, before: Dict[str, int]) -> Dict[str, int]:
+    return {kind: count - before.get(kind, 0) for kind, count in client.calls.items() if count != before.get(kind, 0)}
+
+
+def recommend(rows: List[Dict[str, Any]], recall_tolerance: float) -> Dict[str, Any]:
+    """Cheapest configuration whose recall is within ``recall_tolerance`` of the best one."""
+    best_recall = max(row["recall"] for row in rows)
+    candidates = [row for row in rows if row["recall"] >= best_recall - recall_tolerance]
+    return min(candidates, key=lambda row: (
+        row["llm_calls_per_query"],
+        row["embedding_calls_per_query"],
+        row["latency_p50_ms"],
+        row["top_k_rerank"] or row["top_k_retrieval"]
+    ))
+
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'chunk':>6}{'overlap':>8}{'strategy':>13}{'top_k':>6}{'rerank':>8}"
+        f"{'recall':>8}{'mrr':>8}{'ndcg':>8}{'p50 ms':>9}{'p95 ms':>9}{'llm/q':>7}{'emb/q':>7}"
+    )
+    print(header)
+    for row in rows:
+        rerank = str(row["top_k_rerank"]) if row["rerank"] else "-"
+        print(
+            f"{row['chunk_size']:>6}{row['chunk_overlap']:>8}{row['strategy']:>13}{row['top_k_retrieval']:>6}{rerank:>8}"
+            f"{row['recall']:>8}{row['mrr']:>8}{row['ndcg']:>8}{row['latency_p50_ms']:>9}{row['latency_p95_ms']:>9}"
+            f"{row['llm_calls_per_query']:>7}{row['embedding_calls_per_query']:>7}"
+        )
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Retrieval quality + latency evaluation over the case files")
+    parser.add_argument("--qrels", default="benchmarks/eval/qrels.jsonl")
+    parser.add_argument("--backend", choices=["stub", "openai"], default="stub")
+    parser.add_argument("--latency", default="", help="Injected stub latencies, e.g. embedding=20,rerank=150")
+    parser.add_argument("--embedding-cache", help="SQLite embedding cache (default: benchmarks/.cache/embeddings-<backend>.sqlite)")
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[settings.CHUNK_SIZE])
+    parser.add_argument("--chunk-overlaps", type=_int_list, default=[settings.CHUNK_OVERLAP])
+    parser.add_argument("--top-k-retrieval", type=_int_list, default=[settings.TOP_K_RETRIEVAL])
+    parser.add_argument("--top-k-rerank", type=_int_list, default=[settings.TOP_K_RERANK])
+    parser.add_argument("--strategies", default="single-step,multi-step,hierarchical")
+    parser.add_argument("--rerank", choices=["both", "on", "off"], default="both")
+    parser.add_argument("--recall-tolerance", type=float, default=0.02)
+    parser.add_argument("--output", help="Write all rows as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    qrels = load_qrels(args.qrels)
+    if args.backend == "openai":
+        client = CountingOpenAI(openai.OpenAI(api_key=settings.OPENAI_API_KEY))
+    else:
+        client = StubOpenAI(LatencyProfile.parse(args.latency))
+
+    cache = EmbeddingCache(args.embedding_cache or f"benchmarks/.cache/embeddings-{args.backend}.sqlite")
+    tokenizer = load_tokenizer()
+    rerank_modes = {"both": [False, True], "on": [True], "off": [False]}[args.rerank]
+    strategies = [strategy.strip() for strategy in args.strategies.split(",")]
+
+    rows = []
+    for chunk_size, chunk_overlap in itertools.product(args.chunk_sizes, args.chunk_overlaps):
+        if chunk_overlap >= chunk_size:
+            continue
+
+        pinecone_db, chunk_count = build_index(client, tokenizer, cache, chunk_size, chunk_overlap)
+        print(f"chunk_size={chunk_size} chunk_overlap={chunk_overlap}: {chunk_count} chunks")
+
+        for top_k, strategy in itertools.product(args.top_k_retrieval, strategies):
+            retriever = DocumentRetriever(
+                client=client,
+                pinecone_db=pinecone_db,
+                strategy=strategy,
+                top_k=top_k,
+                embedding_cache=cache
+            )
+            reranker_top_ks = [k for k in args.top_k_rerank if k <= top_k]
+            for row in evaluate(qrels, retriever, reranker_top_ks, rerank_modes, client):
+                rows.append({"chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "chunk_count": chunk_count, **row})
+
+    if not rows:
+        print("No valid configurations to evaluate")
+        return 1
+
+    print()
+    print_rows(rows)
+
+    best = recommend(rows, args.recall_tolerance)
+    print(
+        f"\nCheapest configuration within {args.recall_tolerance} recall of the best: "
+        f"CHUNK_SIZE={best['chunk_size']} CHUNK_OVERLAP={best['chunk_overlap']} "
+        f"TOP_K_RETRIEVAL={best['top_k_retrieval']} RETRIEVAL_STRATEGY={best['strategy']} "
+        f"rerank={'TOP_K_RERANK=' + str(best['top_k_rerank']) if best['rerank'] else 'off'} "
+        f"(recall={best['recall']}, llm calls/query={best['llm_calls_per_query']})"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "recommended": best}, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
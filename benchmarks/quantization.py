@@ -0,0 +1,90 @@
+"""Memory, recall and throughput of reduced-precision and reduced-dimension local indexes.
+
+Every combination of precision and dimension is compared against exact float32 search
+over the full-dimension vectors. Reduced dimensions keep the leading components and
+re-normalise, as text-embedding-3 models do for the ``dimensions`` parameter. Recall is
+reported with rescoring (the top ``RESCORE_FACTOR * k`` candidates rescored in float32)
+and without it.
+
+Example:
+    python -m benchmarks.quantization --vectors 200000 --dimension 1024 \\
+        --dimensions 1024,512,256 --precisions float32,float16,int8
+"""
+import argparse
+import json
+import numpy as np
+from typing import Dict, Any, List
+from app.core.config import settings
+from benchmarks.ann_recall import synthetic_vectors, load_index, run_queries
+
+BYTES_PER_VALUE = {"float32": 4, "float16": 2, "int8": 1}
+
+
+def recall(found: List[set], truth: List[set]) -> float:
+    return round(float(np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])), 4)
+
+
+def benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.topics, args.dimension)).astype(np.float32)
+    vectors = synthetic_vectors(centers, args.vectors, args.noise, rng)
+    queries = synthetic_vectors(centers, args.queries, args.noise, rng)
+    truth = run_queries(load_index(vectors, "exact"), queries, args.top_k)["results"]
+
+    rows = []
+    rescore_factor = settings.RESCORE_FACTOR
+    for dimension in args.dimensions:
+        for precision in args.precisions:
+            index = load_index(vectors[:, :dimension], "exact", precision)
+            scan_bytes = args.vectors * dimension * BYTES_PER_VALUE[precision]
+            if precision == "int8":
+                scan_bytes += args.vectors * 4
+
+            settings.RESCORE_FACTOR = rescore_factor
+            rescored = run_queries(index, queries[:, :dimension], args.top_k)
+            settings.RESCORE_FACTOR = 1
+            plain = run_queries(index, queries[:, :dimension], args.top_k)
+            settings.RESCORE_FACTOR = rescore_factor
+
+            rows.append({
+                "dimension": dimension,
+                "precision": precision,
+                "scan_mib": round(scan_bytes / 2**20, 1),
+                "recall": recall(plain["results"], truth),
+                "recall_rescored": recall(rescored["results"], truth) if precision != "float32" else None,
+                "qps": plain["qps"],
+                "qps_rescored": rescored["qps"] if precision != "float32" else None
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k, QPS and memory of quantized / truncated local indexes")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=1024, help="Full embedding dimension")
+    parser.add_argument("--dimensions", default="1024,512,256", help="Comma-separated reduced dimensions")
+    parser.add_argument("--precisions", default="float32,float16,int8")
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=1.8, help="Spread of vectors around their topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    args.dimensions = [int(value) for value in args.dimensions.split(",")]
+    args.precisions = args.precisions.split(",")
+
+    rows = benchmark(args)
+    print(f"{'dim':>5} {'precision':>9} {'scan MiB':>9} {'recall@' + str(args.top_k):>9} {'+rescore':>9} {'qps':>8} {'+rescore':>9}")
+    for row in rows:
+        print(
+            f"{row['dimension']:>5} {row['precision']:>9} {row['scan_mib']:>9} {row['recall']:>9} "
+            f"{row['recall_rescored'] or '-':>9} {row['qps']:>8} {row['qps_rescored'] or '-':>9}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Bytes on the wire and serialization CPU of /investigate responses.
+
+Runs workload queries through the API on stub backends, asking for the full response, a
+slim one without evidence text (``include_evidence_text: false``) and the report alone
+(``fields: ["report"]``), each with and without gzip. Then times encoding one full
+response the way FastAPI does for a ``response_model`` (validate, dump, ``json.dumps``)
+against ``response_payload`` encoded by the app's default (orjson) response class.
+
+Example:
+    python -m benchmarks.response_size --queries 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from fastapi.utils import create_model_field
+from app.api.main import app, DefaultResponse
+from app.api.models import InvestigationResponse, QueryRequest
+from app.api.pipeline import InvestigationPipeline, response_payload
+from benchmarks.backends import StubBackends
+from benchmarks.run_benchmark import load_workload
+
+VARIANTS = {
+    "full": {},
+    "no_evidence_text": {"include_evidence_text": False},
+    "report_only": {"fields": ["report"]}
+}
+
+
+def wire_bytes(client: TestClient, queries: List[str]) -> Dict[str, Dict[str, float]]:
+    sizes: Dict[str, Dict[str, List[int]]] = {name: {"identity": [], "gzip": []} for name in VARIANTS}
+    for query in queries:
+        for name, options in VARIANTS.items():
+            for encoding in ("identity", "gzip"):
+                response = client.post(
+                    "/api/v1/investigate",
+                    json={"query": query, **options},
+                    headers={"Accept-Encoding": encoding}
+                )
+                response.raise_for_status()
+                sizes[name][encoding].append(response.num_bytes_downloaded)
+    return {
+        name: {encoding: round(statistics.mean(values)) for encoding, values in by_encoding.items()}
+        for name, by_encoding in sizes.items()
+    }
+
+
+def encode_times(response: InvestigationResponse, request: QueryRequest, iterations: int) -> Dict[str, float]:
+    field = create_model_field(name="Response_investigate", type_=InvestigationResponse, mode="serialization")
+
+    async def response_model_path() -> None:
+        content = await serialize_response(field=field, response_content=response, is_coroutine=True)
+        JSONResponse(content)
+
+    async def response_payload_path() -> None:
+        DefaultResponse(response_payload(response, request))
+
+    async def timed() -> Dict[str, float]:
+        results = {}
+        for name, encode in (("response_model", response_model_path), ("response_payload", response_payload_path)):
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                await encode()
+            results[name] = round((time.perf_counter() - started_at) / iterations * 1e6, 1)
+        return results
+
+    return asyncio.run(timed())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response size and serialization cost of /investigate")
+    parser.add_argument("--workload", default="benchmarks/workloads/investigations.jsonl")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=None, help="Evidence documents retrieved per query")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    queries = [item["query"] for item in load_workload(args.workload)][:args.queries]
+    backends = StubBackends()
+    backends.ingest()
+    backends.install(app, top_k=args.top_k)
+
+    with TestClient(app) as client:
+        sizes = wire_bytes(client, queries)
+
+    components = backends.components(top_k=args.top_k)
+    pipeline = InvestigationPipeline(
+        components["retriever"], components["reranker"], components["report_generator"],
+        components["s3_storage"], components["guard_agent"]
+    )
+    request = QueryRequest(query=queries[0])
+    timings = encode_times(pipeline.investigate(request), request, args.iterations)
+    app.dependency_overrides.clear()
+
+    print(f"{'variant':<18} {'bytes':>8} {'gzip bytes':>11}")
+    for name, size in sizes.items():
+        print(f"{name:<18} {size['identity']:>8} {size['gzip']:>11}")
+    print(f"encode one full response: {timings['response_model']} us via response_model, "
+          f"{timings['response_payload']} us via response_payload")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"bytes": sizes, "encode_us": timings}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
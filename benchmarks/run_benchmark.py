@@ -0,0 +1,212 @@
+"""Replay a query workload against /investigate using offline stub backends.
+
+Example:
+    python -m benchmarks.run_benchmark \\
+        --workload benchmarks/workloads/investigations.jsonl \\
+        --strategies multi-step,single-step --concurrency 4 --repeat 2 \\
+        --latency embedding=20,guard=250,expansion=400,rerank=150,report=300,report_per_token=2,vector_search=15,s3=40 \\
+        --output bench_results.json
+
+Pass ``--baseline`` with a previous ``--output`` file to fail (exit code 1) when
+throughput or any stage p95 regresses by more than ``--tolerance``.
+"""
+import argparse
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+import numpy as np
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+from fastapi.testclient import TestClient
+from app.api.main import app
+from app.core.config import settings
+from benchmarks.backends import StubBackends
+from benchmarks.stubs import LatencyProfile, FixtureStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY = "embedding=20,guard=250,expansion=400,rerank=150,report=300,report_per_token=2,vector_search=15,s3=40"
+
+
+def load_workload(path: str) -> List[Dict[str, Any]]:
+    workload = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if "query" in item:
+                workload.append(item)
+    return workload
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": round(float(np.mean(values)), 2),
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2)
+    }
+
+
+def replay(client: TestClient, item: Dict[str, Any]) -> Dict[str, Any]:
+    payload = {**item, "include_timings": True}
+    start = time.perf_counter()
+    response = client.post(f"{settings.API_V1_STR}/investigate", json=payload)
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    body = response.json() if response.status_code == 200 else {}
+    return {
+        "status": response.status_code,
+        "latency_ms": latency_ms,
+        "timings": body.get("timings") or {},
+        "degradations": body.get("degradations") or []
+    }
+
+
+def run_strategy(
+    backends: StubBackends,
+    strategy: str,
+    workload: List[Dict[str, Any]],
+    concurrency: int,
+    repeat: int
+) -> Dict[str, Any]:
+    backends.install(app, strategy=strategy)
+    backends.openai.calls.clear()
+    items = workload * repeat
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with TestClient(app) as client, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda item: replay(client, item), items))
+    wall_seconds = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stage_samples: Dict[str, List[float]] = {"client": [r["latency_ms"] for r in results]}
+    for result in results:
+        for name, ms in result["timings"].items():
+            stage_samples.setdefault(name, []).append(ms)
+
+    return {
+        "strategy": strategy,
+        "requests": len(results),
+        "errors": sum(1 for r in results if r["status"] != 200),
+        "degraded": sum(1 for r in results if r["degradations"]),
+        "throughput_rps": round(len(results) / wall_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "stages_ms": {name: percentiles(samples) for name, samples in stage_samples.items()},
+        "backend_calls": dict(Counter(backends.openai.calls)),
+        "peak_traced_mb": round(peak_bytes / 1024 / 1024, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    }
+
+
+def print_report(summaries: List[Dict[str, Any]]) -> None:
+    for summary in summaries:
+        print(f"\n=== strategy: {summary['strategy']} ===")
+        print(
+            f"requests={summary['requests']} errors={summary['errors']} degraded={summary['degraded']} "
+            f"throughput={summary['throughput_rps']} req/s wall={summary['wall_seconds']}s"
+        )
+        print(f"memory: peak traced={summary['peak_traced_mb']} MB, max RSS={summary['max_rss_mb']} MB")
+        print(f"backend calls: {summary['backend_calls']}")
+        print(f"{'stage':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for name, stats in sorted(summary["stages_ms"].items()):
+            print(
+                f"{name:<16}{stats['count']:>8}{stats['mean']:>10}{stats['p50']:>10}"
+                f"{stats['p95']:>10}{stats['p99']:>10}"
+            )
+
+
+def find_regressions(
+    summaries: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    tolerance: float
+) -> List[str]:
+    regressions = []
+    previous = {summary["strategy"]: summary for summary in baseline}
+
+    for summary in summaries:
+        before = previous.get(summary["strategy"])
+        if before is None:
+            continue
+
+        if summary["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{summary['strategy']}: throughput {before['throughput_rps']} -> {summary['throughput_rps']} req/s"
+            )
+
+        for name, stats in summary["stages_ms"].items():
+            old = before["stages_ms"].get(name)
+            if old and stats["p95"] > old["p95"] * (1 + tolerance):
+                regressions.append(
+                    f"{summary['strategy']}: {name} p95 {old['p95']} -> {stats['p95']} ms"
+                )
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end /investigate benchmark")
+    parser.add_argument("--workload", default="benchmarks/workloads/investigations.jsonl")
+    parser.add_argument("--strategies", default="multi-step,single-step")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="Injected latencies, e.g. embedding=20,report=300")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative latency jitter, e.g. 0.2 for +/-20%%")
+    parser.add_argument("--fixtures", help="JSON file of recorded OpenAI responses to replay")
+    parser.add_argument("--output", help="Write the summary as JSON")
+    parser.add_argument("--baseline", help="Previous --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    workload = load_workload(args.workload)
+    if not workload:
+        print(f"No queries found in {args.workload}")
+        return 1
+
+    backends = StubBackends(
+        latency=LatencyProfile.parse(args.latency, jitter=args.jitter),
+        fixtures=FixtureStore(args.fixtures) if args.fixtures else None
+    )
+    ingestion = backends.ingest()
+    print(f"Indexed {ingestion['chunk_count']} chunks; replaying {len(workload)} queries x {args.repeat}")
+
+    summaries = [
+        run_strategy(backends, strategy.strip(), workload, args.concurrency, args.repeat)
+        for strategy in args.strategies.split(",")
+    ]
+    app.dependency_overrides.clear()
+
+    print_report(summaries)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = find_regressions(summaries, json.load(f), args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for regression in regressions:
+                print(f"- {regression}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
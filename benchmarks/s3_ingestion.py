@@ -0,0 +1,99 @@
+"""Throughput of S3 ingestion against download concurrency, and the cost of an incremental re-sync.
+
+Fills a stub S3 bucket with copies of the case files, then times a full load through
+``S3CaseSource`` at each concurrency with the given per-request S3 latency. A final
+incremental sync after changing one object shows how many downloads ETags save.
+
+Example:
+    python -m benchmarks.s3_ingestion --objects 200 --s3-latency 40 --concurrency 1,4,16
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+from app.api.services import DocumentService, InitPineCone
+from app.core.config import settings
+from app.db.case_sources import S3CaseSource
+from app.db.chunk_store import ChunkStore
+from app.db.generations import GenerationPointer
+from app.db.local_index import LocalVectorIndex
+from app.rag.embeddings import EmbeddingProcessor
+from benchmarks.stubs import LatencyProfile, StubOpenAI, StubS3Client, load_tokenizer
+
+
+class CountingS3Client(StubS3Client):
+    def __init__(self, latency: LatencyProfile):
+        super().__init__(latency)
+        self.downloads = 0
+
+    def get_object(self, *args, **kwargs):
+        self.downloads += 1
+        return super().get_object(*args, **kwargs)
+
+
+def fill_bucket(s3: StubS3Client, objects: int, prefix: str) -> None:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(settings.CASE_FILES_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    for i in range(objects):
+        s3.put_object(Bucket="bench", Key=f"{prefix}file_{i:05d}.txt", Body=f"Exhibit {i}.\n{texts[i % len(texts)]}")
+
+
+def run(concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    s3 = CountingS3Client(LatencyProfile())
+    fill_bucket(s3, args.objects, "evidence/")
+    s3.latency = LatencyProfile({"s3": args.s3_latency})
+
+    source = S3CaseSource(prefix="evidence/", bucket="bench", s3_client=s3, max_workers=concurrency)
+    service = DocumentService(
+        embedding_processor=EmbeddingProcessor(client=StubOpenAI(dimension=64), tokenizer=load_tokenizer()),
+        pinecone_db=InitPineCone(index=LocalVectorIndex(dimension=64), chunk_store=ChunkStore(":memory:")),
+        generations=GenerationPointer(tempfile.mkdtemp(prefix="generations-"))
+    )
+
+    started_at = time.perf_counter()
+    result = service.load_all_documents(source=source)
+    load_seconds = time.perf_counter() - started_at
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    full_downloads = s3.downloads
+
+    s3.put_object(Bucket="bench", Key="evidence/file_00000.txt", Body="Exhibit 0 was withdrawn.")
+    s3.downloads = 0
+    started_at = time.perf_counter()
+    synced = service.sync_files(source=source)
+    sync_seconds = time.perf_counter() - started_at
+
+    return {
+        "concurrency": concurrency,
+        "objects": args.objects,
+        "load_s": round(load_seconds, 2),
+        "objects_per_s": round(args.objects / load_seconds, 1),
+        "downloads": full_downloads,
+        "sync_s": round(sync_seconds, 2),
+        "sync_downloads": s3.downloads,
+        "sync_changed": synced.get("changed")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="S3 ingestion throughput by download concurrency")
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--s3-latency", type=float, default=40.0, help="Milliseconds per S3 request")
+    parser.add_argument("--concurrency", default="1,4,16")
+    args = parser.parse_args()
+
+    rows: List[Dict[str, Any]] = [run(int(c), args) for c in args.concurrency.split(",")]
+    print(f"{'workers':>7} {'objects':>7} {'load s':>7} {'obj/s':>7} {'gets':>5} {'sync s':>7} {'sync gets':>9}")
+    for row in rows:
+        print(
+            f"{row['concurrency']:>7} {row['objects']:>7} {row['load_s']:>7} {row['objects_per_s']:>7} "
+            f"{row['downloads']:>5} {row['sync_s']:>7} {row['sync_downloads']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
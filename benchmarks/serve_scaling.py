@@ -0,0 +1,200 @@
+"""Throughput and per-worker memory of the API as the number of worker processes grows.
+
+Builds a local index on disk (the case files plus ``--filler-vectors`` synthetic chunks),
+then for each worker count starts ``uvicorn benchmarks.stub_app:app --workers N`` and
+drives ``/investigate`` with ``--concurrency`` clients for ``--duration`` seconds. Worker
+memory is read from /proc: RSS counts every resident page, PSS splits shared pages
+between the processes mapping them, so with ``--mmap`` PSS stays flat as workers grow.
+
+Example:
+    python -m benchmarks.serve_scaling --workers 1,2,4 --filler-vectors 200000 --mmap
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from app.core.config import settings
+
+
+def build_index(directory: str, args: argparse.Namespace) -> Dict[str, str]:
+    env = {
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_DIR": os.path.join(directory, "index"),
+        "CHUNK_STORE_PATH": os.path.join(directory, "chunks.sqlite"),
+        "GENERATIONS_DIR": "",
+        "EMBEDDING_DIMENSIONS": str(args.dimension),
+        "LOCAL_INDEX_MMAP": "true" if args.mmap else "false",
+        "LOCAL_INDEX_PRECISION": args.precision,
+        "JOB_WORKERS": "0",
+        "EMBEDDING_BATCH_WINDOW_MS": "0",
+        "MMR_ENABLED": "false"
+    }
+    # Build straight into the namespace the workers read, without index generations.
+    settings.GENERATIONS_DIR = ""
+
+    from app.api.services import DocumentService, InitPineCone
+    from app.db.chunk_store import ChunkStore
+    from app.db.local_index import LocalVectorIndex
+    from app.rag.embeddings import EmbeddingProcessor
+    from benchmarks.stubs import StubOpenAI, load_tokenizer
+
+    store = InitPineCone(
+        index=LocalVectorIndex(env["LOCAL_INDEX_DIR"], dimension=args.dimension, precision=args.precision),
+        chunk_store=ChunkStore(env["CHUNK_STORE_PATH"])
+    )
+    processor = EmbeddingProcessor(client=StubOpenAI(dimension=args.dimension), tokenizer=load_tokenizer())
+    result = DocumentService(embedding_processor=processor, pinecone_db=store).load_all_documents()
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+
+    rng = np.random.default_rng(0)
+    for start in range(0, args.filler_vectors, 50000):
+        count = min(50000, args.filler_vectors - start)
+        vectors = rng.standard_normal((count, args.dimension)).astype(np.float32)
+        store.upsert_documents([
+            {
+                "id": f"archive_{start + i}",
+                "text": f"Archived exchange record {start + i}.",
+                "embedding": vectors[i],
+                "metadata": {"file_name": "archive.txt", "source": "synthetic"}
+            }
+            for i in range(count)
+        ])
+    return env
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """RSS and PSS of a process in MiB."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        fields = {line.split(":")[0]: line.split()[1] for line in f if ":" in line}
+    return {"rss_mib": int(fields["Rss"]) / 1024, "pss_mib": int(fields["Pss"]) / 1024}
+
+
+def worker_memory(parent_pid: int) -> List[Dict[str, float]]:
+    """Memory of each child process of ``parent_pid`` (the uvicorn workers)."""
+    workers = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            if ppid == parent_pid:
+                workers.append(process_memory(int(pid)))
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+    return workers
+
+
+def drive(url: str, queries: List[str], concurrency: int, duration: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    def client_loop(client_id: int) -> None:
+        nonlocal errors
+        with httpx.Client(timeout=60) as client:
+            i = 0
+            while time.monotonic() < deadline:
+                # A unique suffix keeps single-flight from coalescing identical requests.
+                query = f"{queries[i % len(queries)]} (client {client_id}, request {i})"
+                started_at = time.perf_counter()
+                response = client.post(f"{url}/api/v1/investigate", json={"query": query})
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started_at)
+                else:
+                    errors += 1
+                i += 1
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client_loop, range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1) if latencies else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1) if latencies else None,
+        "errors": errors
+    }
+
+
+def run(workers: int, env: Dict[str, str], queries: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    metrics_dir = tempfile.mkdtemp(prefix="rag-metrics-")
+    server_env = {**os.environ, **env, "STUB_LATENCY": args.latency}
+    if workers > 1:
+        server_env["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.stub_app:app", "--port", str(args.port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=server_env
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(600):
+            try:
+                if httpx.get(f"{url}/api/v1/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+
+        drive(url, queries, args.concurrency, args.warmup)
+        result = drive(url, queries, args.concurrency, args.duration)
+        memory = worker_memory(server.pid) if workers > 1 else [process_memory(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "workers": workers,
+        **result,
+        "rss_mib_per_worker": round(float(np.mean([m["rss_mib"] for m in memory])), 1) if memory else None,
+        "pss_mib_per_worker": round(float(np.mean([m["pss_mib"] for m in memory])), 1) if memory else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API throughput and memory by worker count")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--filler-vectors", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--precision", default="float32")
+    parser.add_argument("--mmap", action="store_true", help="Memory-map the index so workers share it")
+    parser.add_argument("--latency", default="", help="Stub latencies, e.g. embedding=20,report=300")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workload", default="benchmarks/workloads/investigations.jsonl")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    with open(args.workload, "r", encoding="utf-8") as f:
+        queries = [json.loads(line)["query"] for line in f if line.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="serve-scaling-") as directory:
+        env = build_index(directory, args)
+        rows = [run(int(n), env, queries, args) for n in args.workers.split(",")]
+
+    print(f"{'workers':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6} {'RSS MiB':>8} {'PSS MiB':>8}")
+    for row in rows:
+        print(
+            f"{row['workers']:>7} {row['rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['errors']:>6} "
+            f"{row['rss_mib_per_worker']:>8} {row['pss_mib_per_worker']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""The API wired to stub OpenAI and S3 clients, importable by uvicorn worker processes.
+
+Unlike ``StubBackends`` it keeps the real vector store wiring, so each worker serves the
+local index and chunk store configured by the environment (``VECTOR_BACKEND=local``,
+``LOCAL_INDEX_DIR``, ``CHUNK_STORE_PATH``...). ``STUB_LATENCY`` takes the same
+``op=ms,...`` spec as the other benchmarks.
+
+Example:
+    VECTOR_BACKEND=local LOCAL_INDEX_MMAP=true uvicorn benchmarks.stub_app:app --workers 4
+"""
+import os
+from app.api import main
+from app.core.config import settings
+from app.db.s3_storage import S3Storage
+from app.rag.guard_agent import GuardAgent
+from app.rag.llm import ReportGenerator
+from app.rag.reranker import DocumentReranker
+from app.rag.retriever import DocumentRetriever
+from benchmarks.stubs import LatencyProfile, StubOpenAI, StubS3Client
+
+latency = LatencyProfile.parse(os.getenv("STUB_LATENCY", ""))
+openai_client = StubOpenAI(latency, dimension=settings.embedding_dimension)
+s3_client = StubS3Client(latency)
+
+app = main.app
+app.dependency_overrides[main.get_retriever] = lambda: DocumentRetriever(client=openai_client)
+app.dependency_overrides[main.get_reranker] = lambda: DocumentReranker(client=openai_client)
+app.dependency_overrides[main.get_report_generator] = lambda: ReportGenerator(client=openai_client)
+app.dependency_overrides[main.get_s3_storage] = lambda: S3Storage(s3_client=s3_client)
+app.dependency_overrides[main.get_guard_agent] = lambda: GuardAgent(client=openai_client)
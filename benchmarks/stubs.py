@@ -0,0 +1,458 @@
+"""Deterministic, offline stand-ins for the OpenAI, Pinecone and S3 clients.
+
+The stubs implement only the calls the app makes, answer deterministically from
+the prompt text, and sleep for configurable per-operation latencies so that
+benchmarks exercise realistic timing (including client timeouts) without any
+network access.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import numpy as np
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional
+
+OPERATIONS = ("embedding", "guard", "expansion", "rerank", "report", "report_per_token", "vector_search", "s3", "connect")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_CASE_VOCABULARY = {
+    "attacker", "breach", "credentials", "domain", "employee", "funds", "ip", "login", "malware",
+    "phishing", "ransom", "solana", "stolen", "suspect", "tornado", "wallet", "withdrawn"
+}
+
+
+class LatencyProfile:
+    """Injected latencies in milliseconds per operation, with optional relative jitter."""
+
+    def __init__(self, latencies_ms: Optional[Dict[str, float]] = None, jitter: float = 0.0, seed: int = 0):
+        self.latencies_ms = {op: 0.0 for op in OPERATIONS}
+        self.latencies_ms.update(latencies_ms or {})
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, jitter: float = 0.0) -> "LatencyProfile":
+        """Parse ``"embedding=20,report=900"`` into a profile."""
+        latencies = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            op, _, value = item.partition("=")
+            if op not in OPERATIONS:
+                raise ValueError(f"Unknown operation '{op}', expected one of {', '.join(OPERATIONS)}")
+            latencies[op] = float(value)
+        return cls(latencies, jitter=jitter)
+
+    def delay_ms(self, op: str, units: int = 1) -> float:
+        base = self.latencies_ms.get(op, 0.0) * units
+        if not self.jitter or not base:
+            return base
+        with self._lock:
+            return base * (1 + self._random.uniform(-self.jitter, self.jitter))
+
+    def wait(self, op: str, timeout: Optional[float] = None, extra_ms: float = 0.0) -> None:
+        delay = (self.delay_ms(op) + extra_ms) / 1000
+        if timeout is not None and delay > timeout:
+            # Imported on demand so the stub app starts as lazily as the real one
+            import httpx
+            import openai
+            time.sleep(timeout)
+            raise openai.APITimeoutError(request=httpx.Request("POST", f"https://stub.invalid/{op}"))
+        if delay > 0:
+            time.sleep(delay)
+
+
+def hash_embedding(text: str, dimension: int = 1536) -> List[float]:
+    """Feature-hashed bag of words and bigrams, L2-normalised.
+
+    Texts sharing vocabulary get high cosine similarity, which keeps retrieval
+    results meaningful for benchmarking without a real embedding model.
+    """
+    vector = np.zeros(dimension, dtype=np.float32)
+    words = _WORD_RE.findall(text.lower())
+    features = words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimension
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] += sign
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector.tolist()
+
+
+class WordPieceTokenizer:
+    """Lossless whitespace tokenizer used when the tiktoken BPE files are not cached locally."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._pieces: List[str] = []
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[int]:
+        tokens = []
+        with self._lock:
+            for piece in re.findall(r"\S+\s*|\s+", text):
+                if piece not in self._ids:
+                    self._ids[piece] = len(self._pieces)
+                    self._pieces.append(piece)
+                tokens.append(self._ids[piece])
+        return tokens
+
+    def decode(self, tokens: List[int]) -> str:
+        return "".join(self._pieces[token] for token in tokens)
+
+
+def load_tokenizer():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return WordPieceTokenizer()
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text.split()) * 4 // 3)
+
+
+class FixtureStore:
+    """Recorded OpenAI responses keyed by a hash of the request."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses: Dict[str, Any] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._responses = json.load(f)
+
+    @staticmethod
+    def key(kind: str, model: str, payload: Any) -> str:
+        raw = json.dumps({"kind": kind, "model": model, "payload": payload}, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._responses.get(key)
+
+    def put(self, key: str, response: Any) -> None:
+        with self._lock:
+            self._responses[key] = response
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._responses, f)
+
+
+class StubOpenAI:
+    """Deterministic replacement for ``openai.OpenAI`` (embeddings and chat completions)."""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyProfile] = None,
+        fixtures: Optional[FixtureStore] = None,
+        dimension: int = 1536,
+        timeout: Optional[float] = None,
+        calls: Optional[Counter] = None,
+        connected: Optional[threading.Event] = None
+    ):
+        self.latency = latency or LatencyProfile()
+        self.fixtures = fixtures
+        self.dimension = dimension
+        self.timeout = timeout
+        self.calls = calls if calls is not None else Counter()
+        # Shared with ``with_options`` copies, which reuse the connection pool like the real client
+        self.connected = connected if connected is not None else threading.Event()
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.models = SimpleNamespace(list=self._list_models)
+
+    def with_options(self, timeout: Optional[float] = None, **kwargs) -> "StubOpenAI":
+        return StubOpenAI(self.latency, self.fixtures, self.dimension, timeout, self.calls, self.connected)
+
+    def _connect(self) -> None:
+        """The first call pays the ``connect`` latency (DNS, TCP and TLS set-up)."""
+        if not self.connected.is_set():
+            self.latency.wait("connect")
+            self.connected.set()
+
+    def _list_models(self, **kwargs):
+        self._connect()
+        return SimpleNamespace(data=[SimpleNamespace(id="stub")])
+
+    def _create_embeddings(
+        self,
+        input: List[str],
+        model: str,
+        timeout: Optional[float] = None,
+        dimensions: Optional[int] = None,
+        **kwargs
+    ):
+        self.calls["embedding"] += 1
+        self._connect()
+        self.latency.wait("embedding", timeout or self.timeout)
+
+        recorded = self._recorded("embedding", model, input)
+        if recorded is not None:
+            vectors = recorded["embeddings"]
+        else:
+            vectors = [hash_embedding(text, dimensions or self.dimension) for text in input]
+
+        prompt_tokens = sum(count_tokens(text) for text in input)
+        return SimpleNamespace(
+            model=model,
+            data=[SimpleNamespace(embedding=vector, index=i) for i, vector in enumerate(vectors)],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, total_tokens=prompt_tokens)
+        )
+
+    def _create_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 256,
+        timeout: Optional[float] = None,
+        **kwargs
+    ):
+        kind = classify_prompt(messages)
+        self.calls[kind] += 1
+        self._connect()
+
+        recorded = self._recorded("chat", model, messages)
+        if recorded is not None:
+            content = recorded["content"]
+        else:
+            content = _deterministic_reply(kind, messages[-1]["content"], max_tokens)
+
+        completion_tokens = min(count_tokens(content), max_tokens)
+        extra_ms = self.latency.delay_ms("report_per_token", completion_tokens) if kind == "report" else 0.0
+        self.latency.wait(kind, timeout or self.timeout, extra_ms)
+
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(
+                prompt_tokens=sum(count_tokens(m["content"]) for m in messages),
+                completion_tokens=completion_tokens
+            )
+        )
+
+    def _recorded(self, kind: str, model: str, payload: Any) -> Optional[Any]:
+        if self.fixtures is None:
+            return None
+        return self.fixtures.get(FixtureStore.key(kind, model, payload))
+
+
+class RecordingOpenAI:
+    """Wraps a live ``openai.OpenAI`` client and records its responses into a ``FixtureStore``."""
+
+    def __init__(self, client, fixtures: FixtureStore):
+        self.client = client
+        self.fixtures = fixtures
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def with_options(self, **kwargs) -> "RecordingOpenAI":
+        return RecordingOpenAI(self.client.with_options(**kwargs), self.fixtures)
+
+    def _create_embeddings(self, input: List[str], model: str, **kwargs):
+        response = self.client.embeddings.create(input=input, model=model, **kwargs)
+        self.fixtures.put(
+            FixtureStore.key("embedding", model, input),
+            {"embeddings": [item.embedding for item in response.data]}
+        )
+        return response
+
+    def _create_completion(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        self.fixtures.put(
+            FixtureStore.key("chat", model, messages),
+            {"content": response.choices[0].message.content}
+        )
+        return response
+
+
+class CountingOpenAI:
+    """Wraps a live ``openai.OpenAI`` client and counts calls per prompt kind, like ``StubOpenAI.calls``."""
+
+    def __init__(self, client, calls: Optional[Counter] = None):
+        self.client = client
+        self.calls = calls if calls is not None else Counter()
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def with_options(self, **kwargs) -> "CountingOpenAI":
+        return CountingOpenAI(self.client.with_options(**kwargs), self.calls)
+
+    def _create_embeddings(self, **kwargs):
+        self.calls["embedding"] += 1
+        return self.client.embeddings.create(**kwargs)
+
+    def _create_completion(self, messages: List[Dict[str, str]], **kwargs):
+        self.calls[classify_prompt(messages)] += 1
+        return self.client.chat.completions.create(messages=messages, **kwargs)
+
+
+class LatencyIndex:
+    """Delegates to a vector index, adding the ``vector_search`` latency to every query."""
+
+    def __init__(self, index, latency: LatencyProfile):
+        self.index = index
+        self.latency = latency
+
+    def query(self, **kwargs):
+        self.latency.wait("vector_search")
+        return self.index.query(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+class StubS3Client:
+    """In-memory replacement for the boto3 S3 client calls used by ``S3Storage``."""
+
+    def __init__(self, latency: Optional[LatencyProfile] = None):
+        self.latency = latency or LatencyProfile()
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.connected = threading.Event()
+
+    def _connect(self) -> None:
+        if not self.connected.is_set():
+            self.latency.wait("connect")
+            self.connected.set()
+
+    def head_bucket(self, Bucket: str, **kwargs):
+        self._connect()
+        self.latency.wait("s3")
+        return {}
+
+    def put_object(self, Bucket: str, Key: str, Body, ContentType: Optional[str] = None, **kwargs):
+        self._connect()
+        self.latency.wait("s3")
+        body = Body.encode("utf-8") if isinstance(Body, str) else Body
+        with self._lock:
+            self.objects[Key] = {
+                "Body": body,
+                "ContentType": ContentType,
+                "LastModified": datetime.now(timezone.utc),
+                "ETag": f'"{hashlib.md5(body).hexdigest()}"'
+            }
+        return {"ETag": self.objects[Key]["ETag"]}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs):
+        self._connect()
+        self.latency.wait("s3")
+        obj = self.objects.get(Key)
+        if obj is None:
+            from botocore.exceptions import ClientError
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "The specified key does not exist."}}, "GetObject")
+        return {
+            "Body": SimpleNamespace(read=lambda: obj["Body"]),
+            "ContentType": obj["ContentType"],
+            "ETag": obj["ETag"],
+            "LastModified": obj["LastModified"]
+        }
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", MaxKeys: int = 1000, ContinuationToken: Optional[str] = None, **kwargs):
+        self._connect()
+        self.latency.wait("s3")
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        start = int(ContinuationToken) if ContinuationToken else 0
+        page = keys[start:start + MaxKeys]
+
+        response = {
+            "KeyCount": len(page),
+            "IsTruncated": start + MaxKeys < len(keys)
+        }
+        if page:
+            response["Contents"] = [
+                {
+                    "Key": key,
+                    "Size": len(self.objects[key]["Body"]),
+                    "LastModified": self.objects[key]["LastModified"],
+                    "ETag": self.objects[key]["ETag"]
+                }
+                for key in page
+            ]
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+
+    def get_paginator(self, operation_name: str):
+        return _StubPaginator(getattr(self, operation_name))
+
+    def generate_presigned_url(self, ClientMethod: str, Params: Dict[str, Any], ExpiresIn: int = 3600):
+        return f"https://stub-s3.invalid/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+class _StubPaginator:
+    def __init__(self, operation):
+        self.operation = operation
+
+    def paginate(self, **kwargs):
+        token = None
+        while True:
+            page = self.operation(**kwargs, **({"ContinuationToken": token} if token else {}))
+            yield page
+            token = page.get("NextContinuationToken")
+            if not token:
+                return
+
+
+def classify_prompt(messages: List[Dict[str, str]]) -> str:
+    system = messages[0]["content"] if messages else ""
+    prompt = messages[-1]["content"] if messages else ""
+
+    if "security evaluation system" in system:
+        return "guard"
+    if "Rate the relevance" in prompt:
+        return "rerank"
+    if "Output the search queries as a JSON array" in prompt:
+        return "expansion"
+    return "report"
+
+
+def _deterministic_reply(kind: str, prompt: str, max_tokens: int) -> str:
+    if kind == "guard":
+        query_words = set(_WORD_RE.findall(_extract(r"Query:\s*(.+)", prompt).lower()))
+        if query_words & _CASE_VOCABULARY:
+            return "The query concerns the exchange hack.\nRELEVANT: This query is about the crypto hack investigation"
+        return "The query is about something else.\nIRRELEVANT: This query is not about the crypto hack investigation"
+
+    if kind == "expansion":
+        question = _extract(r"Original question:\s*(.+)", prompt)
+        return json.dumps([
+            f"{question} transaction trail",
+            f"{question} suspect identity",
+            f"{question} attack timeline"
+        ])
+
+    if kind == "rerank":
+        query_words = set(_WORD_RE.findall(_extract(r"Detective's Query:\s*(.+)", prompt).lower()))
+        doc_words = set(_WORD_RE.findall(_extract(r"Document:\s*(.+?)\s*Consider:", prompt, re.S).lower()))
+        overlap = len(query_words & doc_words) / max(1, len(query_words))
+        return str(int(round(100 * overlap)))
+
+    query = _extract(r"Detective's Query:\s*(.+)", prompt)
+    sections = ["SUMMARY", "KEY EVIDENCE", "ANALYSIS", "CONNECTIONS", "NEXT STEPS"]
+    body = " ".join(f"Finding related to {query}." for _ in range(10))
+    report = "\n\n".join(f"{section}:\n{body}" for section in sections)
+    words = report.split(" ")
+    return " ".join(words[:max(1, max_tokens * 3 // 4)])
+
+
+def _extract(pattern: str, text: str, flags: int = 0) -> str:
+    match = re.search(pattern, text, flags)
+    return match.group(1).strip() if match else ""
@@ -2,10 +2,13 @@ import subprocess
 import os
 import argparse
 import logging
+import shutil
+import tempfile
 import time
 import uvicorn
 import signal
 import sys
+from app.core.config import settings
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,19 +19,47 @@ logger = logging.getLogger(__name__)
 api_process = None
 ui_process = None
 
-def start_api_server(host="0.0.0.0", port=8000, reload=False):
+def prepare_multiprocess_metrics():
+    """Point prometheus_client at a clean directory shared by all API worker processes.
+    
+    A ``PROMETHEUS_MULTIPROC_DIR`` set by the operator is cleared; otherwise a fresh
+    directory is created for this run, so other instances' metric files are never touched.
+    Returns the directory when it was created here, for removal on shutdown.
+    """
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+        return None
+    
+    metrics_dir = tempfile.mkdtemp(prefix="rag-metrics-")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    return metrics_dir
+
+def start_api_server(host="0.0.0.0", port=8000, reload=False, workers=1, app="app.api.main:app"):
+    metrics_dir = None
     try:
-        logger.info(f"Starting API server on {host}:{port}")
+        if workers > 1 and reload:
+            logger.warning("--reload runs a single process; ignoring --workers")
+            workers = 1
+        if workers > 1:
+            metrics_dir = prepare_multiprocess_metrics()
+        
+        logger.info(f"Starting API server on {host}:{port} with {workers} worker process(es)")
         return uvicorn.run(
-            "app.api.main:app",
+            app,
             host=host,
             port=port,
             reload=reload,
+            workers=workers,
             log_level="info",
         )
     except Exception as e:
         logger.error(f"Failed to start API server: {e}")
         return None
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
 
 def start_ui(port=8501):
     try:
@@ -82,6 +113,8 @@ if __name__ == "__main__":
     parser.add_argument("--api-only", action="store_true", help="Run only the API server")
     parser.add_argument("--ui-only", action="store_true", help="Run only the Streamlit UI")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload for development")
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS,
+                        help="API worker processes; set LOCAL_INDEX_MMAP=true so they share the local index")
     args = parser.parse_args()
     
     signal.signal(signal.SIGINT, cleanup)
@@ -89,7 +122,7 @@ if __name__ == "__main__":
     
     try:
         if args.api_only:
-            start_api_server(port=args.api_port, reload=args.reload)
+            start_api_server(port=args.api_port, reload=args.reload, workers=args.workers)
         elif args.ui_only:
             ui_process = start_ui(port=args.ui_port)
             if ui_process:
@@ -98,7 +131,7 @@ if __name__ == "__main__":
         else:
             ui_process = start_ui(port=args.ui_port)
             if ui_process:
-                start_api_server(port=args.api_port, reload=args.reload)
+                start_api_server(port=args.api_port, reload=args.reload, workers=args.workers)
     
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
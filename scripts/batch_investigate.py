@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import argparse
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_queries(path, field):
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if not item.get(field):
+                logger.warning(f"Skipping line {line_number}: no '{field}' field")
+                continue
+            queries.append({**{k: v for k, v in item.items() if k != field}, "query": item[field]})
+    return queries
+
+def run_remote(batch, api_url, max_concurrency):
+    import requests
+
+    payload = {"queries": batch, "max_concurrency": max_concurrency}
+    with requests.post(f"{api_url}/investigate/batch", json=payload, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def run_local(batch, pipeline, max_concurrency):
+    from app.api.models import QueryRequest
+
+    requests = [QueryRequest(**item) for item in batch]
+    yield from pipeline.investigate_batch(requests, max_concurrency)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run investigations for every query in a JSONL file")
+    parser.add_argument("input", help="JSONL file with one query per line")
+    parser.add_argument("--field", default="query", help="JSON field holding the query text")
+    parser.add_argument("--output", help="Write NDJSON results here instead of stdout")
+    parser.add_argument("--api-url", default=os.getenv("API_URL", f"http://localhost:8000{settings.API_V1_STR}"))
+    parser.add_argument("--local", action="store_true", help="Run the pipeline in-process instead of calling the API")
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_MAX_QUERIES)
+    parser.add_argument("--max-concurrency", type=int, default=settings.BATCH_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    queries = load_queries(args.input, args.field)
+    if not queries:
+        logger.warning(f"No queries found in {args.input}")
+        return
+
+    logger.info(f"Investigating {len(queries)} queries in batches of {args.batch_size}")
+
+    pipeline = None
+    if args.local:
+        from app.api.pipeline import InvestigationPipeline
+        from app.rag.retriever import DocumentRetriever
+        from app.rag.reranker import DocumentReranker
+        from app.rag.llm import ReportGenerator
+        from app.rag.guard_agent import GuardAgent
+        from app.db.s3_storage import S3Storage
+
+        pipeline = InvestigationPipeline(
+            DocumentRetriever(), DocumentReranker(), ReportGenerator(), S3Storage(), GuardAgent()
+        )
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    failures = 0
+    try:
+        for offset in range(0, len(queries), args.batch_size):
+            batch = queries[offset:offset + args.batch_size]
+            if args.local:
+                results = run_local(batch, pipeline, args.max_concurrency)
+            else:
+                results = run_remote(batch, args.api_url, args.max_concurrency)
+
+            for item in results:
+                if item["type"] in ("result", "error"):
+                    item["index"] += offset
+                    failures += item["type"] == "error"
+                else:
+                    logger.info(
+                        f"Batch done: {item['queries']} queries, {item['unique_queries']} unique, "
+                        f"{item['search_texts']} searches in {item['elapsed_ms']:.0f}ms"
+                    )
+                output.write(json.dumps(item) + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if failures:
+        logger.error(f"{failures} investigations failed")
+    else:
+        logger.info("All investigations complete")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 import os
 import sys
+import argparse
 import logging
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.api.services import DocumentService
+from app.api.watcher import CorpusWatcher
 from app.core.config import settings
+from app.db.case_sources import LocalCaseSource, S3CaseSource
+from app.db.pinecone_db import case_namespace
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,34 +18,67 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 def main():
+    parser = argparse.ArgumentParser(description="Chunk, embed and index case files")
+    parser.add_argument("--case-id", help="Index into this case's own namespace (letters, digits, '-' and '_')")
+    parser.add_argument("--case-dir", default=settings.CASE_FILES_DIR, help="Directory of .txt case files to load")
+    parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and re-index case files as they are added, changed or deleted")
+    parser.add_argument("--s3-prefix", help="Read .txt case files from this S3 prefix instead of --case-dir")
+    parser.add_argument("--s3-bucket", help="Bucket for --s3-prefix (default: CASE_FILES_S3_BUCKET or S3_BUCKET)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-index files added, changed or deleted since the last load (S3 objects by ETag)")
+    args = parser.parse_args()
+    
+    if args.watch:
+        logger.info(f"Target namespace: {case_namespace(args.case_id)}")
+        CorpusWatcher(case_files_dir=args.case_dir, case_id=args.case_id).run_forever()
+        return
+    
     logger.info("Starting document loading script")
     
-    case_files_dir = settings.CASE_FILES_DIR
-    if not os.path.exists(case_files_dir):
-        logger.error(f"Case files directory not found: {case_files_dir}")
-        logger.info("Creating directory...")
-        os.makedirs(case_files_dir, exist_ok=True)
+    case_files_dir = args.case_dir
+    if args.s3_prefix is not None:
+        source = S3CaseSource(prefix=args.s3_prefix, bucket=args.s3_bucket)
+        location = f"s3://{source.bucket_name}/{source.prefix}"
+    else:
+        if not os.path.exists(case_files_dir):
+            logger.error(f"Case files directory not found: {case_files_dir}")
+            logger.info("Creating directory...")
+            os.makedirs(case_files_dir, exist_ok=True)
+        source = LocalCaseSource(case_files_dir)
+        location = case_files_dir
     
-    case_files = [f for f in os.listdir(case_files_dir) if f.endswith('.txt')]
+    case_files = sorted(source.fingerprints())
     if not case_files:
-        logger.warning(f"No case files found in {case_files_dir}")
+        logger.warning(f"No case files found in {location}")
         logger.info("Please add case files to the directory before running this script.")
         return
     
     logger.info(f"Found {len(case_files)} case files: {', '.join(case_files)}")
     
-    confirm = input("Do you want to proceed with loading these files? (y/n): ")
-    if confirm.lower() != 'y':
-        logger.info("Operation cancelled by user")
-        return
+    logger.info(f"Target namespace: {case_namespace(args.case_id)}")
+    
+    if not args.yes:
+        confirm = input("Do you want to proceed with loading these files? (y/n): ")
+        if confirm.lower() != 'y':
+            logger.info("Operation cancelled by user")
+            return
         
     document_service = DocumentService()
     
     logger.info("Loading documents...")
-    result = document_service.load_all_documents()
+    if args.incremental:
+        result = document_service.sync_files(case_id=args.case_id, case_files_dir=case_files_dir, source=source)
+    else:
+        result = document_service.load_all_documents(case_id=args.case_id, case_files_dir=case_files_dir, source=source)
     
     if result["success"]:
+        if args.incremental and "added" in result:
+            logger.info(f"{result['added']} added, {result['changed']} changed, {result['deleted']} deleted")
         logger.info(f"Successfully loaded {result.get('chunk_count', 0)} document chunks")
+        if result.get("generation"):
+            logger.info(f"Active generation: {result['generation']}")
         logger.info("Document loading complete!")
     else:
         logger.error(f"Failed to load documents: {result.get('error', 'Unknown error')}")
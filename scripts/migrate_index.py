@@ -0,0 +1,103 @@
+import os
+import sys
+import argparse
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pinecone import Pinecone, ServerlessSpec
+from app.api.services import InitPineCone
+from app.core.config import settings
+from app.db.chunk_store import ChunkStore
+from app.db.local_index import LocalVectorIndex
+from app.db.quantization import PRECISIONS
+from app.rag.embeddings import EmbeddingProcessor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def build_target(args):
+    if args.target_dir:
+        return LocalVectorIndex(args.target_dir, dimension=settings.embedding_dimension, precision=args.precision)
+    
+    pc = Pinecone(api_key=settings.PINECONE_API_KEY, environment=settings.PINECONE_ENVIRONMENT)
+    if args.target_index not in pc.list_indexes().names():
+        logger.info(f"Creating Pinecone index '{args.target_index}' with dimension {settings.embedding_dimension}")
+        pc.create_index(
+            name=args.target_index,
+            dimension=settings.embedding_dimension,
+            metric="cosine",
+            spec=ServerlessSpec(cloud='aws', region='us-east-1')
+        )
+    return pc.Index(args.target_index)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-embed every chunk in the chunk store into a new index (new model, dimensions or precision)"
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target-dir", help="Build a local index in this directory")
+    target.add_argument("--target-index", help="Build (or fill) this Pinecone index")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL, help="Embedding model for the new index")
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS,
+                        help="Reduced dimensions for text-embedding-3 models (0 = model default)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=settings.LOCAL_INDEX_PRECISION,
+                        help="In-memory precision of the local target index")
+    parser.add_argument("--namespace", action="append", help="Namespace to migrate (default: all)")
+    parser.add_argument("--chunk-store", default=settings.CHUNK_STORE_PATH)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+    args = parser.parse_args()
+    
+    if not args.chunk_store or not os.path.exists(args.chunk_store):
+        logger.error("Migration re-embeds chunk text from the chunk store; run scripts/load_documents.py first")
+        return
+    
+    settings.EMBEDDING_MODEL = args.model
+    settings.EMBEDDING_DIMENSIONS = args.dimensions
+    
+    chunk_store = ChunkStore(args.chunk_store)
+    namespaces = args.namespace or chunk_store.namespaces()
+    counts = {namespace: len(chunk_store.list_namespace(namespace)) for namespace in namespaces}
+    
+    logger.info(
+        f"Re-embedding {sum(counts.values())} chunks from {len(namespaces)} namespaces with "
+        f"{settings.embedding_model_key} ({settings.embedding_dimension} dimensions) into "
+        f"{args.target_dir or args.target_index}"
+    )
+    if not args.yes:
+        confirm = input("Do you want to proceed? (y/n): ")
+        if confirm.lower() != 'y':
+            logger.info("Operation cancelled by user")
+            return
+    
+    processor = EmbeddingProcessor()
+    target = InitPineCone(index=build_target(args), chunk_store=chunk_store)
+    
+    for namespace in namespaces:
+        chunks = chunk_store.list_namespace(namespace)
+        for i in range(0, len(chunks), args.batch_size):
+            batch = chunks[i:i + args.batch_size]
+            embeddings = processor.create_embeddings([chunk["text"] for chunk in batch])
+            for chunk, embedding in zip(batch, embeddings):
+                chunk["embedding"] = embedding
+            target.upsert_documents(batch, namespace)
+            logger.info(f"{namespace}: {min(i + args.batch_size, len(chunks))}/{len(chunks)} chunks")
+        
+        file_count = target.upsert_file_summaries(chunks, namespace)
+        logger.info(f"{namespace}: indexed summary vectors for {file_count} files")
+    
+    bytes_per_value = {"float32": 4, "float16": 2, "int8": 1}[args.precision if args.target_dir else "float32"]
+    logger.info(
+        f"Done. Vector memory: {sum(counts.values()) * settings.embedding_dimension * bytes_per_value / 2**20:.1f} MiB. "
+        f"Point the API at the new index (EMBEDDING_MODEL={settings.EMBEDDING_MODEL} "
+        f"EMBEDDING_DIMENSIONS={settings.EMBEDDING_DIMENSIONS} "
+        + (f"LOCAL_INDEX_DIR={args.target_dir} LOCAL_INDEX_PRECISION={args.precision})" if args.target_dir
+           else f"PINECONE_INDEX={args.target_index})")
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import signal
+import argparse
+import logging
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.jobs import JobWorkerPool
+from app.api.pipeline import InvestigationPipeline
+from app.core.config import settings
+from app.db.job_queue import JobQueue
+from app.db.s3_storage import S3Storage
+from app.rag.guard_agent import GuardAgent
+from app.rag.llm import ReportGenerator
+from app.rag.reranker import DocumentReranker
+from app.rag.retriever import DocumentRetriever
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def build_pipeline():
+    return InvestigationPipeline(
+        DocumentRetriever(), DocumentReranker(), ReportGenerator(), S3Storage(), GuardAgent()
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Run investigation job workers outside the API process")
+    parser.add_argument("--workers", type=int, default=settings.JOB_WORKERS or 2)
+    parser.add_argument("--queue", default=settings.JOB_QUEUE_PATH, help="Path to the SQLite job queue")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    pool = JobWorkerPool(queue, build_pipeline, workers=args.workers)
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+
+    logger.info(f"Job queue {args.queue}: {queue.counts()}")
+    pool.start()
+    stopped.wait()
+
+    logger.info("Stopping job workers...")
+    pool.stop()
+
+if __name__ == "__main__":
+    main()
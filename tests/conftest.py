@@ -0,0 +1,18 @@
+import pytest
+from app.api.pipeline import InvestigationPipeline
+from benchmarks.backends import StubBackends
+
+
+@pytest.fixture(scope="session")
+def backends():
+    """Stub OpenAI and S3 clients plus a local index of the case files, built once per run."""
+    backends = StubBackends()
+    backends.ingest()
+    return backends
+
+
+@pytest.fixture
+def pipeline(backends):
+    backends.openai.calls.clear()
+    backends.s3.objects.clear()
+    return InvestigationPipeline(**backends.components())
@@ -0,0 +1,41 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api.main import app
+
+QUERY = "Which wallets received the stolen funds?"
+
+
+@pytest.fixture
+def client(backends):
+    backends.install(app)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_trimmed_responses_omit_fields_and_evidence_text(client, backends):
+    response = client.post(
+        "/api/v1/investigate",
+        json={"query": QUERY, "fields": ["retrieval", "degradations"], "include_evidence_text": False}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"retrieval", "degradations"}
+    documents = body["retrieval"]["documents"]
+    assert documents and not any("text" in doc for doc in documents)
+    assert not any("content_hash" in doc["metadata"] for doc in documents)
+
+    ids = [doc["id"] for doc in documents]
+    evidence = client.get("/api/v1/evidence", params={"ids": ids + ["missing_chunk"]}).json()
+
+    chunks = backends.chunk_store.get_many(ids)
+    assert [item["id"] for item in evidence["evidence"]] == ids
+    assert [item["text"] for item in evidence["evidence"]] == [chunks[chunk_id]["text"] for chunk_id in ids]
+    assert evidence["missing"] == ["missing_chunk"]
+
+
+def test_untrimmed_responses_keep_evidence_text(client):
+    body = client.post("/api/v1/investigate", json={"query": QUERY}).json()
+
+    assert {"query", "retrieval", "report", "storage", "degradations"} <= set(body)
+    assert all(doc["text"] for doc in body["retrieval"]["documents"])
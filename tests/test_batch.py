@@ -0,0 +1,82 @@
+from app.api.models import QueryRequest
+
+QUERIES = [
+    "Which wallets received the stolen funds?",
+    "How did the attackers get the exchange credentials?",
+    "What happened in the hours after the breach?",
+]
+
+
+def run_batch(pipeline, queries, **options):
+    items = list(pipeline.investigate_batch([QueryRequest(query=query, **options) for query in queries]))
+    by_index = {item["index"]: item for item in items if item["type"] != "summary"}
+    return by_index, items[-1]
+
+
+def failing_for(fn, bad_text):
+    def wrapper(*args):
+        if bad_text in args:
+            raise RuntimeError(f"boom: {bad_text}")
+        return fn(*args)
+    return wrapper
+
+
+def test_failed_expansion_only_fails_its_query(pipeline, monkeypatch):
+    retriever = pipeline.retriever
+    monkeypatch.setattr(retriever, "generate_search_queries", failing_for(retriever.generate_search_queries, QUERIES[1]))
+
+    items, summary = run_batch(pipeline, QUERIES)
+
+    assert items[1]["type"] == "error"
+    assert "boom" in items[1]["error"]
+    assert [items[i]["type"] for i in (0, 2)] == ["result", "result"]
+    assert summary["failed_queries"] == 1
+
+
+def test_failed_guard_only_fails_its_query(pipeline, monkeypatch):
+    guard = pipeline.guard_agent
+    monkeypatch.setattr(guard, "is_query_relevant", failing_for(guard.is_query_relevant, QUERIES[0]))
+
+    items, summary = run_batch(pipeline, QUERIES)
+
+    assert items[0]["type"] == "error"
+    assert [items[i]["type"] for i in (1, 2)] == ["result", "result"]
+    assert summary["failed_queries"] == 1
+
+
+def test_failed_search_only_fails_the_queries_using_it(pipeline, monkeypatch):
+    retriever = pipeline.retriever
+    monkeypatch.setattr(retriever, "strategy", "single-step")
+    embedding = retriever.get_embedding(QUERIES[2])
+    search = retriever.search
+
+    def failing_search(query_embedding, *args):
+        if query_embedding == embedding:
+            raise RuntimeError("index unavailable")
+        return search(query_embedding, *args)
+
+    monkeypatch.setattr(retriever, "search", failing_search)
+
+    items, summary = run_batch(pipeline, QUERIES + [QUERIES[2]])
+
+    assert items[2]["type"] == items[3]["type"] == "error"
+    assert "index unavailable" in items[2]["error"]
+    assert [items[i]["type"] for i in (0, 1)] == ["result", "result"]
+    assert summary["failed_queries"] == 2
+
+
+def test_batch_results_carry_timings(pipeline):
+    items, _ = run_batch(pipeline, QUERIES[:1], include_timings=True)
+
+    timings = items[0]["result"]["timings"]
+    assert {"guard", "expansion", "retrieval", "rerank", "generation", "storage", "total"} <= set(timings)
+
+
+def test_queries_differing_only_in_include_timings_are_investigated_once(pipeline, backends):
+    requests = [QueryRequest(query=QUERIES[0]), QueryRequest(query=QUERIES[0], include_timings=True)]
+
+    items = {item["index"]: item for item in pipeline.investigate_batch(requests) if item["type"] == "result"}
+
+    assert backends.openai.calls["report"] == 1
+    assert "timings" not in items[0]["result"]
+    assert {"guard", "generation", "total"} <= set(items[1]["result"]["timings"])
@@ -0,0 +1,74 @@
+import time
+from app.api.models import QueryRequest
+from app.core.budget import LatencyBudget
+
+
+def spent_budget() -> LatencyBudget:
+    budget = LatencyBudget(1)
+    time.sleep(0.005)
+    return budget
+
+
+def test_budget_disabled_at_zero():
+    budget = LatencyBudget(0)
+    assert budget.remaining_ms("generation") is None
+    assert not budget.expired("generation")
+
+
+def test_stage_deadlines_are_cumulative_shares():
+    budget = LatencyBudget(1000)
+    assert budget.deadline_ms("guard") < budget.deadline_ms("generation") == 1000
+
+
+def test_report_skipped_when_generation_budget_spent(pipeline, backends):
+    budget = spent_budget()
+
+    report = pipeline.report_generator.generate_report(
+        "Who moved the funds?", [], {"strategy": "single-step"}, budget
+    )
+
+    assert report["skipped"] is True
+    assert "error" not in report
+    assert budget.degradations == ["report_skipped"]
+    assert backends.openai.calls["report"] == 0
+
+
+def test_investigation_degrades_without_saving_a_skipped_report(pipeline, backends, monkeypatch):
+    monkeypatch.setattr(LatencyBudget, "elapsed_ms", lambda self: 10.0)
+    response = pipeline.investigate(QueryRequest(query="Which wallets received the stolen funds?", latency_budget_ms=1))
+
+    assert "report_skipped" in response.degradations
+    assert not any(name.startswith("report_max_tokens_capped") for name in response.degradations)
+    assert response.report.skipped
+    assert not response.storage.success
+    assert backends.openai.calls["report"] == 0
+    assert not backends.s3.objects
+
+
+def test_report_generated_within_budget(pipeline, backends):
+    response = pipeline.investigate(QueryRequest(query="Which wallets received the stolen funds?", latency_budget_ms=60000))
+
+    assert response.degradations == []
+    assert not response.report.skipped
+    assert response.storage.success
+    assert backends.openai.calls["report"] == 1
+
+
+def test_guard_fails_closed_when_its_deadline_is_spent(pipeline, backends):
+    budget = spent_budget()
+
+    is_relevant, reason = pipeline.guard_agent.is_query_relevant("What is the weather in Paris?", budget)
+
+    assert not is_relevant and "deadline" in reason
+    assert budget.degradations == ["guard_deadline_exceeded"]
+    assert backends.openai.calls["guard"] == 0
+
+
+def test_a_tiny_client_budget_cannot_skip_the_guard(pipeline, backends, monkeypatch):
+    monkeypatch.setattr(LatencyBudget, "elapsed_ms", lambda self: 10.0)
+    response = pipeline.investigate(QueryRequest(query="What is the weather in Paris?", latency_budget_ms=1))
+
+    assert response.retrieval.strategy == "none"
+    assert "guard_deadline_exceeded" in response.degradations
+    assert backends.openai.calls["guard"] == backends.openai.calls["report"] == 0
+    assert not backends.s3.objects
@@ -0,0 +1,108 @@
+import threading
+import time
+from app.db.case_sources import S3CaseSource
+from benchmarks.backends import StubBackends
+from benchmarks.stubs import StubS3Client
+
+
+def bucket(count, prefix="evidence/"):
+    s3 = StubS3Client()
+    for i in range(count):
+        s3.put_object(Bucket="cases", Key=f"{prefix}file_{i:04d}.txt", Body=f"Wallet transfer number {i}.")
+    return s3
+
+
+def count_calls(s3, name):
+    calls = []
+    operation = getattr(s3, name)
+    setattr(s3, name, lambda **kwargs: calls.append(kwargs) or operation(**kwargs))
+    return calls
+
+
+def fail_download(s3, failing_key):
+    get_object = s3.get_object
+
+    def flaky_get_object(Bucket, Key, **kwargs):
+        if Key == failing_key:
+            raise ConnectionError("connection reset")
+        return get_object(Bucket=Bucket, Key=Key, **kwargs)
+
+    s3.get_object = flaky_get_object
+
+
+def test_listing_follows_every_page():
+    s3 = bucket(1003)
+    s3.put_object(Bucket="cases", Key="evidence/notes.md", Body="not a case file")
+    pages = count_calls(s3, "list_objects_v2")
+
+    objects = S3CaseSource(prefix="evidence/", bucket="cases", s3_client=s3).list_objects()
+
+    assert len(pages) == 2
+    assert len(objects) == 1003
+    assert objects["file_1002.txt"] == {"key": "evidence/file_1002.txt", "etag": s3.objects["evidence/file_1002.txt"]["ETag"]}
+
+
+def test_downloads_stay_within_the_concurrency_limit():
+    s3 = bucket(24)
+    get_object = s3.get_object
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def slow_get_object(**kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        try:
+            return get_object(**kwargs)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    s3.get_object = slow_get_object
+    loaded = list(S3CaseSource(prefix="evidence/", bucket="cases", s3_client=s3, max_workers=3).load())
+
+    assert len(loaded) == 24
+    assert peak[0] == 3
+
+
+def test_a_failed_download_skips_only_that_object():
+    s3 = bucket(5)
+    fail_download(s3, "evidence/file_0002.txt")
+    source = S3CaseSource(prefix="evidence/", bucket="cases", s3_client=s3, max_workers=2)
+    loaded = list(source.load())
+
+    assert sorted(case_file["metadata"]["file_name"] for case_file in loaded) == [
+        "file_0000.txt", "file_0001.txt", "file_0003.txt", "file_0004.txt"
+    ]
+    assert source.failed == {"file_0002.txt": "connection reset"}
+
+
+def test_a_failed_download_keeps_the_active_generation():
+    backends = StubBackends()
+    service = backends.document_service()
+    s3 = bucket(3)
+    assert service.load_all_documents(source=S3CaseSource(prefix="evidence/", bucket="cases", s3_client=s3))["success"]
+    active = backends.generations.resolve("")
+
+    fail_download(s3, "evidence/file_0001.txt")
+    result = service.load_all_documents(source=S3CaseSource(prefix="evidence/", bucket="cases", s3_client=s3))
+
+    assert not result["success"] and "file_0001.txt" in result["error"]
+    assert backends.generations.resolve("") == active
+
+
+def test_incremental_sync_skips_unchanged_etags_without_downloading():
+    backends = StubBackends()
+    service = backends.document_service()
+    s3 = bucket(4)
+    source = S3CaseSource(prefix="evidence/", bucket="cases", s3_client=s3)
+    assert service.load_all_documents(source=source)["success"]
+
+    s3.put_object(Bucket="cases", Key="evidence/file_0003.txt", Body="A new transfer to the mixer.")
+    downloads = count_calls(s3, "get_object")
+    result = service.sync_files(source=source)
+
+    assert [call["Key"] for call in downloads] == ["evidence/file_0003.txt"]
+    assert (result["added"], result["changed"], result["deleted"], result["failed"]) == (0, 1, 0, 0)
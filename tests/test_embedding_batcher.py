@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.rag.embedding_batcher import EmbeddingBatcher, get_embedding_batcher
+
+
+class RecordingEmbed:
+    def __init__(self, offset: float):
+        self.offset = offset
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        return [[self.offset + len(text)] for text in texts]
+
+
+def embed_concurrently(batcher, jobs):
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = [pool.submit(batcher.embed, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def test_batching_is_off_by_default():
+    assert get_embedding_batcher() is None
+
+
+def test_concurrent_texts_share_one_call():
+    batcher = EmbeddingBatcher(window_ms=100)
+    embed = RecordingEmbed(0)
+
+    results = embed_concurrently(batcher, [(["a"], embed), (["bb"], embed), (["ccc", "a"], embed)])
+
+    assert results == [[[1]], [[2]], [[3], [1]]]
+    assert len(embed.calls) == 1
+    assert sorted(embed.calls[0]) == ["a", "bb", "ccc"]
+
+
+def test_texts_for_different_embed_functions_are_not_mixed():
+    batcher = EmbeddingBatcher(window_ms=100)
+    small, large = RecordingEmbed(0), RecordingEmbed(1000)
+
+    results = embed_concurrently(batcher, [(["a"], small), (["a"], large), (["bb"], small)])
+
+    assert results == [[[1]], [[1001]], [[2]]]
+    assert sorted(small.calls[0]) == ["a", "bb"]
+    assert large.calls == [["a"]]
+
+
+def test_callers_with_the_same_key_share_a_call():
+    batcher = EmbeddingBatcher(window_ms=100)
+    first, second = RecordingEmbed(0), RecordingEmbed(0)
+
+    embed_concurrently(batcher, [(["a"], first, "model"), (["bb"], second, "model")])
+
+    assert len(first.calls) + len(second.calls) == 1
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    batcher = EmbeddingBatcher(window_ms=100)
+
+    def failing(texts):
+        raise RuntimeError("rate limited")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(batcher.embed, [text], failing) for text in ("a", "b")]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="rate limited"):
+                future.result()
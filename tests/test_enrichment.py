@@ -0,0 +1,79 @@
+from app.api.models import QueryRequest
+from app.api.pipeline import EVIDENCE_ATTRIBUTES, response_payload
+from app.core.config import settings
+from app.db.candidates import EvidenceCandidate
+from app.db.chunk_store import ChunkStore
+from app.rag.enrichment import ENRICHMENT_VERSION, ChunkEnricher
+
+TEXT = "Investigators found logs of transfers from wallet 0x" + "ab" * 20 + " at 02:14 UTC."
+
+
+def chunks(*texts):
+    return [{"id": f"chunk_{i}", "text": text, "metadata": {"file_name": "case.txt", "chunk_index": i}} for i, text in enumerate(texts)]
+
+
+def test_enrichment_is_reused_from_the_chunk_store_without_a_memo_store(monkeypatch):
+    monkeypatch.setattr(settings, "MEMO_STORE_PATH", "")
+    store = ChunkStore(":memory:")
+    enricher = ChunkEnricher(chunk_store=store)
+    assert enricher.memo_store is None
+
+    first = chunks(TEXT, "An unrelated note.", TEXT)
+    assert enricher.enrich(first) == 2
+    store.put_many(first, "case")
+
+    again = chunks(TEXT, "A new note.")
+    assert enricher.enrich(again) == 1
+    assert again[0]["metadata"]["wallets"] == first[0]["metadata"]["wallets"]
+    assert again[0]["metadata"]["enrichment_version"] == ENRICHMENT_VERSION
+    assert again[0]["metadata"]["file_name"] == "case.txt"
+
+
+def test_attributes_from_another_enrichment_version_are_recomputed(monkeypatch):
+    monkeypatch.setattr(settings, "MEMO_STORE_PATH", "")
+    store = ChunkStore(":memory:")
+    store.put_many([{"id": "old", "text": TEXT, "metadata": {"reliability": 0.1, "enrichment_version": "0"}}])
+
+    enriched = chunks(TEXT)
+    assert ChunkEnricher(chunk_store=store).enrich(enriched) == 1
+    assert enriched[0]["metadata"]["reliability"] != 0.1
+
+
+def test_fused_rerank_scores_stay_within_0_and_1(pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "ENRICHMENT_PRIOR_WEIGHT", 4.0)
+    monkeypatch.setattr(settings, "ENRICHMENT_TOPIC_WEIGHT", 1.0)
+    documents = [
+        EvidenceCandidate("strong", "Stolen funds moved to the mixer.", {"reliability": 0.95, "topics": ["transactions"]}, 1.0),
+        EvidenceCandidate("weak", "No direct link to the hack.", {"reliability": 0.05}, 0.0),
+    ]
+
+    reranked = pipeline.reranker.rerank_documents("Where did the stolen funds go?", documents)
+
+    assert {doc.id: doc.score for doc in reranked} == {"strong": 1.0, "weak": 0.0}
+
+
+def test_candidates_clipped_to_1_keep_their_prior_order(pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "ENRICHMENT_PRIOR_WEIGHT", 4.0)
+    documents = [
+        EvidenceCandidate("likely", "Stolen funds moved to the mixer.", {"reliability": 0.8}, 1.0),
+        EvidenceCandidate("certain", "Stolen funds moved to the mixer.", {"reliability": 0.95}, 1.0),
+    ]
+
+    reranked = pipeline.reranker.rerank_documents("Where did the stolen funds go?", documents)
+
+    assert [(doc.id, doc.score) for doc in reranked] == [("certain", 1.0), ("likely", 1.0)]
+
+
+def test_responses_leave_out_indexing_attributes_unless_requested(pipeline):
+    query = "Which wallets received the stolen funds?"
+    response = pipeline.investigate(QueryRequest(query=query))
+    assert any("reliability" in doc.metadata for doc in response.retrieval.documents)
+
+    slim = response_payload(response, QueryRequest(query=query))
+    full = response_payload(response, QueryRequest(query=query, fields=["retrieval", "evidence_attributes"]))
+
+    for doc in slim["retrieval"]["documents"]:
+        assert "file_name" in doc["metadata"]
+        assert not set(EVIDENCE_ATTRIBUTES) & set(doc["metadata"])
+    assert set(full) == {"retrieval"}
+    assert all("reliability" in doc["metadata"] for doc in full["retrieval"]["documents"])
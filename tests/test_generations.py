@@ -0,0 +1,75 @@
+import pytest
+from app.core.config import settings
+from app.db.generations import GenerationPointer, physical_namespace
+from benchmarks.backends import StubBackends
+
+NAMESPACE = "case-files"
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    backends = StubBackends()
+    directory = tmp_path / "case_files"
+    directory.mkdir()
+    (directory / "a.txt").write_text("The attacker moved the stolen funds through a mixer.")
+    return backends, backends.document_service(), str(directory)
+
+
+def namespaces(backends):
+    return set(backends.index.describe_index_stats()["namespaces"])
+
+
+def test_a_missing_pointer_resolves_to_the_legacy_namespace(tmp_path):
+    pointer = GenerationPointer(str(tmp_path))
+
+    assert pointer.resolve(NAMESPACE) == NAMESPACE
+    assert physical_namespace(NAMESPACE, "g1") == f"{NAMESPACE}.gen-g1"
+
+
+def test_activate_keeps_generations_keep_older_generations(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATIONS_KEEP", 1)
+    pointer = GenerationPointer(str(tmp_path))
+
+    assert pointer.activate(NAMESPACE, "g1") == []
+    assert pointer.activate(NAMESPACE, "g2") == [""]
+    assert pointer.activate(NAMESPACE, "g3") == ["g1"]
+    assert pointer.resolve(NAMESPACE) == f"{NAMESPACE}.gen-g3"
+    assert GenerationPointer(str(tmp_path)).read(NAMESPACE)["generations"] == ["g2", "g3"]
+
+    assert pointer.forget(NAMESPACE) == ["", "g2", "g3"]
+    assert pointer.resolve(NAMESPACE) == NAMESPACE
+
+
+def test_a_failed_verification_keeps_the_active_generation(corpus):
+    backends, service, directory = corpus
+    assert service.load_all_documents(case_files_dir=directory)["success"]
+    active = backends.generations.resolve(NAMESPACE)
+    before = namespaces(backends)
+
+    service.pinecone_db.verify = lambda namespace, documents: "0 of 1 vectors visible"
+    result = service.load_all_documents(case_files_dir=directory)
+
+    assert not result["success"] and "failed verification" in result["error"]
+    assert backends.generations.resolve(NAMESPACE) == active
+    assert namespaces(backends) == before
+    assert backends.chunk_store.namespaces() == [active]
+
+
+def test_retired_generations_are_deleted_only_after_the_switch(corpus, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATIONS_KEEP", 0)
+    backends, service, directory = corpus
+    assert service.load_all_documents(case_files_dir=directory)["success"]
+    old = backends.generations.resolve(NAMESPACE)
+
+    deletions = []
+    delete_all = service.pinecone_db.delete_all
+    service.pinecone_db.delete_all = lambda namespace: (
+        deletions.append((namespace, backends.generations.resolve(NAMESPACE))) or delete_all(namespace)
+    )
+    result = service.load_all_documents(case_files_dir=directory)
+
+    new = backends.generations.resolve(NAMESPACE)
+    assert result["success"] and new == physical_namespace(NAMESPACE, result["generation"]) != old
+    assert deletions == [(old, new)]
+    assert old not in namespaces(backends) and new in namespaces(backends)
+    assert backends.chunk_store.namespaces() == [new]
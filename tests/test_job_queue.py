@@ -0,0 +1,136 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from app.api.jobs import JobWorkerPool
+from app.core.config import settings
+from app.db.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def test_failed_attempts_are_retried_until_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    job = queue.enqueue({"query": "q"})
+
+    assert queue.claim("w1")["attempts"] == 1
+    assert queue.fail(job["job_id"], "w1", "boom")
+    assert queue.get(job["job_id"])["status"] == "queued"
+
+    assert queue.claim("w2")["attempts"] == 2
+    assert queue.fail(job["job_id"], "w2", "boom again")
+    failed = queue.get(job["job_id"])
+    assert failed["status"] == "failed"
+    assert failed["error"] == "boom again"
+    assert queue.claim("w3") is None
+
+
+def test_expired_lease_is_reclaimed(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", -1)
+    job = queue.enqueue({"query": "q"})
+
+    queue.claim("w1")
+    reclaimed = queue.claim("w2")
+    assert reclaimed["job_id"] == job["job_id"]
+    assert reclaimed["attempts"] == 2
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", -1)
+    job = queue.enqueue({"query": "q"})
+
+    queue.claim("w1")
+    assert queue.claim("w2") is None
+
+    failed = queue.get(job["job_id"])
+    assert failed["status"] == "failed"
+    assert "lease expired" in failed["error"]
+    assert queue.purge_finished(older_than_seconds=-1) == 1
+
+
+def test_only_the_lease_holder_records_the_outcome(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", -1)
+    job = queue.enqueue({"query": "q"})
+
+    queue.claim("w1")
+    queue.claim("w2")
+
+    assert not queue.complete(job["job_id"], "w1", {"stale": True})
+    assert not queue.fail(job["job_id"], "w1", "stale")
+    assert queue.get(job["job_id"])["status"] == "running"
+
+    assert queue.complete(job["job_id"], "w2", {"ok": True})
+    done = queue.get(job["job_id"])
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"ok": True}
+
+
+def test_renew_extends_only_the_holders_lease(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", -1)
+    job = queue.enqueue({"query": "q"})
+    queue.claim("w1")
+
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 60)
+    assert not queue.renew(job["job_id"], "w2")
+    assert queue.renew(job["job_id"], "w1")
+    assert queue.claim("w2") is None
+
+
+class SlowPipeline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.runs = 0
+
+    def investigate(self, request):
+        self.runs += 1
+        time.sleep(self.seconds)
+        return SimpleNamespace(model_dump=lambda mode: {"query": request.query})
+
+
+def test_a_job_slower_than_its_lease_runs_once(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.3)
+    job = queue.enqueue({"query": "Who moved the funds?"})
+    pipeline = SlowPipeline(seconds=0.8)
+    pool = JobWorkerPool(queue, lambda: pipeline, workers=0)
+
+    runner = threading.Thread(target=pool.run_job, args=(pipeline, queue.claim("w1"), "w1"))
+    runner.start()
+    deadline = time.monotonic() + 0.8
+    while time.monotonic() < deadline:
+        assert queue.claim("w2") is None
+        time.sleep(0.05)
+    runner.join()
+
+    done = queue.get(job["job_id"])
+    assert (done["status"], done["attempts"], pipeline.runs) == ("succeeded", 1, 1)
+
+
+def test_workers_retry_building_the_pipeline(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_POLL_INTERVAL_SECONDS", 0.01)
+    job = queue.enqueue({"query": "Who moved the funds?"})
+    pipeline = SlowPipeline(seconds=0)
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("OpenAI client not configured")
+        return pipeline
+
+    pool = JobWorkerPool(queue, factory, workers=1)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 5
+        while queue.get(job["job_id"])["status"] != "succeeded" and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop(timeout=5)
+
+    assert queue.get(job["job_id"])["status"] == "succeeded"
+    assert len(attempts) == 3
@@ -0,0 +1,122 @@
+import threading
+import numpy as np
+import pytest
+from app.db.local_index import LocalVectorIndex
+
+
+def random_vectors(n, dimension=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dimension)).astype(np.float32)
+
+
+def records(vectors, prefix="v", **metadata):
+    return [
+        {"id": f"{prefix}{i}", "values": vector.tolist(), "metadata": {"row": i, **metadata}}
+        for i, vector in enumerate(vectors)
+    ]
+
+
+@pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+def test_query_finds_the_nearest_vectors(precision):
+    vectors = random_vectors(200)
+    index = LocalVectorIndex(dimension=16, precision=precision)
+    index.upsert(records(vectors))
+
+    matches = index.query(vectors[7].tolist(), top_k=3, include_metadata=True)["matches"]
+
+    assert matches[0]["id"] == "v7"
+    assert matches[0]["score"] == pytest.approx(1.0, abs=1e-5)  # rescored at full precision
+    assert matches[0]["metadata"]["row"] == 7
+    assert [match["score"] for match in matches] == sorted((match["score"] for match in matches), reverse=True)
+
+
+def test_ivf_query_matches_exact_search():
+    vectors = random_vectors(2000, seed=1)
+    exact = LocalVectorIndex(dimension=16)
+    ivf = LocalVectorIndex(dimension=16, ann="ivf", nprobe=64)
+    for index in (exact, ivf):
+        index.upsert(records(vectors))
+    ivf.build_ann(nlist=64)
+
+    query = vectors[42].tolist()
+    assert [m["id"] for m in ivf.query(query, top_k=5)["matches"]] == [m["id"] for m in exact.query(query, top_k=5)["matches"]]
+
+
+def test_filters_updates_and_deletes():
+    vectors = random_vectors(10)
+    index = LocalVectorIndex(dimension=16)
+    index.upsert(records(vectors[:5], file_name="a.txt") + records(vectors[5:], prefix="w", file_name="b.txt"))
+
+    matches = index.query(vectors[0].tolist(), top_k=10, filter={"file_name": {"$eq": "b.txt"}})["matches"]
+    assert {match["id"] for match in matches} == {f"w{i}" for i in range(5)}
+
+    index.upsert([{"id": "v0", "values": vectors[9].tolist(), "metadata": {"file_name": "a.txt"}}])
+    assert index.query(vectors[9].tolist(), top_k=2)["matches"][0]["id"] in ("v0", "w4")
+
+    index.delete(filter={"file_name": "b.txt"})
+    assert index.describe_index_stats()["total_vector_count"] == 5
+
+
+def test_writes_publish_a_new_snapshot_instead_of_changing_the_old_one():
+    vectors = random_vectors(20)
+    index = LocalVectorIndex(dimension=16)
+    index.upsert(records(vectors))
+    snapshot = index._namespaces[""]
+    before = snapshot.vectors.copy()
+
+    index.upsert([{"id": "v3", "values": vectors[4].tolist()}, {"id": "new", "values": vectors[5].tolist()}])
+    index.delete(ids=["v0"])
+
+    assert np.array_equal(snapshot.vectors, before)
+    assert len(snapshot.ids) == len(snapshot.metadata) == 20
+    assert index._namespaces[""] is not snapshot
+
+
+def test_queries_run_concurrently_with_writes():
+    vectors = random_vectors(500)
+    index = LocalVectorIndex(dimension=16, precision="int8")
+    index.upsert(records(vectors))
+    errors = []
+    stop = threading.Event()
+
+    def query():
+        while not stop.is_set():
+            try:
+                matches = index.query(vectors[1].tolist(), top_k=5)["matches"]
+                assert matches[0]["id"] == "v1"
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=query) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(50):
+        index.upsert(records(random_vectors(10, seed=100 + i), prefix=f"batch{i}-"))
+        index.delete(ids=[f"batch{i}-0"])
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert index.describe_index_stats()["total_vector_count"] == 500 + 50 * 9
+
+
+def test_reload_swaps_in_a_namespace_written_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.LOCAL_INDEX_MMAP", True)
+    vectors = random_vectors(30)
+    writer = LocalVectorIndex(str(tmp_path), dimension=16)
+    writer.upsert(records(vectors[:20]))
+    writer.persist()
+
+    reader = LocalVectorIndex(str(tmp_path), dimension=16)
+    snapshot = reader._namespaces[""]
+    assert reader.query(vectors[3].tolist(), top_k=1)["matches"][0]["id"] == "v3"
+
+    writer.upsert(records(vectors[20:], prefix="late"))
+    writer.persist()
+    assert reader.query(vectors[25].tolist(), top_k=1)["matches"][0]["id"] == "late5"
+    assert len(snapshot.ids) == 20
+
+    # A memory-mapped snapshot is read-only; updating it goes through a writeable copy.
+    reader.upsert([{"id": "v0", "values": vectors[1].tolist()}])
+    assert not snapshot.vectors.flags.writeable
@@ -0,0 +1,22 @@
+import os
+from main import prepare_multiprocess_metrics
+
+
+def test_each_run_gets_its_own_metrics_directory(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    first = prepare_multiprocess_metrics()
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR")
+    second = prepare_multiprocess_metrics()
+
+    assert first != second and os.path.isdir(first) and os.path.isdir(second)
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == second
+    for directory in (first, second):
+        os.rmdir(directory)
+
+
+def test_a_configured_metrics_directory_is_cleared_and_kept(tmp_path, monkeypatch):
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    assert prepare_multiprocess_metrics() is None
+    assert os.path.isdir(tmp_path) and not os.listdir(tmp_path)
@@ -0,0 +1,42 @@
+import pytest
+from app.core.config import settings
+from app.db.chunk_store import ChunkStore
+from app.db.local_index import LocalVectorIndex
+from app.db.pinecone_db import PineconeDB
+
+
+@pytest.fixture(autouse=True)
+def no_generations(monkeypatch):
+    monkeypatch.setattr("app.db.pinecone_db.get_generation_pointer", lambda: None)
+
+
+def legacy_index():
+    """Two chunks indexed before the chunk store, with their text in the vector metadata."""
+    index = LocalVectorIndex(dimension=2)
+    index.upsert([
+        {"id": "a", "values": [1.0, 0.0], "metadata": {"text": "old text a", "file_name": "a.txt"}},
+        {"id": "b", "values": [0.8, 0.6], "metadata": {"text": "old text b", "file_name": "b.txt"}},
+    ], namespace="case-files")
+    return index
+
+
+def test_chunks_missing_from_the_store_are_fetched_from_the_index():
+    store = ChunkStore(":memory:")
+    store.put_many([{"id": "a", "text": "stored text a", "metadata": {"file_name": "a.txt"}}], "case-files")
+    db = PineconeDB(index=legacy_index(), chunk_store=store)
+
+    candidates = db.similarity_search([1.0, 0.0], top_k=2, namespace="case-files")
+
+    assert [(doc.id, doc.text) for doc in candidates] == [("a", "stored text a"), ("b", "old text b")]
+    assert candidates[1].metadata == {"file_name": "b.txt"}
+
+
+def test_without_a_chunk_store_text_comes_from_the_index(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_STORE_PATH", "")
+    db = PineconeDB(index=legacy_index())
+
+    assert db.chunk_store is None
+    assert {doc.id: doc.text for doc in db.similarity_search([1.0, 0.0], top_k=2, namespace="case-files")} == {
+        "a": "old text a", "b": "old text b"
+    }
+    assert db.get_chunks(["b", "missing"], "case-files") == {"b": {"text": "old text b", "metadata": {"file_name": "b.txt"}}}
@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api import pipeline as pipeline_module
+from app.api.main import app
+from app.api.models import QueryRequest
+from app.api.pipeline import InvestigationPipeline
+from app.core import profiling
+from app.core.config import settings
+
+QUERY = "Which wallets received the stolen funds?"
+
+
+@pytest.fixture
+def client(backends, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILER", "cprofile")
+    backends.install(app)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_profiling_is_off_by_default(client):
+    assert not settings.PROFILE_HEADER_ENABLED
+
+    response = client.post("/api/v1/investigate", json={"query": QUERY}, headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/api/v1/profiles").status_code == 404
+
+
+def test_profile_is_labelled_without_the_query_and_needs_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_HEADER_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "secret")
+
+    response = client.post("/api/v1/investigate", json={"query": QUERY}, headers={"X-Profile": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    assert client.get("/api/v1/profiles").status_code == 403
+    assert client.get("/api/v1/profiles", headers={"X-Profile-Token": "wrong"}).status_code == 403
+
+    listed = client.get("/api/v1/profiles", headers={"X-Profile-Token": "secret"}).json()["profiles"]
+    assert [info["profile_id"] for info in listed] == [profile_id]
+    assert listed[0]["label"] == profiling.query_label(QUERY)
+    assert QUERY not in listed[0]["label"]
+
+    download = client.get(f"/api/v1/profiles/{profile_id}", headers={"X-Profile-Token": "secret"})
+    assert download.status_code == 200
+
+
+def test_profiled_request_is_not_coalesced(backends, monkeypatch):
+    calls = []
+    monkeypatch.setattr(pipeline_module._investigations, "do_shared", lambda *args: calls.append(args))
+    pipeline = InvestigationPipeline(**backends.components())
+
+    pipeline.investigate(QueryRequest(query=QUERY), coalesce=False)
+
+    assert calls == []
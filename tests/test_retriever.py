@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.api.models import QueryRequest
+from app.core.budget import LatencyBudget
+from app.core.config import settings
+from app.db.candidates import EvidenceCandidate
+from benchmarks.backends import StubBackends
+from benchmarks.stubs import LatencyProfile
+
+
+def candidate(id, score, values):
+    return EvidenceCandidate(id, f"text {id}", {}, score, values)
+
+
+def test_mmr_is_off_by_default_and_fetches_no_vectors(pipeline, monkeypatch):
+    retriever = pipeline.retriever
+    assert not settings.MMR_ENABLED
+    assert retriever.candidate_k(retriever.top_k) == retriever.top_k
+
+    calls = []
+    search = retriever.pinecone_db.similarity_search
+    monkeypatch.setattr(retriever.pinecone_db, "similarity_search", lambda **kwargs: calls.append(kwargs) or search(**kwargs))
+    documents = retriever.retrieve("Which wallets received the stolen funds?")["documents"]
+
+    assert calls and not any(call["include_values"] for call in calls)
+    assert all(doc.values is None for doc in documents)
+
+
+def test_mmr_drops_near_duplicates(pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "MMR_ENABLED", True)
+    retriever = pipeline.retriever
+    monkeypatch.setattr(retriever, "top_k", 2)
+
+    documents = [
+        candidate("a", 0.9, [1.0, 0.0]),
+        candidate("a-copy", 0.89, [1.0, 0.01]),
+        candidate("b", 0.8, [0.0, 1.0]),
+    ]
+
+    assert [doc.id for doc in retriever.select_diverse(documents)] == ["a", "b"]
+    assert retriever.candidate_k(2) == settings.MMR_FETCH_K
+
+
+def test_requests_choose_their_own_strategy_and_top_k(pipeline, backends):
+    default = pipeline.investigate(QueryRequest(query="Which wallets received the stolen funds?"))
+    backends.openai.calls.clear()
+
+    custom = pipeline.investigate(
+        QueryRequest(query="Which wallets received the stolen funds?", strategy="single-step", top_k=1)
+    )
+
+    assert default.retrieval.strategy == "multi-step"
+    assert custom.retrieval.strategy == "single-step" and custom.retrieval.expanded_queries is None
+    assert len(custom.retrieval.documents) == 1 < len(default.retrieval.documents)
+    assert backends.openai.calls["expansion"] == 0
+    assert (pipeline.retriever.strategy, pipeline.retriever.top_k) == ("multi-step", 5)
+
+
+def test_batch_requests_choose_their_own_strategy_and_top_k(pipeline):
+    query = "Which wallets received the stolen funds?"
+    requests = [QueryRequest(query=query), QueryRequest(query=query, strategy="hierarchical", top_k=1)]
+
+    items = {item["index"]: item["result"] for item in pipeline.investigate_batch(requests) if item["type"] == "result"}
+
+    assert items[0]["retrieval"]["strategy"] == "multi-step"
+    assert items[1]["retrieval"]["strategy"] == "hierarchical"
+    assert len(items[1]["retrieval"]["documents"]) == 1 < len(items[0]["retrieval"]["documents"])
+
+
+def expanding_retriever(expansion_ms):
+    backends = StubBackends(latency=LatencyProfile({"expansion": expansion_ms}))
+    return backends, backends.components()["retriever"]
+
+
+def test_concurrent_identical_expansions_share_one_call():
+    backends, retriever = expanding_retriever(200)
+    query = "Which exchange received the laundered funds?"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: retriever.generate_search_queries(query, LatencyBudget(60000)), range(4)))
+
+    assert backends.openai.calls["expansion"] == 1
+    assert len(results[0]) > 1 and all(result == results[0] for result in results)
+
+
+def test_an_expired_expansion_deadline_searches_the_raw_query():
+    backends, retriever = expanding_retriever(0)
+    query = "Which wallet paid the ransom?"
+    budget = LatencyBudget(1)
+    time.sleep(0.01)
+
+    assert retriever.generate_search_queries(query, budget) == [query]
+    assert budget.degradations == ["query_expansion_skipped"]
+    assert backends.openai.calls["expansion"] == 0
+
+
+def test_a_slow_expansion_falls_back_at_the_deadline():
+    backends, retriever = expanding_retriever(1000)
+    query = "Which mixer handled the stolen funds?"
+    budget = LatencyBudget(400)
+
+    started = time.monotonic()
+    assert retriever.generate_search_queries(query, budget) == [query]
+
+    assert (time.monotonic() - started) * 1000 < 500
+    assert budget.degradations == ["query_expansion_skipped"]
+    assert backends.openai.calls["expansion"] == 1
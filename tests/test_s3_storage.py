@@ -0,0 +1,24 @@
+import itertools
+from app.db import s3_storage
+from app.db.s3_storage import S3Storage
+from benchmarks.stubs import StubS3Client
+
+
+def test_reports_are_listed_newest_first_across_pages(monkeypatch):
+    clock = itertools.count(1_800_000_000, 5)
+    monkeypatch.setattr(s3_storage.time, "time", lambda: next(clock))
+    client = StubS3Client()
+    client.put_object(Bucket="", Key="report_20240101_120000_old_query_abcd1234.json", Body="{}")
+    storage = S3Storage(s3_client=client)
+
+    saved = [storage.save_report({"query": f"query {i}"})["filename"] for i in range(5)]
+
+    listed, token = [], None
+    while True:
+        page = storage.list_reports(limit=2, continuation_token=token)
+        listed.extend(report["filename"] for report in page["reports"])
+        token = page["next_token"]
+        if token is None:
+            break
+
+    assert listed == saved[::-1] + ["report_20240101_120000_old_query_abcd1234.json"]
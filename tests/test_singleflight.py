@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import pytest
+from app.api.models import QueryRequest
+from app.core.budget import LatencyBudget
+from app.core.singleflight import SingleFlight
+
+
+def slow(release: threading.Event, calls: list, value="done"):
+    def fn(*args):
+        calls.append(args)
+        release.wait(5)
+        return value
+    return fn
+
+
+def start_leader(pool, fn):
+    future = pool.submit(fn)
+    time.sleep(0.05)  # let it register as the in-flight call
+    return future
+
+
+def test_concurrent_callers_share_one_computation():
+    flight, release, calls = SingleFlight("test"), threading.Event(), []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = start_leader(pool, lambda: flight.do_shared("key", slow(release, calls)))
+        follower = pool.submit(flight.do_shared, "key", slow(release, calls))
+        time.sleep(0.05)
+        release.set()
+
+        assert leader.result() == ("done", False)
+        assert follower.result() == ("done", True)
+    assert len(calls) == 1
+
+
+def test_exceptions_reach_every_caller():
+    flight = SingleFlight("test")
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_each_caller_waits_only_until_its_own_timeout():
+    flight, release, calls = SingleFlight("test"), threading.Event(), []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = start_leader(pool, lambda: flight.do_within("key", None, slow(release, calls)))
+
+        with pytest.raises(FutureTimeoutError):
+            flight.do_within("key", 0.05, slow(release, calls))
+
+        release.set()
+        assert leader.result() == "done"
+    assert len(calls) == 1
+
+
+def test_leader_timeout_does_not_cancel_the_shared_call():
+    flight, release, calls = SingleFlight("test"), threading.Event(), []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        with pytest.raises(FutureTimeoutError):
+            flight.do_within("key", 0.05, slow(release, calls))
+
+        follower = pool.submit(flight.do_within, "key", None, slow(release, calls))
+        time.sleep(0.05)
+        release.set()
+        assert follower.result() == "done"
+    assert len(calls) == 1
+
+
+def test_expansion_follower_applies_its_own_deadline(pipeline, monkeypatch):
+    retriever, release, calls = pipeline.retriever, threading.Event(), []
+    monkeypatch.setattr(retriever, "_generate_search_queries", slow(release, calls, ["a", "b", "c"]))
+    query = "Which wallets received the stolen funds?"
+    patient, hurried = LatencyBudget(60000), LatencyBudget(200)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = start_leader(pool, lambda: retriever.generate_search_queries(query, patient))
+
+        assert retriever.generate_search_queries(query, hurried) == [query]
+        assert hurried.degradations == ["query_expansion_skipped"]
+
+        release.set()
+        assert leader.result() == ["a", "b", "c"]
+    assert patient.degradations == []
+    # The shared call ran without either request's deadline.
+    assert calls == [(query,)]
+
+
+def test_coalesced_investigation_keeps_the_followers_query(pipeline, monkeypatch):
+    release, calls = threading.Event(), []
+    investigate = pipeline._investigate
+
+    def slow_investigate(request):
+        calls.append(request.query)
+        release.wait(5)
+        return investigate(request)
+
+    monkeypatch.setattr(pipeline, "_investigate", slow_investigate)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = start_leader(pool, lambda: pipeline.investigate(QueryRequest(query="Who stole the funds?")))
+        follower = pool.submit(pipeline.investigate, QueryRequest(query="  who STOLE the funds? "))
+        time.sleep(0.05)
+        release.set()
+        leader_response = leader.result()
+
+    follower_response = follower.result()
+    assert calls == ["Who stole the funds?"]
+    assert follower_response.query == follower_response.report.query == "  who STOLE the funds? "
+    assert leader_response.query == "Who stole the funds?"
+    assert follower_response.degradations is not leader_response.degradations
+
+
+def test_requests_differing_only_in_include_timings_share_one_run(pipeline, backends, monkeypatch):
+    release = threading.Event()
+    investigate = pipeline._investigate
+    monkeypatch.setattr(pipeline, "_investigate", lambda request: release.wait(5) and investigate(request))
+    query = "Who stole the funds?"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = start_leader(pool, lambda: pipeline.investigate(QueryRequest(query=query)))
+        follower = pool.submit(pipeline.investigate, QueryRequest(query=query, include_timings=True))
+        time.sleep(0.05)
+        release.set()
+        leader_response, follower_response = leader.result(), follower.result()
+
+    assert backends.openai.calls["report"] == 1
+    assert leader_response.timings is None
+    assert set(follower_response.timings) == {"coalesced_wait", "total"}
@@ -0,0 +1,39 @@
+import requests
+from streamlit.testing.v1 import AppTest
+
+QUERY = "Which wallets received the stolen funds?"
+
+
+def test_advanced_settings_are_sent_with_the_query(monkeypatch):
+    posted = []
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, payload):
+            self.payload = payload
+
+        def json(self):
+            return self.payload
+
+    def post(self, url, json=None, **kwargs):
+        posted.append(json)
+        return Response({
+            "query": json["query"],
+            "retrieval": {"documents": [], "strategy": json["strategy"], "expanded_queries": None},
+            "report": {"report": "No evidence.", "query": json["query"], "timestamp": "20260101_000000"},
+            "storage": {"success": False, "error": "not saved"},
+            "degradations": []
+        })
+
+    monkeypatch.setattr(requests.Session, "post", post)
+    monkeypatch.setattr(requests.Session, "get", lambda self, url, **kwargs: Response({"reports": [], "next_token": None}))
+    app = AppTest.from_file("app/ui/streamlit_app.py", default_timeout=30)
+    app.run()
+
+    app.text_area[0].input(QUERY)
+    app.radio[0].set_value("single-step")
+    app.slider[0].set_value(3)
+    app.button[0].click().run()
+
+    assert posted == [{"query": QUERY, "strategy": "single-step", "top_k": 3}]
@@ -0,0 +1,120 @@
+import time
+import pytest
+from app.api.watcher import CorpusWatcher
+from app.core.config import settings
+from app.db.pinecone_db import case_namespace, file_namespace
+from app.rag.embedding_cache import EmbeddingCache
+from benchmarks.backends import StubBackends
+
+LONG = "The attacker moved the stolen funds through a mixer and then withdrew them to a new wallet overnight."
+SHORT = "The attacker used phishing."
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 8)
+    monkeypatch.setattr(settings, "CHUNK_OVERLAP", 0)
+    backends = StubBackends()
+    cache = EmbeddingCache(":memory:")
+    service = backends.document_service(cache=cache)
+    directory = tmp_path / "case_files"
+    directory.mkdir()
+    (directory / "a.txt").write_text(LONG)
+    (directory / "b.txt").write_text(SHORT)
+    assert service.load_all_documents(case_files_dir=str(directory))["success"]
+    return backends, service, cache, directory
+
+
+def active_namespace(backends):
+    return backends.generations.resolve(case_namespace(None))
+
+
+def indexed(backends):
+    namespace = active_namespace(backends)
+    files = backends.chunk_store.files(namespace)
+    ids = {chunk_id for entry in files.values() for chunk_id in entry["ids"]}
+    stats = backends.index.describe_index_stats()["namespaces"]
+    assert stats[namespace]["vector_count"] == len(ids)
+    return {name: sorted(entry["ids"]) for name, entry in files.items()}
+
+
+def test_sync_adds_a_new_file(corpus):
+    backends, service, _, directory = corpus
+    (directory / "c.txt").write_text(SHORT + " Again.")
+
+    result = service.sync_files(case_files_dir=str(directory))
+
+    assert (result["added"], result["changed"], result["deleted"]) == (1, 0, 0)
+    assert indexed(backends)["c.txt"] == ["c.txt_chunk_0"]
+
+
+def test_sync_replaces_a_changed_file_and_evicts_its_old_embeddings(corpus):
+    backends, service, cache, directory = corpus
+    old_ids = indexed(backends)["a.txt"]
+    old_texts = [chunk["text"] for chunk in backends.chunk_store.get_many(old_ids).values()]
+    assert len(old_ids) > 1 and all(cache.get_many(settings.embedding_model_key, old_texts))
+
+    calls = []
+    db = service.pinecone_db
+    for name in ("upsert_documents", "delete_documents"):
+        method = getattr(db, name)
+        setattr(db, name, lambda *args, _name=name, _method=method: calls.append(_name) or _method(*args))
+    (directory / "a.txt").write_text(SHORT + " Then ransom.")
+
+    result = service.sync_files(case_files_dir=str(directory))
+
+    assert (result["added"], result["changed"], result["deleted"]) == (0, 1, 0)
+    assert calls == ["upsert_documents", "delete_documents"]
+    assert indexed(backends)["a.txt"] == ["a.txt_chunk_0"]
+    assert backends.chunk_store.get_many(["a.txt_chunk_0"])["a.txt_chunk_0"]["text"].endswith("Then ransom.")
+    assert cache.get_many(settings.embedding_model_key, old_texts) == [None] * len(old_texts)
+
+
+def test_sync_removes_a_deleted_file(corpus):
+    backends, service, _, directory = corpus
+    (directory / "b.txt").unlink()
+
+    result = service.sync_files(case_files_dir=str(directory))
+
+    assert (result["added"], result["changed"], result["deleted"]) == (0, 0, 1)
+    assert set(indexed(backends)) == {"a.txt"}
+    summaries = backends.index.fetch(["a.txt", "b.txt"], file_namespace(active_namespace(backends)))["vectors"]
+    assert set(summaries) == {"a.txt"}
+
+
+def test_sync_of_unchanged_files_changes_nothing(corpus):
+    backends, service, _, directory = corpus
+    before = indexed(backends)
+
+    result = service.sync_files(case_files_dir=str(directory))
+
+    assert (result["added"], result["changed"], result["deleted"], result["chunk_count"]) == (0, 0, 0, 0)
+    assert indexed(backends) == before
+
+
+class FlakyService:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    def sync_files(self, case_id, case_files_dir, file_names):
+        self.calls.append(file_names)
+        if len(self.calls) <= self.failures:
+            return {"success": False, "error": "index not reachable"}
+        return {"success": True}
+
+
+def test_watcher_retries_the_start_up_reconcile_until_it_succeeds(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WATCH_LOCK_PATH", str(tmp_path / "watcher.lock"))
+    service = FlakyService(failures=2)
+    watcher = CorpusWatcher(service=service, case_files_dir=str(tmp_path), poll_interval=0.01, debounce=0.01)
+    assert watcher.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(service.calls) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+    finally:
+        watcher.stop(timeout=5)
+
+    assert service.calls == [None, None, None]